@@ -0,0 +1,153 @@
+#------------------------------------------------------------
+# Per-location equipment availability summary
+# (Equipment_Availability_Summary).
+#
+# The equipment write handlers apply a +/- delta for the row
+# they change inside their own transaction, so utilization
+# reads scan a handful of summary rows instead of grouping
+# Equipment_Maintenance on every request.
+#
+#   flask --app backend_app check-equipment-summary [--repair]
+#
+# compares the summary with a fresh aggregation and, with
+# --repair, rebuilds it from scratch.
+#------------------------------------------------------------
+import click
+
+from backend.db_connection import db
+
+SUMMARY_TABLE = """
+CREATE TABLE IF NOT EXISTS Equipment_Availability_Summary (
+    location VARCHAR(100) NOT NULL DEFAULT '',
+    total_equipment INT NOT NULL DEFAULT 0,
+    available_equipment INT NOT NULL DEFAULT 0,
+    maintenance_equipment INT NOT NULL DEFAULT 0,
+    out_of_order_equipment INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (location)
+)
+"""
+
+COUNTERS = ("total_equipment", "available_equipment", "maintenance_equipment", "out_of_order_equipment")
+
+# `condition` spellings used by the two schemas -> summary counter
+CONDITION_COUNTERS = {
+    "available": "available_equipment",
+    "good": "available_equipment",
+    "maintenance": "maintenance_equipment",
+    "requires maintenance": "maintenance_equipment",
+    "out_of_order": "out_of_order_equipment",
+    "out of order": "out_of_order_equipment",
+}
+
+
+def _bucket(row):
+    """(location, counter) a row counts towards; location '' when unset."""
+    condition = (row.get("condition") or "").strip().lower()
+    return row.get("location") or "", CONDITION_COUNTERS.get(condition)
+
+
+def lock_row(cursor, equip_id):
+    """Read (and row-lock) an equipment row before changing it."""
+    cursor.execute("SELECT * FROM Equipment_Maintenance WHERE equip_ID = %s FOR UPDATE", (equip_id,))
+    return cursor.fetchone()
+
+
+def read_row(cursor, equip_id):
+    cursor.execute("SELECT * FROM Equipment_Maintenance WHERE equip_ID = %s", (equip_id,))
+    return cursor.fetchone()
+
+
+def apply_delta(cursor, before, after):
+    """
+    Move one equipment row from its `before` bucket to its `after` bucket.
+
+    Either side may be None (insert/delete). Must run in the same
+    transaction as the write it accounts for.
+    """
+    deltas = {}
+    for row, sign in ((before, -1), (after, 1)):
+        if row is None:
+            continue
+        location, counter = _bucket(row)
+        bucket = deltas.setdefault(location, dict.fromkeys(COUNTERS, 0))
+        bucket["total_equipment"] += sign
+        if counter:
+            bucket[counter] += sign
+
+    for location, bucket in deltas.items():
+        if not any(bucket.values()):
+            continue
+        cursor.execute(
+            f"""
+            INSERT INTO Equipment_Availability_Summary (location, {', '.join(COUNTERS)})
+            VALUES (%s, {', '.join(['%s'] * len(COUNTERS))})
+            ON DUPLICATE KEY UPDATE
+                {', '.join(f'{c} = {c} + VALUES({c})' for c in COUNTERS)}
+            """,
+            (location, *(bucket[c] for c in COUNTERS)),
+        )
+
+
+def _aggregate_query(cursor):
+    """GROUP BY query computing the summary from Equipment_Maintenance."""
+    cursor.execute("SHOW COLUMNS FROM Equipment_Maintenance LIKE 'location'")
+    location = "COALESCE(location, '')" if cursor.fetchall() else "''"
+    counts = []
+    for counter in COUNTERS[1:]:
+        spellings = ", ".join(f"'{c}'" for c, target in CONDITION_COUNTERS.items() if target == counter)
+        counts.append(f"COUNT(CASE WHEN LOWER(TRIM(`condition`)) IN ({spellings}) THEN 1 END) AS {counter}")
+    return f"""
+        SELECT {location} AS location, COUNT(*) AS total_equipment, {', '.join(counts)}
+        FROM Equipment_Maintenance
+        GROUP BY 1
+    """
+
+
+def check(cursor):
+    """Return [(location, counter, summary_value, actual_value)] for every mismatch."""
+    cursor.execute(_aggregate_query(cursor))
+    actual = {row["location"]: row for row in cursor.fetchall()}
+    cursor.execute(f"SELECT location, {', '.join(COUNTERS)} FROM Equipment_Availability_Summary")
+    summary = {row["location"]: row for row in cursor.fetchall()}
+
+    mismatches = []
+    for location in sorted(set(actual) | set(summary)):
+        for counter in COUNTERS:
+            have = (summary.get(location) or {}).get(counter, 0)
+            want = (actual.get(location) or {}).get(counter, 0)
+            if have != want:
+                mismatches.append((location, counter, have, want))
+    return mismatches
+
+
+def rebuild(cursor):
+    """Replace the summary with a fresh aggregation. Returns the number of locations."""
+    query = _aggregate_query(cursor)
+    cursor.execute("DELETE FROM Equipment_Availability_Summary")
+    cursor.execute(
+        f"INSERT INTO Equipment_Availability_Summary (location, {', '.join(COUNTERS)}) {query}"
+    )
+    return cursor.rowcount
+
+
+def init_app(app):
+    """Register the consistency checker command on `app`."""
+
+    @app.cli.command("check-equipment-summary")
+    @click.option("--repair", is_flag=True, help="rebuild the summary from Equipment_Maintenance")
+    def check_command(repair):
+        """Compare the equipment availability summary with Equipment_Maintenance."""
+        with db.transaction() as cursor:
+            cursor.execute(SUMMARY_TABLE)
+            # lock the source table so the comparison/rebuild sees a stable snapshot
+            cursor.execute("SELECT COUNT(*) AS n FROM Equipment_Maintenance FOR SHARE")
+            cursor.fetchall()
+            mismatches = check(cursor)
+            for location, counter, have, want in mismatches:
+                click.echo(f"{location or '(no location)'}: {counter} is {have}, expected {want}")
+            if not mismatches:
+                click.echo("equipment summary is consistent")
+            elif repair:
+                click.echo(f"rebuilt summary for {rebuild(cursor)} locations")
+        if mismatches and not repair:
+            raise SystemExit(1)
@@ -0,0 +1,158 @@
+#------------------------------------------------------------
+# Daily Workout_Log rollup (Workout_Daily_Rollup).
+#
+# One row per (day, user) holding that day's workout count,
+# total duration and calories, tagged with the user's gym
+# location. Triggers on Workout_Log keep it current on every
+# insert/update/delete, so analytics endpoints aggregate over
+# days instead of over the full workout history.
+#
+# The table and triggers ship in database-files/progress_db.sql.
+# For databases created before that (or via setup_database.py):
+#
+#   flask --app backend_app backfill-workout-rollup
+#
+# creates whatever is missing and rebuilds the rollup from
+# Workout_Log one date window per transaction.
+#------------------------------------------------------------
+from datetime import timedelta
+
+import click
+
+from backend.db_connection import db
+
+ROLLUP_TABLE = """
+CREATE TABLE IF NOT EXISTS Workout_Daily_Rollup (
+    rollup_date DATE NOT NULL,
+    user_ID INT NOT NULL,
+    gym_location VARCHAR(50) NOT NULL,
+    workout_count INT NOT NULL DEFAULT 0,
+    timed_workouts INT NOT NULL DEFAULT 0,
+    total_duration_minutes INT NOT NULL DEFAULT 0,
+    total_calories INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (rollup_date, user_ID),
+    KEY idx_rollup_user_date (user_ID, rollup_date),
+    KEY idx_rollup_location_date (gym_location, rollup_date),
+    FOREIGN KEY (user_ID) REFERENCES User (user_ID)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE
+)
+"""
+
+_ADD_NEW = """
+    INSERT INTO Workout_Daily_Rollup
+        (rollup_date, user_ID, gym_location, workout_count, timed_workouts,
+         total_duration_minutes, total_calories)
+    SELECT NEW.workout_date, NEW.user_ID, u.gym_location, 1,
+           NEW.duration_minutes IS NOT NULL,
+           COALESCE(NEW.duration_minutes, 0), COALESCE(NEW.calories_burned, 0)
+    FROM User u WHERE u.user_ID = NEW.user_ID
+    ON DUPLICATE KEY UPDATE
+        workout_count = workout_count + 1,
+        timed_workouts = timed_workouts + VALUES(timed_workouts),
+        total_duration_minutes = total_duration_minutes + VALUES(total_duration_minutes),
+        total_calories = total_calories + VALUES(total_calories);
+"""
+
+_REMOVE_OLD = """
+    UPDATE Workout_Daily_Rollup
+    SET workout_count = workout_count - 1,
+        timed_workouts = timed_workouts - (OLD.duration_minutes IS NOT NULL),
+        total_duration_minutes = total_duration_minutes - COALESCE(OLD.duration_minutes, 0),
+        total_calories = total_calories - COALESCE(OLD.calories_burned, 0)
+    WHERE rollup_date = OLD.workout_date AND user_ID = OLD.user_ID;
+    DELETE FROM Workout_Daily_Rollup
+    WHERE rollup_date = OLD.workout_date AND user_ID = OLD.user_ID AND workout_count <= 0;
+"""
+
+TRIGGERS = {
+    "workout_log_rollup_insert":
+        f"AFTER INSERT ON Workout_Log FOR EACH ROW BEGIN {_ADD_NEW} END",
+    "workout_log_rollup_delete":
+        f"AFTER DELETE ON Workout_Log FOR EACH ROW BEGIN {_REMOVE_OLD} END",
+    "workout_log_rollup_update":
+        f"AFTER UPDATE ON Workout_Log FOR EACH ROW BEGIN {_REMOVE_OLD} {_ADD_NEW} END",
+}
+
+REBUILD_WINDOW = """
+    INSERT INTO Workout_Daily_Rollup
+        (rollup_date, user_ID, gym_location, workout_count, timed_workouts,
+         total_duration_minutes, total_calories)
+    SELECT w.workout_date, w.user_ID, u.gym_location, COUNT(*),
+           COUNT(w.duration_minutes),
+           COALESCE(SUM(w.duration_minutes), 0), COALESCE(SUM(w.calories_burned), 0)
+    FROM Workout_Log w
+    JOIN User u ON u.user_ID = w.user_ID
+    WHERE w.workout_date BETWEEN %s AND %s
+    GROUP BY w.workout_date, w.user_ID, u.gym_location
+"""
+
+
+def ensure_schema(cursor):
+    """Create the rollup table and any missing triggers. Returns the triggers created."""
+    cursor.execute(ROLLUP_TABLE)
+    cursor.execute(
+        "SELECT TRIGGER_NAME FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = DATABASE()"
+    )
+    existing = {row["TRIGGER_NAME"] for row in cursor.fetchall()}
+    created = []
+    for name, body in TRIGGERS.items():
+        if name not in existing:
+            cursor.execute(f"CREATE TRIGGER {name} {body}")
+            created.append(name)
+    return created
+
+
+def backfill(start=None, end=None, window_days=31):
+    """
+    Rebuild the rollup rows for workout dates in [start, end].
+
+    Each window of `window_days` days is deleted and re-aggregated in
+    its own transaction; InnoDB locks on the scanned Workout_Log range
+    keep concurrent trigger updates from interleaving with a window.
+    Returns (windows, rollup_rows_written).
+    """
+    if start is None or end is None:
+        with db.cursor() as cursor:
+            cursor.execute("SELECT MIN(workout_date) AS first, MAX(workout_date) AS last FROM Workout_Log")
+            bounds = cursor.fetchone()
+        if bounds["first"] is None:
+            return 0, 0
+        start = start or bounds["first"]
+        end = end or bounds["last"]
+
+    windows = written = 0
+    day = start
+    while day <= end:
+        window_end = min(day + timedelta(days=window_days - 1), end)
+        with db.transaction() as cursor:
+            cursor.execute(
+                "DELETE FROM Workout_Daily_Rollup WHERE rollup_date BETWEEN %s AND %s",
+                (day, window_end),
+            )
+            cursor.execute(REBUILD_WINDOW, (day, window_end))
+            written += cursor.rowcount
+        windows += 1
+        day = window_end + timedelta(days=1)
+    return windows, written
+
+
+def init_app(app):
+    """Register the backfill command on `app`."""
+
+    @app.cli.command("backfill-workout-rollup")
+    @click.option("--start", type=click.DateTime(["%Y-%m-%d"]), help="first workout_date (default: earliest)")
+    @click.option("--end", type=click.DateTime(["%Y-%m-%d"]), help="last workout_date (default: latest)")
+    @click.option("--window-days", default=31, show_default=True, help="days rebuilt per transaction")
+    def backfill_command(start, end, window_days):
+        """Create the daily workout rollup if needed and rebuild it from Workout_Log."""
+        with db.transaction() as cursor:
+            created = ensure_schema(cursor)
+        if created:
+            click.echo(f"created triggers: {', '.join(created)}")
+        windows, written = backfill(
+            start.date() if start else None,
+            end.date() if end else None,
+            window_days,
+        )
+        click.echo(f"rebuilt {written} rollup rows in {windows} windows")
@@ -0,0 +1,117 @@
+#------------------------------------------------------------
+# Small in-process read-through cache (TTL + LRU).
+#
+# Used for documents that are assembled from several queries
+# and read far more often than they change (e.g. the NGO
+# profile). Write handlers invalidate the keys they change.
+#------------------------------------------------------------
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+        doc = cache.get_or_load(key, lambda: load_from_db(key))
+        cache.invalidate(key)        # after a write
+
+    Callers whose loader cannot run inline (e.g. a coroutine) use
+    get() and put() instead.
+
+    Loaders run outside the lock. A load that started before an
+    invalidation is returned to its caller but not stored, so a write
+    can never be papered over by a slower, older read.
+    """
+
+    def __init__(self, maxsize=256, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for `key`, calling `loader()` on a miss.
+
+        A loader result of None (e.g. "not found") is returned but not cached.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            generation = self._generation
+
+        value = loader()
+        if value is None:
+            return None
+
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, value)
+        return value
+
+    def get(self, key):
+        """The cached value for `key`, or None if it is missing or expired."""
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key, value):
+        """Cache `value` for `key`; None is not cached."""
+        if value is None:
+            return
+        with self._lock:
+            self._store(key, value)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            self.expirations += 1
+        self.misses += 1
+        return None
+
+    def _store(self, key, value):
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,110 @@
+#------------------------------------------------------------
+# Accept-Encoding aware response compression.
+#
+# JSON/NDJSON/text responses are compressed with zstd (when the
+# zstandard package is installed and the client accepts it) or
+# gzip. Small bodies below COMPRESS_MIN_SIZE are sent as-is, and
+# streamed responses (the ?stream=ndjson exports) are compressed
+# chunk by chunk and flushed after every chunk so clients still
+# receive rows as they are produced.
+#
+# Settings (app.config):
+#   COMPRESS_LEVEL       gzip level 1-9 (default 6)
+#   COMPRESS_ZSTD_LEVEL  zstd level 1-22 (default 3)
+#   COMPRESS_MIN_SIZE    bytes; smaller bodies are not compressed (default 1024)
+#------------------------------------------------------------
+import zlib
+
+from flask import current_app, request
+
+try:
+    import zstandard
+except ImportError:  # gzip only
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/html",
+    "text/plain",
+    "text/csv",
+    "text/css",
+}
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if zstandard is not None and accepted["zstd"]:
+        return "zstd"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _compressor(encoding, config):
+    """Return (compress, flush) callables for one response body."""
+    if encoding == "zstd":
+        obj = zstandard.ZstdCompressor(level=config["COMPRESS_ZSTD_LEVEL"]).compressobj()
+        return obj.compress, lambda final: obj.flush(
+            zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+    # wbits=31 -> gzip container
+    obj = zlib.compressobj(config["COMPRESS_LEVEL"], zlib.DEFLATED, 31)
+    return obj.compress, lambda final: obj.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def _compress_stream(chunks, compress, flush):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compress(chunk) + flush(False)
+            if data:
+                yield data
+        yield flush(True)
+    finally:
+        # propagate early client disconnects to the inner generator
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _compress_response(response):
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    config = current_app.config
+
+    if response.is_streamed:
+        compress, flush = _compressor(encoding, config)
+        response.response = _compress_stream(response.response, compress, flush)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < config["COMPRESS_MIN_SIZE"]:
+            return response
+        compress, flush = _compressor(encoding, config)
+        response.set_data(compress(body) + flush(True))
+
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(app):
+    """Compress eligible responses of `app` according to Accept-Encoding."""
+    app.config.setdefault("COMPRESS_LEVEL", 6)
+    app.config.setdefault("COMPRESS_ZSTD_LEVEL", 3)
+    app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+    app.after_request(_compress_response)
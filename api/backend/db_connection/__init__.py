@@ -1,10 +1,150 @@
 #------------------------------------------------------------
 # This file creates a shared DB connection resource
+#
+# Every blueprint and the persona endpoints in backend_app.py
+# go through the `db` object below, so connection pooling,
+# cursor scoping and transactions are handled in one place.
 #------------------------------------------------------------
-from flaskext.mysql import MySQL
-from pymysql import cursors
+from contextlib import contextmanager
 
+import mysql.connector
+from flask import g
 
-# the parameter instructs the connection to return data 
-# as a dictionary object. 
-db = MySQL(cursorclass=cursors.DictCursor)
\ No newline at end of file
+from backend.db_connection.pool import ConnectionPool
+from backend.db_connection.statements import PreparedCursor, StatementCache, StatementStats
+
+
+class Database:
+    """
+    Pooled MySQL data-access layer.
+
+    Handlers normally use one of the two context managers:
+
+        with db.cursor() as cursor:          # reads
+            cursor.execute(...)
+
+        with db.transaction() as cursor:     # writes; commit or rollback
+            cursor.execute(...)
+
+    Rows come back as dictionaries (buffered, like the old PyMySQL
+    DictCursor). The connection is checked out of the pool the first
+    time a request needs it and returned when the app context is torn
+    down, whether or not the handler raised.
+
+    Hot parameterized lookups can pass prepared=True to use a
+    server-side prepared statement cached on the pooled connection.
+    """
+
+    def __init__(self):
+        self.pool = None
+        self.statement_cache_size = 64
+        self.statement_stats = StatementStats()
+
+    def init_app(self, app):
+        config = app.config
+        params = {
+            "user": config["MYSQL_DATABASE_USER"],
+            "password": config["MYSQL_DATABASE_PASSWORD"],
+            "host": config.get("MYSQL_DATABASE_HOST", "localhost"),
+            "port": int(config.get("MYSQL_DATABASE_PORT", 3306)),
+            "database": config["MYSQL_DATABASE_DB"],
+        }
+        self.pool = ConnectionPool(
+            lambda: mysql.connector.connect(**params),
+            size=int(config.get("MYSQL_POOL_SIZE", 10)),
+            timeout=float(config.get("MYSQL_POOL_TIMEOUT", 5)),
+            recycle=int(config.get("MYSQL_POOL_RECYCLE", 1800)),
+            idle_timeout=int(config.get("MYSQL_POOL_IDLE_TIMEOUT", 300)),
+            pre_ping=bool(config.get("MYSQL_POOL_PRE_PING", True)),
+            cursor_defaults={"dictionary": True, "buffered": True},
+        )
+        self.statement_cache_size = int(config.get("MYSQL_STATEMENT_CACHE_SIZE", 64))
+        app.teardown_appcontext(self._teardown)
+        app.extensions["db"] = self
+
+    def get_db(self):
+        """Return this request's pooled connection, checking one out if needed."""
+        conn = g.get("_db_conn")
+        if conn is None or conn.closed:
+            conn = g._db_conn = self.pool.acquire()
+        return conn
+
+    def _open_cursor(self, conn, prepared, kwargs):
+        if not prepared:
+            return conn.cursor(**kwargs)
+        cache = conn.state.get("statements")
+        if cache is None:
+            cache = conn.state["statements"] = StatementCache(
+                conn.driver_connection, self.statement_cache_size, self.statement_stats
+            )
+        return PreparedCursor(cache)
+
+    @contextmanager
+    def cursor(self, prepared=False, **kwargs):
+        """Dictionary cursor that is closed when the block exits."""
+        cursor = self._open_cursor(self.get_db(), prepared, kwargs)
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    @contextmanager
+    def transaction(self, prepared=False, **kwargs):
+        """Cursor whose work is committed on success and rolled back on error."""
+        conn = self.get_db()
+        cursor = self._open_cursor(conn, prepared, kwargs)
+        try:
+            yield cursor
+            for hook in g.get("_db_before_commit", ()):
+                hook(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        for hook in g.get("_db_after_commit", ()):
+            hook()
+
+    def on_commit(self, before=None, after=None):
+        """
+        Hook every later transaction() of this request: before(cursor) runs
+        inside it just before COMMIT (its errors roll the transaction back),
+        after() once the COMMIT succeeded.
+        """
+        if before is not None:
+            g.setdefault("_db_before_commit", []).append(before)
+        if after is not None:
+            g.setdefault("_db_after_commit", []).append(after)
+
+    def stream(self, query, params=(), batch_size=500):
+        """
+        Yield rows one at a time from an unbuffered (server-side) cursor.
+
+        Uses its own pooled connection so the rows can be consumed after
+        the view function has returned (e.g. by a streamed response).
+        If the consumer stops early the connection is discarded rather
+        than returned with an unread result set.
+        """
+        conn = self.pool.acquire()
+        finished = False
+        try:
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(query, tuple(params))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+            cursor.close()
+            finished = True
+        finally:
+            conn.close(discard=not finished)
+
+    def _teardown(self, exc):
+        conn = g.pop("_db_conn", None)
+        if conn is not None and not conn.closed:
+            conn.close()
+
+
+db = Database()
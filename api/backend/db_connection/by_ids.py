@@ -0,0 +1,61 @@
+#------------------------------------------------------------
+# Batch lookups by primary key for list endpoints.
+#
+#   GET /users?ids=1,2,3   -> {"1": {...}, "2": {...}, "3": null}
+#
+# One `WHERE key IN (...)` query per request instead of one
+# request per ID. The body is an object keyed by the requested
+# IDs (as strings, since they are JSON object keys); IDs that
+# do not exist map to null. At most MAX_IDS IDs per request.
+#------------------------------------------------------------
+from flask import abort, jsonify, make_response, request
+
+MAX_IDS = 200
+
+
+def _bad_request(message):
+    abort(make_response(jsonify({"error": message}), 400))
+
+
+def ids_from_request(max_ids=MAX_IDS):
+    """The de-duplicated integer IDs in ?ids=, or None if the parameter is absent."""
+    raw = request.args.get("ids")
+    if raw is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(part) for part in raw.split(",") if part.strip()))
+    except ValueError:
+        _bad_request("'ids' must be a comma-separated list of integers")
+    if not ids:
+        _bad_request("'ids' must not be empty")
+    if len(ids) > max_ids:
+        _bad_request(f"at most {max_ids} ids per request")
+    return ids
+
+
+def fetch_by_ids(cursor, select, key, ids, many=False):
+    """
+    Run `select` restricted to `key IN ids` and key the rows by ID.
+
+    Args:
+        cursor: dictionary cursor to run the query on
+        select: "SELECT ... FROM ..." without WHERE; must return `key`
+        key: column the IDs refer to
+        ids: IDs from ids_from_request()
+        many: several rows per ID (e.g. a user's goals); values are lists
+    """
+    cursor.execute(f"{select.rstrip()}\nWHERE {key} IN ({', '.join(['%s'] * len(ids))})", tuple(ids))
+    rows = cursor.fetchall()
+    if many:
+        result = {str(i): [] for i in ids}
+        for row in rows:
+            result[str(row[key])].append(row)
+    else:
+        result = dict.fromkeys(map(str, ids))
+        for row in rows:
+            result[str(row[key])] = row
+    return result
+
+
+def by_ids_response(cursor, select, key, ids, many=False):
+    return make_response(jsonify(fetch_by_ids(cursor, select, key, ids, many)), 200)
@@ -0,0 +1,78 @@
+#------------------------------------------------------------
+# ?expand= for list/detail endpoints without N+1 queries.
+#
+#   GET /users?expand=goals,devices      -> each user gets "goals"
+#   GET /users/7?expand=reports             and "devices" lists
+#
+# A Relation knows how to load the children of many parents at
+# once. Expanding a page collects the parent keys of every row
+# and runs one `WHERE fk IN (...)` query per requested relation,
+# so the query count is 1 + len(expand) however big the page.
+#------------------------------------------------------------
+from flask import abort, jsonify, make_response, request
+
+
+class Relation:
+    """
+    Children of a parent table, loaded for many parents in one query.
+
+    Args:
+        select: "SELECT ... FROM child" without WHERE; must return `fk`
+        fk: child column holding the parent key
+        order_by: ordering of each parent's children
+        per_parent: keep only the first N children of each parent
+                    (ROW_NUMBER() over the fk, still one query)
+    """
+
+    def __init__(self, select, fk, order_by=None, per_parent=None):
+        self.select = " ".join(select.split())
+        self.fk = fk
+        self.order_by = order_by
+        self.per_parent = per_parent
+
+    def query(self, count):
+        where = f"WHERE {self.fk} IN ({', '.join(['%s'] * count)})"
+        if self.per_parent:
+            window = f"ROW_NUMBER() OVER (PARTITION BY {self.fk} ORDER BY {self.order_by}) AS _rank"
+            select = self.select.replace(" FROM ", f", {window} FROM ", 1)
+            return (f"SELECT * FROM ({select} {where}) ranked WHERE _rank <= {int(self.per_parent)} "
+                    f"ORDER BY {self.fk}, _rank")
+        order = f" ORDER BY {self.fk}, {self.order_by}" if self.order_by else ""
+        return f"{self.select} {where}{order}"
+
+    def load(self, cursor, keys):
+        """{parent key: [child rows]} for every key in `keys`."""
+        children = {key: [] for key in keys}
+        if not keys:
+            return children
+        cursor.execute(self.query(len(keys)), tuple(keys))
+        for row in cursor.fetchall():
+            row.pop("_rank", None)
+            children.setdefault(row[self.fk], []).append(row)
+        return children
+
+
+def _bad_request(message):
+    abort(make_response(jsonify({"error": message}), 400))
+
+
+def expand_from_request(relations):
+    """Relation names in ?expand= (validated against `relations`), in request order."""
+    raw = request.args.get("expand")
+    if not raw:
+        return []
+    names = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+    unknown = [name for name in names if name not in relations]
+    if unknown:
+        _bad_request(f"cannot expand {', '.join(unknown)}; expandable: {', '.join(relations)}")
+    return names
+
+
+def expand_rows(cursor, rows, key, relations, names):
+    """Attach row[name] = [children] to every row for each relation in `names`."""
+    keys = list(dict.fromkeys(row[key] for row in rows))
+    for name in names:
+        children = relations[name].load(cursor, keys)
+        for row in rows:
+            row[name] = children.get(row[key], [])
+    return rows
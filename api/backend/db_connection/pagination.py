@@ -0,0 +1,118 @@
+#------------------------------------------------------------
+# Keyset (cursor) pagination for list endpoints.
+#
+# Pages are read in primary-key order and continue from the
+# last key seen, so every page is an index range scan no matter
+# how deep the client pages.
+#
+#   GET /users?limit=50                 -> first 50 users
+#   GET /users?limit=50&after=<cursor>  -> the next 50
+#
+# The body stays a plain JSON list; the cursor for the next page
+# is returned in the X-Next-Cursor and Link headers (absent on
+# the last page).
+#------------------------------------------------------------
+import base64
+import json
+from urllib.parse import urlencode
+
+from flask import abort, jsonify, make_response, request
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, width):
+    """Return the key values packed in `token`, or None if it is not a valid cursor."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != width:
+        return None
+    return values
+
+
+def _bad_request(message):
+    abort(make_response(jsonify({"error": message}), 400))
+
+
+class Page:
+    """
+    One keyset page of a list endpoint.
+
+        page = Page.from_request("user_ID")
+        with db.cursor() as cursor:
+            rows = page.fetch(cursor, "SELECT user_ID, name FROM User")
+        return page.response(rows)
+    """
+
+    def __init__(self, keys, limit=DEFAULT_PAGE_SIZE, after=None):
+        self.keys = tuple(keys)
+        self.limit = min(limit, MAX_PAGE_SIZE)
+        self.after = after
+        self.next_cursor = None
+
+    @classmethod
+    def from_request(cls, *keys):
+        """Read ?limit= and ?after=; answers 400 straight away if either is invalid."""
+        limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+        if limit is None or limit < 1:
+            _bad_request("'limit' must be a positive integer")
+        after = request.args.get("after")
+        if after:
+            after = decode_cursor(after, len(keys))
+            if after is None:
+                _bad_request("invalid 'after' cursor")
+        return cls(keys, limit, after)
+
+    def fetch(self, cursor, select, where=None, params=()):
+        """
+        Run this page of `select` in key order.
+
+        Args:
+            cursor: dictionary cursor to run the query on
+            select: "SELECT ... FROM ..." without WHERE/ORDER BY/LIMIT;
+                    must return every key column
+            where: optional list of extra filter clauses (AND-ed together)
+            params: parameters for the extra filter clauses
+        """
+        clauses = list(where or [])
+        params = list(params)
+        if self.after:
+            # (k1, k2) > (v1, v2) spelled out so MySQL uses a range scan on the PK
+            alternatives = []
+            for i, key in enumerate(self.keys):
+                parts = [f"{k} = %s" for k in self.keys[:i]] + [f"{key} > %s"]
+                alternatives.append("(" + " AND ".join(parts) + ")")
+                params.extend(self.after[:i + 1])
+            clauses.append("(" + " OR ".join(alternatives) + ")")
+
+        query = select.rstrip()
+        if clauses:
+            query += "\nWHERE " + " AND ".join(clauses)
+        query += "\nORDER BY " + ", ".join(self.keys) + "\nLIMIT %s"
+        params.append(self.limit + 1)
+
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            self.next_cursor = encode_cursor(rows[-1][k] for k in self.keys)
+        return rows
+
+    def response(self, rows):
+        """JSON list response carrying the next-page cursor in its headers."""
+        response = make_response(jsonify(rows), 200)
+        if self.next_cursor:
+            args = request.args.to_dict()
+            args.update(after=self.next_cursor, limit=self.limit)
+            response.headers["X-Next-Cursor"] = self.next_cursor
+            response.headers["Link"] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+        return response
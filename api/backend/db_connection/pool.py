@@ -0,0 +1,267 @@
+#------------------------------------------------------------
+# A small, bounded, thread-safe MySQL connection pool.
+#
+# Connections are created lazily up to `size`, pinged before
+# being handed out, recycled once they get too old or sit idle
+# for too long, and always returned to the pool when the caller
+# closes them (including on error paths).
+#------------------------------------------------------------
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became available within the checkout timeout."""
+
+
+class _Entry:
+    """Bookkeeping for one physical connection owned by the pool."""
+
+    __slots__ = ("raw", "created_at", "last_used", "state")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        # per-connection data that lives as long as the physical connection
+        # (e.g. server-side prepared statements)
+        self.state = {}
+
+
+class PooledConnection:
+    """
+    Proxy handed out by the pool. Behaves like the underlying connection,
+    except that close() returns it to the pool instead of disconnecting.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def cursor(self, *args, **kwargs):
+        for key, value in self._pool.cursor_defaults.items():
+            kwargs.setdefault(key, value)
+        return self._entry.raw.cursor(*args, **kwargs)
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get("_entry")
+        if entry is None:
+            raise AttributeError(f"connection already returned to the pool ({name})")
+        return getattr(entry.raw, name)
+
+    @property
+    def closed(self):
+        return self._entry is None
+
+    @property
+    def driver_connection(self):
+        """The underlying driver connection (do not close it directly)."""
+        return self._entry.raw
+
+    @property
+    def state(self):
+        """Dict tied to the physical connection, kept across checkouts."""
+        return self._entry.state
+
+    def close(self, discard=False):
+        """Return the connection to the pool (or drop it if discard is True)."""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool._release(entry, discard=discard)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections.
+
+    Args:
+        connect: zero-argument callable returning a new raw connection
+        size: maximum number of open connections
+        timeout: seconds to wait for a free connection before raising PoolTimeout
+        recycle: maximum age (seconds) of a connection before it is replaced
+        idle_timeout: connections idle for longer than this are replaced
+        pre_ping: ping connections before handing them out
+        cursor_defaults: keyword arguments applied to every conn.cursor() call
+    """
+
+    def __init__(self, connect, size=10, timeout=5.0, recycle=1800,
+                 idle_timeout=300, pre_ping=True, cursor_defaults=None):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+        self.cursor_defaults = dict(cursor_defaults or {})
+
+        self._idle = deque()
+        self._open = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._recycled = 0
+        self._ping_failures = 0
+        self._discarded = 0
+
+    # ---------------------------------------------------------------
+    # checkout / return
+    # ---------------------------------------------------------------
+    def acquire(self, timeout=None):
+        """Check a connection out of the pool, waiting up to `timeout` seconds."""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    entry = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"no connection available after {timeout:.1f}s "
+                        f"(pool size {self.size}, all in use)"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        try:
+            if entry is None:
+                entry = _Entry(self._connect())
+            else:
+                entry = self._validate(entry)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        wait = time.monotonic() - started
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            if waited:
+                self._waits += 1
+        entry.last_used = time.monotonic()
+        return PooledConnection(self, entry)
+
+    def _validate(self, entry):
+        """Replace an idle connection that is too old, idle too long, or dead."""
+        now = time.monotonic()
+        stale = (
+            (self.recycle and now - entry.created_at > self.recycle)
+            or (self.idle_timeout and now - entry.last_used > self.idle_timeout)
+        )
+        if stale:
+            with self._cond:
+                self._recycled += 1
+            self._close_raw(entry.raw)
+            return _Entry(self._connect())
+        if self.pre_ping and not self._is_alive(entry):
+            with self._cond:
+                self._ping_failures += 1
+            self._close_raw(entry.raw)
+            return _Entry(self._connect())
+        return entry
+
+    def _release(self, entry, discard=False):
+        if not discard:
+            try:
+                # never hand the next caller someone else's open transaction
+                entry.raw.rollback()
+            except Exception:
+                discard = True
+        if discard:
+            self._close_raw(entry.raw)
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._open -= 1
+                self._discarded += 1
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that always returns the connection to the pool."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ---------------------------------------------------------------
+    # housekeeping
+    # ---------------------------------------------------------------
+    @staticmethod
+    def _is_alive(entry):
+        if entry is None:
+            return False
+        try:
+            entry.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_raw(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """Close every idle connection. Checked-out connections are closed on return."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for entry in idle:
+            self._close_raw(entry.raw)
+
+    def stats(self):
+        """Snapshot of pool usage, suitable for a health or metrics endpoint."""
+        with self._cond:
+            checkouts = self._checkouts
+            return {
+                "size": self.size,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "saturation": round(self._in_use / self.size, 3),
+                "checkouts": checkouts,
+                "waited_checkouts": self._waits,
+                "avg_wait_ms": round(self._wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 3),
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "ping_failures": self._ping_failures,
+                "discarded": self._discarded,
+            }
@@ -0,0 +1,134 @@
+#------------------------------------------------------------
+# Server-side prepared statement cache.
+#
+# Each pooled connection keeps an LRU of prepared cursors keyed
+# by SQL text, so hot point lookups are parsed/planned by MySQL
+# once per connection instead of on every request.
+#------------------------------------------------------------
+import threading
+from collections import OrderedDict
+
+
+class StatementStats:
+    """Hit/miss/eviction counters shared by every connection's cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def record(self, hit=False, evicted=0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.evictions += evicted
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class StatementCache:
+    """
+    LRU of prepared cursors for one physical connection.
+
+    mysql.connector only skips the PREPARE round trip when a prepared
+    cursor is re-executed with the very same operation string object,
+    so the cache hands back the string it was first prepared with.
+    """
+
+    def __init__(self, connection, capacity, stats):
+        self._connection = connection
+        self.capacity = capacity
+        self._stats = stats
+        self._entries = OrderedDict()
+
+    def get(self, sql):
+        """Return (sql, cursor) with `sql` already prepared on this connection."""
+        entry = self._entries.get(sql)
+        if entry is not None:
+            self._entries.move_to_end(sql)
+            self._stats.record(hit=True)
+            return entry
+
+        cursor = self._connection.cursor(prepared=True, dictionary=True)
+        entry = self._entries[sql] = (sql, cursor)
+        evicted = 0
+        while len(self._entries) > self.capacity:
+            _, (_, old_cursor) = self._entries.popitem(last=False)
+            _close_quietly(old_cursor)
+            evicted += 1
+        self._stats.record(hit=False, evicted=evicted)
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        while self._entries:
+            _, (_, cursor) = self._entries.popitem()
+            _close_quietly(cursor)
+
+
+class PreparedCursor:
+    """
+    Cursor-like wrapper handed out by db.cursor(prepared=True).
+
+    execute() routes each statement to the cached prepared cursor for
+    that SQL text; fetch methods read from whichever ran last. Any rows
+    the caller did not read are drained on close so the connection is
+    clean for the next statement.
+    """
+
+    def __init__(self, cache):
+        self._cache = cache
+        self._current = None
+
+    def execute(self, sql, params=()):
+        self._drain()
+        sql, self._current = self._cache.get(sql)
+        self._current.execute(sql, tuple(params))
+
+    def fetchone(self):
+        return self._current.fetchone()
+
+    def fetchall(self):
+        return self._current.fetchall()
+
+    def fetchmany(self, size=1):
+        return self._current.fetchmany(size)
+
+    @property
+    def rowcount(self):
+        return self._current.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._current.lastrowid
+
+    def close(self):
+        self._drain()
+        self._current = None
+
+    def _drain(self):
+        if self._current is not None and self._current.with_rows:
+            try:
+                self._current.fetchall()
+            except Exception:
+                pass
+
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
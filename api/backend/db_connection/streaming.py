@@ -0,0 +1,51 @@
+#------------------------------------------------------------
+# NDJSON export responses.
+#
+# GET /reports?stream=ndjson streams one JSON object per line
+# straight from an unbuffered server-side cursor, so memory
+# stays flat however many rows are exported and the first
+# bytes go out as soon as MySQL returns the first row.
+#
+# The first row is sent on its own; after that rows are
+# grouped into chunks, flushed once NDJSON_FLUSH_BYTES are
+# pending or NDJSON_FLUSH_INTERVAL seconds have passed since
+# the last flush, whichever comes first.
+#------------------------------------------------------------
+import time
+
+from flask import Response, current_app, request, stream_with_context
+
+from backend.db_connection import db
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def wants_ndjson():
+    """True when the client asked for ?stream=ndjson."""
+    return request.args.get("stream") == "ndjson"
+
+
+def ndjson_response(query, params=(), batch_size=500):
+    """Chunked response with one JSON document per row of `query`."""
+    flush_bytes = current_app.config.get("NDJSON_FLUSH_BYTES", 64 * 1024)
+    flush_interval = current_app.config.get("NDJSON_FLUSH_INTERVAL", 0.2)
+
+    def generate():
+        dumps = current_app.json.dumps
+        lines = []
+        pending = 0
+        flushed_at = None
+        for row in db.stream(query, params, batch_size):
+            line = dumps(row)
+            lines.append(line)
+            pending += len(line) + 1
+            now = time.monotonic()
+            if flushed_at is None or pending >= flush_bytes or now - flushed_at >= flush_interval:
+                yield "\n".join(lines) + "\n"
+                lines = []
+                pending = 0
+                flushed_at = now
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
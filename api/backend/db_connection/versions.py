@@ -0,0 +1,293 @@
+#------------------------------------------------------------
+# Per-table version counters for conditional GETs.
+#
+# Every write handler bumps the version of the tables it
+# touches; read handlers derive a weak ETag from the versions
+# of the tables they read and answer a matching If-None-Match
+# with 304 without touching MySQL.
+#
+#   @users.route('/users', methods=['GET'])
+#   @table_versions.etag('User')
+#   def list_users(): ...
+#
+#   @users.route('/users', methods=['POST'])
+#   @table_versions.bumps('User')
+#   def create_user(): ...
+#
+# The counters live in the Table_Version table, so every worker
+# process sees every other worker's writes. A bump is part of
+# the write's own transaction (bumps() hooks db.transaction()
+# on the request's connection), so a committed write always
+# carries its invalidation and a rolled-back one never does.
+# Writers outside the request cycle bump in their transaction:
+#
+#   table_versions.bump_with(cursor, 'Video_Footage')   # archiver
+#   cursor.execute(*table_versions.bump_statement(...))  # ingest gateway
+#
+# Each worker keeps the versions in memory: a background thread
+# re-reads Table_Version every TABLE_VERSION_REFRESH_INTERVAL
+# seconds, and the worker's own commits update it at once. So
+# another worker's write is seen within one interval. If the
+# copy is older than MAX_AGE_INTERVALS intervals (the refresh
+# keeps failing), responses simply carry no ETag.
+#
+# A table's first version is the current time in microseconds,
+# so a tag issued before the table was recreated never validates
+# again.
+#------------------------------------------------------------
+import functools
+import logging
+import threading
+import time
+
+from flask import current_app, make_response, request
+from mysql.connector import errors as mysql_errors
+
+from backend.db_connection import db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS Table_Version (
+    table_name VARCHAR(64) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL,
+    PRIMARY KEY (table_name)
+)
+"""
+
+# Writes that change other tables, from database-files/progress_db.sql:
+# every ON UPDATE CASCADE / ON DELETE CASCADE / ON DELETE SET NULL
+# foreign key (parent -> child tables), plus the triggers that keep
+# Workout_Daily_Rollup in step with Workout_Log (and partitions.py's
+# triggers, which stand in for the Workout_Log foreign keys). A write
+# to the key is also a write to every table listed (transitively).
+# Foreign keys of the connected database are merged in on first use.
+CASCADES = {
+    "User": ("Goal", "Membership", "Plan", "Report", "System_Admin", "User_Device", "Analyst",
+             "Desk_Attendant", "Workout_Log", "Workout_Daily_Rollup"),
+    "System": ("System_Admin",),
+    "Analysis_Team": ("System_Admin",),
+    "Report": ("Analyst",),
+    "Plan": ("Analyst",),
+    "System_Admin": ("Analyst",),
+    "User_Device": ("Analyst",),
+    "Analyst": ("Desk_Attendant",),
+    "Desk_Attendant": ("Emp_Only",),
+    "Policy": ("Emp_Only",),
+    "Video_Footage": ("Emp_Only",),
+    "Equipment_Maintenance": ("Emp_Only",),
+    "Workout_Log": ("Workout_Exercise", "Workout_Daily_Rollup"),
+    "Exercise": ("Workout_Exercise",),
+}
+
+FOREIGN_KEYS = """
+    SELECT REFERENCED_TABLE_NAME AS parent, TABLE_NAME AS child
+    FROM information_schema.REFERENTIAL_CONSTRAINTS
+    WHERE CONSTRAINT_SCHEMA = DATABASE()
+      AND (UPDATE_RULE NOT IN ('RESTRICT', 'NO ACTION') OR DELETE_RULE NOT IN ('RESTRICT', 'NO ACTION'))
+"""
+
+# in-memory versions older than this many refresh intervals are not trusted
+MAX_AGE_INTERVALS = 5
+
+
+class VersionsUnavailable(Exception):
+    """The in-memory versions are missing or too old to validate against."""
+
+
+def _pairs(rows, first, second):
+    """(first, second) from dictionary or tuple cursor rows."""
+    return [(row[first], row[second]) if isinstance(row, dict) else tuple(row) for row in rows]
+
+
+class TableVersions:
+    """Version number per table name, shared through the Table_Version table and cached in memory."""
+
+    def __init__(self, database):
+        self.db = database
+        self._lock = threading.Lock()
+        self.cascades = {parent: set(children) for parent, children in CASCADES.items()}
+        self._foreign_keys_loaded = False
+        self._versions = {}
+        self._loaded_at = None
+        self._thread = None
+        self.refresh_interval = 1.0
+        self.logger = logging.getLogger(__name__)
+        self.not_modified = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def init_app(self, app):
+        self.refresh_interval = float(app.config.get("TABLE_VERSION_REFRESH_INTERVAL", 1.0))
+        self.logger = app.logger
+
+    def _load_foreign_keys(self, cursor):
+        """Merge the connected database's cascading foreign keys into self.cascades (once)."""
+        if self._foreign_keys_loaded:
+            return
+        cursor.execute(FOREIGN_KEYS)
+        rows = _pairs(cursor.fetchall(), "parent", "child")
+        with self._lock:
+            for parent, child in rows:
+                if parent != child:
+                    self.cascades.setdefault(parent, set()).add(child)
+            self._foreign_keys_loaded = True
+
+    def affected(self, tables):
+        """`tables` and every table their writes cascade into."""
+        pending, seen = list(tables), set()
+        while pending:
+            table = pending.pop()
+            if table not in seen:
+                seen.add(table)
+                pending.extend(self.cascades.get(table, ()))
+        return sorted(seen)
+
+    def bump_statement(self, tables):
+        """(sql, params) bumping `tables` (already expanded), for callers with their own driver."""
+        first = int(time.time() * 1_000_000)
+        values = ", ".join(["(%s, %s)"] * len(tables))
+        params = [value for table in tables for value in (table, first)]
+        return (f"INSERT INTO Table_Version (table_name, version) VALUES {values} "
+                "ON DUPLICATE KEY UPDATE version = version + 1", tuple(params))
+
+    def bump_with(self, cursor, *tables):
+        """
+        Bump `tables` and their cascades inside the caller's transaction.
+        Returns the new {table: version}, for apply() once it has committed.
+        """
+        try:
+            self._load_foreign_keys(cursor)
+        except mysql_errors.Error:
+            pass
+        affected = self.affected(tables)
+        cursor.execute(*self.bump_statement(affected))
+        cursor.execute(f"SELECT table_name, version FROM Table_Version "
+                       f"WHERE table_name IN ({', '.join(['%s'] * len(affected))})", tuple(affected))
+        return dict(_pairs(cursor.fetchall(), "table_name", "version"))
+
+    def bump(self, *tables):
+        """Bump `tables` in a transaction of its own (CLI commands and jobs, inside an app context)."""
+        with self.db.transaction() as cursor:
+            cursor.execute(SCHEMA)
+            versions = self.bump_with(cursor, *tables)
+        self.apply(versions)
+
+    def apply(self, versions):
+        """Merge committed versions into the in-memory copy (versions only grow)."""
+        with self._lock:
+            for table, version in versions.items():
+                if version > self._versions.get(table, 0):
+                    self._versions[table] = version
+
+    def refresh(self):
+        """Re-read every version from Table_Version (creating it if missing)."""
+        with self.db.pool.acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                if self._loaded_at is None:
+                    cursor.execute(SCHEMA)
+                cursor.execute("SELECT table_name, version FROM Table_Version")
+                versions = dict(_pairs(cursor.fetchall(), "table_name", "version"))
+                conn.commit()
+            finally:
+                cursor.close()
+        self.apply(versions)
+        with self._lock:
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                self.logger.warning(f"could not refresh table versions: {e}")
+            time.sleep(self.refresh_interval)
+
+    def start(self):
+        """Start the refresher thread (once); called by the first conditional GET."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="table-versions", daemon=True)
+        self._thread.start()
+
+    def versions(self, tables):
+        """{table: version} for `tables` from memory (0 for tables never bumped)."""
+        self.start()
+        with self._lock:
+            if self._loaded_at is None:
+                raise VersionsUnavailable("table versions not loaded yet")
+            age = time.monotonic() - self._loaded_at
+            if age > MAX_AGE_INTERVALS * self.refresh_interval:
+                raise VersionsUnavailable(f"table versions last refreshed {age:.1f}s ago")
+            return {table: self._versions.get(table, 0) for table in tables}
+
+    def etag_for(self, tables):
+        """Weak ETag value for the current versions of `tables`."""
+        versions = self.versions(tables)
+        return ".".join(str(versions[table]) for table in tables)
+
+    def etag(self, *tables):
+        """
+        Decorator for GET handlers reading `tables`.
+
+        The versions are read before the handler runs, so a write that
+        lands mid-request can only make the tag stale, never too new.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                try:
+                    tag = self.etag_for(tables)
+                except VersionsUnavailable as e:
+                    # no versions, no validation: serve the full response
+                    current_app.logger.debug(f"ETag skipped: {e}")
+                    return view(*args, **kwargs)
+                if request.if_none_match.contains_weak(tag):
+                    with self._lock:
+                        self.not_modified += 1
+                    response = make_response("", 304)
+                    response.set_etag(tag, weak=True)
+                    return response
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    response.set_etag(tag, weak=True)
+                return response
+            return wrapper
+        return decorator
+
+    def bumps(self, *tables):
+        """
+        Decorator for write handlers touching `tables`.
+
+        Every db.transaction() the handler runs bumps `tables` on the same
+        connection just before COMMIT; a failing bump fails the transaction
+        (and so the request). The new versions reach this worker's memory
+        once the commit succeeded.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                committed = {}
+                self.db.on_commit(before=lambda cursor: committed.update(self.bump_with(cursor, *tables)),
+                                  after=lambda: self.apply(committed))
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "tables": dict(sorted(self._versions.items())),
+                "age_s": round(time.monotonic() - self._loaded_at, 3) if self._loaded_at is not None else None,
+                "refresh_interval": self.refresh_interval,
+                "refreshes": self.refreshes,
+                "not_modified": self.not_modified,
+                "errors": self.errors,
+            }
+
+
+table_versions = TableVersions(db)
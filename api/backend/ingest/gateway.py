@@ -0,0 +1,422 @@
+#------------------------------------------------------------
+# Asyncio ingestion gateway for wearable device syncs.
+#
+# A separate process from the Flask API (same image): devices
+# POST their workouts to
+#
+#   POST /devices/<device_id>/sync   (JSON array or NDJSON)
+#
+# Each upload is validated (same rules as POST /workouts/bulk),
+# admitted whole into a bounded in-memory buffer and answered
+# with 202. Flush workers drain the buffer in batches of up to
+# INGEST_BATCH_SIZE records or every INGEST_FLUSH_INTERVAL
+# seconds, writing each batch with multi-row INSERTs through an
+# async connection pool and bumping User_Device.last_sync once
+# per device per batch.
+#
+# Backpressure: when the buffer cannot take an upload within
+# INGEST_ENQUEUE_TIMEOUT seconds the device gets 503 with
+# Retry-After and should resend later. Accepted records live
+# in memory until flushed; shutdown drains the buffer first.
+#
+#   python -m backend.ingest.gateway                        # MySQL (DB_* env)
+#   INGEST_SQLITE_PATH=/tmp/ingest.db python -m backend.ingest.gateway
+#
+# GET /health reports buffer depth and flush metrics.
+#------------------------------------------------------------
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import deque
+
+from aiohttp import web
+
+from backend.cache import TTLCache
+from backend.db_connection import versions
+from backend.db_connection.versions import table_versions
+from backend.ingest import workouts as workout_ingest
+
+logger = logging.getLogger("ingest")
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+OWNER_TTL = 60
+
+# Enough of the progress schema to run the gateway against SQLite locally
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS User_Device (
+    device_ID INTEGER PRIMARY KEY,
+    user_ID INTEGER NOT NULL,
+    device_type TEXT NOT NULL DEFAULT 'watch',
+    device_name TEXT,
+    transfer TEXT,
+    last_sync TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_active BOOLEAN DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS Workout_Log (
+    workout_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_ID INTEGER NOT NULL,
+    workout_date DATE NOT NULL,
+    workout_type TEXT,
+    duration_minutes INTEGER,
+    calories_burned INTEGER,
+    notes TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS Workout_Exercise (
+    workout_ID INTEGER,
+    exercise_ID INTEGER,
+    sets INTEGER,
+    reps INTEGER,
+    weight REAL,
+    duration_seconds INTEGER,
+    rest_seconds INTEGER,
+    order_index INTEGER,
+    PRIMARY KEY (workout_ID, exercise_ID, order_index)
+);
+"""
+
+
+class BufferFull(Exception):
+    """Raised when an upload could not be admitted before its timeout."""
+
+
+class BoundedBuffer:
+    """
+    FIFO of records with a fixed capacity.
+
+    Uploads are admitted all-or-nothing, so a device never has to work
+    out which half of its upload was accepted.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._items = deque()
+        self._changed = asyncio.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    async def put_many(self, records, timeout):
+        async with self._changed:
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait_for(lambda: len(self._items) + len(records) <= self.capacity), timeout)
+            except asyncio.TimeoutError:
+                raise BufferFull()
+            self._items.extend(records)
+            self._changed.notify_all()
+
+    async def get_batch(self, max_items, max_wait):
+        """Wait for a first record, then up to `max_wait` seconds to fill the batch."""
+        loop = asyncio.get_running_loop()
+        async with self._changed:
+            while True:
+                await self._changed.wait_for(lambda: self._items)
+                deadline = loop.time() + max_wait
+                while len(self._items) < max_items and loop.time() < deadline:
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), deadline - loop.time())
+                    except asyncio.TimeoutError:
+                        break
+                # another worker may have taken everything while we waited
+                if self._items:
+                    break
+            batch = [self._items.popleft() for _ in range(min(max_items, len(self._items)))]
+            self._changed.notify_all()
+            return batch
+
+
+class Sink:
+    """Writes batches of (device_id, workout_row, exercise_rows) records."""
+
+    placeholder = "%s"
+
+    def _insert_sql(self, table, columns, rows):
+        group = "(" + ", ".join([self.placeholder] * len(columns)) + ")"
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([group] * len(rows))}",
+                tuple(value for row in rows for value in row))
+
+    def batch_statements(self, records, workout_ids):
+        """Exercise INSERT and last_sync UPDATE for a batch whose workouts got `workout_ids`."""
+        children = [(workout_id, *child[1:])
+                    for workout_id, (_, _, kids) in zip(workout_ids, records) for child in kids]
+        devices = sorted({device_id for device_id, _, _ in records})
+        statements = []
+        if children:
+            statements.append(self._insert_sql("Workout_Exercise", workout_ingest.EXERCISE_COLUMNS, children))
+        statements.append((
+            f"UPDATE User_Device SET last_sync = CURRENT_TIMESTAMP "
+            f"WHERE device_ID IN ({', '.join([self.placeholder] * len(devices))})",
+            tuple(devices),
+        ))
+        return statements
+
+
+# tables a batch writes to (the rollup through its Workout_Log triggers)
+WRITTEN_TABLES = ("User_Device", "Workout_Daily_Rollup", "Workout_Exercise", "Workout_Log")
+
+
+class MySQLSink(Sink):
+    """aiomysql connection pool against the progress database."""
+
+    def __init__(self, pool, consecutive_ids=False):
+        self.pool = pool
+        # multi-row INSERTs get consecutive AUTO_INCREMENT values (see workouts.py)
+        self.consecutive_ids = consecutive_ids
+
+    @classmethod
+    async def connect(cls, size=5):
+        import aiomysql
+
+        pool = await aiomysql.create_pool(
+            host=os.getenv("DB_HOST", "localhost"),
+            port=int(os.getenv("DB_PORT", 3306)),
+            user=os.getenv("DB_USER", "root"),
+            password=os.getenv("DB_PASSWORD", "password"),
+            db=os.getenv("DB_NAME", "progress"),
+            minsize=1, maxsize=size, autocommit=False, pool_recycle=1800,
+        )
+        async with pool.acquire() as conn, conn.cursor() as cursor:
+            await cursor.execute(versions.SCHEMA)
+            await cursor.execute(workout_ingest.AUTOINC_SETTINGS)
+            settings = await cursor.fetchone()
+            consecutive = workout_ingest.consecutive_ids(settings)
+            await conn.commit()
+        if not consecutive:
+            logger.warning(f"auto_increment_increment={settings[0]}, innodb_autoinc_lock_mode={settings[1]}: "
+                           "Workout_Log rows are inserted one at a time (lock mode 1 allows multi-row INSERTs)")
+        return cls(pool, consecutive)
+
+    async def device_owner(self, device_id):
+        async with self.pool.acquire() as conn, conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT user_ID FROM User_Device WHERE device_ID = %s AND is_active = TRUE", (device_id,))
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def write(self, records):
+        async with self.pool.acquire() as conn:
+            try:
+                async with conn.cursor() as cursor:
+                    rows = [row for _, row, _ in records]
+                    if self.consecutive_ids:
+                        await cursor.execute(*self._insert_sql("Workout_Log", workout_ingest.WORKOUT_COLUMNS, rows))
+                        workout_ids = range(cursor.lastrowid, cursor.lastrowid + len(rows))
+                    else:
+                        workout_ids = []
+                        for row in rows:
+                            await cursor.execute(*self._insert_sql("Workout_Log", workout_ingest.WORKOUT_COLUMNS, [row]))
+                            workout_ids.append(cursor.lastrowid)
+                    for sql, params in self.batch_statements(records, workout_ids):
+                        await cursor.execute(sql, params)
+                    # invalidate the API's ETags for what this batch wrote, in every worker
+                    await cursor.execute(*table_versions.bump_statement(WRITTEN_TABLES))
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+
+    async def close(self):
+        self.pool.close()
+        await self.pool.wait_closed()
+
+
+class SQLiteSink(Sink):
+    """Local stand-in: one sqlite3 connection used from a worker thread."""
+
+    placeholder = "?"
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SQLITE_SCHEMA)
+        self._lock = asyncio.Lock()
+
+    async def _run(self, fn, *args):
+        async with self._lock:
+            return await asyncio.to_thread(fn, *args)
+
+    def _device_owner(self, device_id):
+        row = self.conn.execute(
+            "SELECT user_ID FROM User_Device WHERE device_ID = ? AND is_active", (device_id,)).fetchone()
+        return row[0] if row else None
+
+    async def device_owner(self, device_id):
+        return await self._run(self._device_owner, device_id)
+
+    @staticmethod
+    def _plain(params):
+        # dates and Decimals as text, the way sqlite stores them anyway
+        return tuple(v if v is None or isinstance(v, (int, float, str)) else str(v) for v in params)
+
+    def _write(self, records):
+        rows = [row for _, row, _ in records]
+        with self.conn:
+            sql, params = self._insert_sql("Workout_Log", workout_ingest.WORKOUT_COLUMNS, rows)
+            cursor = self.conn.execute(sql, self._plain(params))
+            # sqlite reports the last rowid of a multi-row INSERT, and one
+            # statement under the database write lock takes consecutive rowids
+            first_id = cursor.lastrowid - len(rows) + 1
+            for sql, params in self.batch_statements(records, range(first_id, cursor.lastrowid + 1)):
+                self.conn.execute(sql, self._plain(params))
+
+    async def write(self, records):
+        await self._run(self._write, records)
+
+    async def close(self):
+        self.conn.close()
+
+
+class Gateway:
+    def __init__(self, sink, capacity=10000, batch_size=500, flush_interval=1.0,
+                 enqueue_timeout=2.0, workers=2, owner_cache_size=10000):
+        self.sink = sink
+        self.buffer = BoundedBuffer(capacity)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.workers = workers
+        self._tasks = []
+        self._inflight = set()
+        # device -> owner of active devices only: an unknown device is looked up
+        # again next time, so it can sync as soon as it has been registered
+        self._owners = TTLCache(owner_cache_size, OWNER_TTL)
+        self.metrics = {
+            "uploads": 0, "accepted": 0, "invalid": 0, "rejected_busy": 0,
+            "batches": 0, "flushed": 0, "failed": 0, "last_flush_ms": None,
+        }
+
+    async def owner(self, device_id):
+        """user_ID of an active device (cached for OWNER_TTL seconds), or None."""
+        user_id = self._owners.get(device_id)
+        if user_id is None:
+            user_id = await self.sink.device_owner(device_id)
+            self._owners.put(device_id, user_id)
+        return user_id
+
+    async def flush(self, batch):
+        started = time.monotonic()
+        try:
+            await self.sink.write(batch)
+        except Exception as e:
+            # one bad record must not sink the batch: write the rest one by one
+            logger.warning(f"batch of {len(batch)} failed ({e}), retrying records individually")
+            for record in batch:
+                try:
+                    await self.sink.write([record])
+                    self.metrics["flushed"] += 1
+                except Exception as e:
+                    self.metrics["failed"] += 1
+                    logger.error(f"dropping workout from device {record[0]}: {e}")
+        else:
+            self.metrics["flushed"] += len(batch)
+        self.metrics["batches"] += 1
+        self.metrics["last_flush_ms"] = round((time.monotonic() - started) * 1000, 2)
+
+    async def _flush_loop(self):
+        while True:
+            batch = await self.buffer.get_batch(self.batch_size, self.flush_interval)
+            # shielded so shutdown never abandons a batch halfway through
+            task = asyncio.ensure_future(self.flush(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            await asyncio.shield(task)
+
+    async def start(self, app):
+        self._tasks = [asyncio.create_task(self._flush_loop()) for _ in range(self.workers)]
+
+    async def stop(self, app):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._inflight, return_exceptions=True)
+        while len(self.buffer):
+            await self.flush(await self.buffer.get_batch(self.batch_size, 0))
+        await self.sink.close()
+
+    async def sync(self, request):
+        self.metrics["uploads"] += 1
+        device_id = int(request.match_info["device_id"])
+        user_id = await self.owner(device_id)
+        if user_id is None:
+            return web.json_response({"error": "unknown or inactive device"}, status=404)
+
+        body = await request.text()
+        if request.content_type == NDJSON_MIMETYPE:
+            items = workout_ingest.decode_ndjson(body)
+        else:
+            try:
+                items = json.loads(body)
+            except ValueError:
+                items = None
+        if not isinstance(items, list):
+            return web.json_response({"error": "expected a JSON array of workouts or NDJSON"}, status=400)
+        if len(items) > self.buffer.capacity:
+            return web.json_response({"error": f"at most {self.buffer.capacity} workouts per upload"}, status=413)
+
+        records, errors = [], []
+        for index, item in enumerate(items):
+            if isinstance(item, dict):
+                item.setdefault("user_ID", user_id)
+            try:
+                row, children = workout_ingest.parse_workout(item)
+                if row[0] != user_id:
+                    raise ValueError(f"device {device_id} belongs to user_ID {user_id}")
+                records.append((device_id, row, children))
+            except ValueError as e:
+                errors.append({"index": index, "error": str(e)})
+        self.metrics["invalid"] += len(errors)
+
+        if records:
+            try:
+                await self.buffer.put_many(records, self.enqueue_timeout)
+            except BufferFull:
+                self.metrics["rejected_busy"] += 1
+                return web.json_response({"error": "ingestion busy, retry later"}, status=503,
+                                         headers={"Retry-After": str(max(1, round(self.flush_interval)))})
+            self.metrics["accepted"] += len(records)
+        return web.json_response({"accepted": len(records), "failed": len(errors), "errors": errors},
+                                 status=202 if records else 400)
+
+    async def health(self, request):
+        return web.json_response(dict(self.metrics, buffered=len(self.buffer), capacity=self.buffer.capacity,
+                                      owner_cache=self._owners.stats()))
+
+    def make_app(self, max_upload_bytes=8 * 1024 * 1024):
+        app = web.Application(client_max_size=max_upload_bytes)
+        app.router.add_post("/devices/{device_id:\\d+}/sync", self.sync)
+        app.router.add_get("/health", self.health)
+        app.on_startup.append(self.start)
+        app.on_cleanup.append(self.stop)
+        return app
+
+
+async def create_gateway():
+    sqlite_path = os.getenv("INGEST_SQLITE_PATH")
+    if sqlite_path:
+        sink = SQLiteSink(sqlite_path)
+    else:
+        sink = await MySQLSink.connect(int(os.getenv("INGEST_POOL_SIZE", 5)))
+    return Gateway(
+        sink,
+        capacity=int(os.getenv("INGEST_BUFFER_SIZE", 10000)),
+        batch_size=int(os.getenv("INGEST_BATCH_SIZE", 500)),
+        flush_interval=float(os.getenv("INGEST_FLUSH_INTERVAL", 1.0)),
+        enqueue_timeout=float(os.getenv("INGEST_ENQUEUE_TIMEOUT", 2.0)),
+        workers=int(os.getenv("INGEST_FLUSH_WORKERS", 2)),
+        owner_cache_size=int(os.getenv("INGEST_OWNER_CACHE_SIZE", 10000)),
+    )
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    async def app_factory():
+        return (await create_gateway()).make_app()
+
+    web.run_app(app_factory(), port=int(os.getenv("INGEST_PORT", 4100)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#------------------------------------------------------------
+# Bulk workout ingestion (POST /workouts/bulk).
+#
+# A device sync uploads hundreds of workouts, each with its
+# Workout_Exercise children, as a JSON array or as NDJSON (one
+# workout per line). Every item is validated on its own and
+# bad items are reported by index instead of failing the
+# upload. The good ones are written with multi-row INSERTs,
+# `chunk_size` workouts per statement, in one transaction.
+#
+# A chunk that the database rejects (e.g. a FK that changed
+# under us) is rolled back to its savepoint and retried one
+# workout at a time, so only the offending items fail.
+#
+# Children need their parent's workout_ID. MySQL only promises
+# consecutive AUTO_INCREMENT values for a multi-row INSERT with
+# innodb_autoinc_lock_mode 0 or 1 and auto_increment_increment
+# 1; under the default interleaved mode 2 (or an increment > 1,
+# common with replication) workouts are inserted one row at a
+# time and each ID is read back from LAST_INSERT_ID(). The
+# docker-compose database runs with lock mode 1 for this reason.
+#------------------------------------------------------------
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+WORKOUT_COLUMNS = ("user_ID", "workout_date", "workout_type", "duration_minutes", "calories_burned", "notes")
+EXERCISE_COLUMNS = ("workout_ID", "exercise_ID", "sets", "reps", "weight",
+                    "duration_seconds", "rest_seconds", "order_index")
+LOOKUP_CHUNK = 1000
+
+AUTOINC_SETTINGS = ("SELECT @@SESSION.auto_increment_increment AS increment, "
+                    "@@GLOBAL.innodb_autoinc_lock_mode AS lock_mode")
+
+
+class InvalidLine:
+    """Placeholder for an NDJSON line that is not valid JSON."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def decode_ndjson(body):
+    """One item per non-blank line; undecodable lines become InvalidLine."""
+    items = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError as e:
+            items.append(InvalidLine(f"invalid JSON: {e}"))
+    return items
+
+
+def _int(value, field, required=False):
+    if value is None:
+        if required:
+            raise ValueError(f"{field} is required")
+        return None
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"{field} must be an integer")
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be an integer")
+    if value < 0:
+        raise ValueError(f"{field} must not be negative")
+    return value
+
+
+def _text(value, field, max_length=None):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    if max_length and len(value) > max_length:
+        raise ValueError(f"{field} is longer than {max_length} characters")
+    return value
+
+
+def _weight(value):
+    if value is None:
+        return None
+    try:
+        weight = Decimal(str(value)).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise ValueError("weight must be a number")
+    if not Decimal(0) <= weight < Decimal(10000):  # DECIMAL(6,2)
+        raise ValueError("weight must be between 0 and 9999.99")
+    return weight
+
+
+def parse_workout(item):
+    """
+    Validate one uploaded workout.
+
+    Returns (workout_row, exercise_rows) as tuples in WORKOUT_COLUMNS /
+    EXERCISE_COLUMNS order, with the exercise rows' workout_ID left as
+    None. Raises ValueError describing the first problem found.
+    """
+    if isinstance(item, InvalidLine):
+        raise ValueError(item.error)
+    if not isinstance(item, dict):
+        raise ValueError("workout must be an object")
+
+    raw_date = item.get("workout_date")
+    if not raw_date:
+        raise ValueError("workout_date is required")
+    try:
+        workout_date = date.fromisoformat(str(raw_date))
+    except ValueError:
+        raise ValueError("workout_date must be YYYY-MM-DD")
+
+    row = (
+        _int(item.get("user_ID"), "user_ID", required=True),
+        workout_date,
+        _text(item.get("workout_type"), "workout_type", 50),
+        _int(item.get("duration_minutes"), "duration_minutes"),
+        _int(item.get("calories_burned"), "calories_burned"),
+        _text(item.get("notes"), "notes"),
+    )
+
+    exercises = item.get("exercises") or []
+    if not isinstance(exercises, list):
+        raise ValueError("exercises must be a list")
+    children, seen = [], set()
+    for position, exercise in enumerate(exercises, start=1):
+        if not isinstance(exercise, dict):
+            raise ValueError(f"exercises[{position - 1}] must be an object")
+        try:
+            exercise_id = _int(exercise.get("exercise_ID"), "exercise_ID", required=True)
+            order_index = _int(exercise.get("order_index", position), "order_index")
+            child = (
+                None, exercise_id,
+                _int(exercise.get("sets"), "sets"),
+                _int(exercise.get("reps"), "reps"),
+                _weight(exercise.get("weight")),
+                _int(exercise.get("duration_seconds"), "duration_seconds"),
+                _int(exercise.get("rest_seconds"), "rest_seconds"),
+                order_index,
+            )
+        except ValueError as e:
+            raise ValueError(f"exercises[{position - 1}]: {e}")
+        if (exercise_id, order_index) in seen:
+            raise ValueError(f"exercises[{position - 1}]: duplicate exercise_ID/order_index")
+        seen.add((exercise_id, order_index))
+        children.append(child)
+    return row, children
+
+
+def _existing(cursor, table, column, values):
+    found = set()
+    values = sorted(values)
+    for start in range(0, len(values), LOOKUP_CHUNK):
+        batch = values[start:start + LOOKUP_CHUNK]
+        cursor.execute(
+            f"SELECT {column} FROM {table} WHERE {column} IN ({', '.join(['%s'] * len(batch))})",
+            tuple(batch),
+        )
+        found.update(row[column] for row in cursor.fetchall())
+    return found
+
+
+def consecutive_ids(row):
+    """
+    Whether a multi-row INSERT is guaranteed consecutive AUTO_INCREMENT
+    values, given the (increment, lock_mode) row of AUTOINC_SETTINGS.
+    """
+    increment, lock_mode = (row["increment"], row["lock_mode"]) if isinstance(row, dict) else row
+    return int(increment) == 1 and int(lock_mode) in (0, 1)
+
+
+def _values(cursor, table, columns, rows):
+    """Multi-row INSERT of `rows`; returns the driver's lastrowid."""
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    cursor.execute(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([placeholders] * len(rows))}",
+        tuple(value for row in rows for value in row),
+    )
+    return cursor.lastrowid
+
+
+def _insert_chunk(cursor, chunk, chunk_size, consecutive):
+    """Insert [(index, row, children)]; returns {index: workout_ID}."""
+    rows = [row for _, row, _ in chunk]
+    if consecutive:
+        # LAST_INSERT_ID() is the first of the statement's consecutive values
+        first_id = _values(cursor, "Workout_Log", WORKOUT_COLUMNS, rows)
+        new_ids = range(first_id, first_id + len(rows))
+    else:
+        new_ids = [_values(cursor, "Workout_Log", WORKOUT_COLUMNS, [row]) for row in rows]
+    ids = {index: workout_id for (index, _, _), workout_id in zip(chunk, new_ids)}
+    children = [(ids[index], *child[1:]) for index, _, kids in chunk for child in kids]
+    for start in range(0, len(children), chunk_size):
+        _values(cursor, "Workout_Exercise", EXERCISE_COLUMNS, children[start:start + chunk_size])
+    return ids
+
+
+def _attempt(cursor, chunk, chunk_size, consecutive):
+    cursor.execute("SAVEPOINT bulk_workouts")
+    try:
+        ids = _insert_chunk(cursor, chunk, chunk_size, consecutive)
+    except Exception:
+        cursor.execute("ROLLBACK TO SAVEPOINT bulk_workouts")
+        raise
+    cursor.execute("RELEASE SAVEPOINT bulk_workouts")
+    return ids
+
+
+def insert_workouts(cursor, workouts, chunk_size=500):
+    """
+    Insert parsed workouts [(index, row, children)] inside the caller's
+    transaction.
+
+    Returns ({index: workout_ID}, [(index, error)]). Workouts pointing
+    at a missing user or exercise are reported, not inserted.
+    """
+    errors = []
+    users = _existing(cursor, "User", "user_ID", {row[0] for _, row, _ in workouts})
+    exercises = _existing(cursor, "Exercise", "exercise_ID",
+                          {child[1] for _, _, kids in workouts for child in kids})
+    valid = []
+    for index, row, children in workouts:
+        missing = sorted({child[1] for child in children} - exercises)
+        if row[0] not in users:
+            errors.append((index, f"user_ID {row[0]} does not exist"))
+        elif missing:
+            errors.append((index, f"exercise_ID {missing[0]} does not exist"))
+        else:
+            valid.append((index, row, children))
+
+    cursor.execute(AUTOINC_SETTINGS)
+    consecutive = consecutive_ids(cursor.fetchone())
+    ids = {}
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        try:
+            ids.update(_attempt(cursor, chunk, chunk_size, consecutive))
+        except Exception:
+            for workout in chunk:
+                try:
+                    ids.update(_attempt(cursor, [workout], chunk_size, consecutive))
+                except Exception as e:
+                    errors.append((workout[0], str(e)))
+    return ids, errors
@@ -0,0 +1,82 @@
+#------------------------------------------------------------
+# Fast JSON provider for API responses.
+#
+# Flask's default provider runs every row dict through the
+# stdlib encoder and a Python-level `default` hook for each
+# datetime/date/Decimal value. orjson serializes datetimes,
+# dates, dataclasses and UUIDs natively in C, so only Decimal
+# (DECIMAL columns) still goes through the hook.
+#
+# datetime/date values come out as ISO 8601 ("2025-01-02",
+# "2025-01-02T08:30:00"), Decimal values as JSON numbers.
+# Subclasses of dict/list/str/int (OrderedDict, Counter, ...)
+# serialize like their base type, and NumPy arrays and scalars
+# (model outputs) as plain numbers and lists.
+#------------------------------------------------------------
+import decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # fall back to Flask's stdlib provider
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if orjson is not None else 0
+)
+
+
+def _default(obj):
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode("utf-8", "replace")
+    if np is not None:
+        # scalar types and arrays orjson does not handle natively
+        # (float16, datetime64, non-contiguous or object arrays, ...)
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+    # __html__ objects, dataclasses etc. behave like the stdlib provider
+    return DefaultJSONProvider.default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    orjson-backed JSON provider.
+
+    Keys are emitted in row order rather than sorted. Calls that pass
+    stdlib json options (indent=..., cls=...) fall back to the default
+    provider so existing callers keep working.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Install the fast provider on `app` (no-op if orjson is not installed)."""
+    if orjson is None:
+        app.logger.warning("orjson is not installed; using the default JSON provider")
+        return
+    app.json = FastJSONProvider(app)
@@ -0,0 +1,208 @@
+#------------------------------------------------------------
+# Video_Footage retention archiver.
+#
+# Flags footage older than the retention window (30 days per
+# the Video Surveillance Policy) as is_archived, in small
+# batches. Each batch selects the oldest unarchived expired
+# rows straight off idx_footage_archived_timestamp
+# (is_archived, timestamp, plus the footage_ID InnoDB appends),
+# keyset-paginated on (timestamp, footage_ID), so expired rows
+# are found wherever their IDs fall and live rows are never
+# scanned. Each batch is its own short transaction, followed by
+# a pause, so row locks are held for milliseconds and live
+# traffic is never starved.
+#
+# Archived rows leave the index range, so a restarted or
+# crashed run simply resumes with what is left. Batches lock
+# the job's Maintenance_Checkpoint row, so two archivers (e.g.
+# the reloader's two processes) take turns instead of
+# duplicating work; the row records the last footage_ID archived.
+#
+#   flask --app backend_app archive-footage          # one pass (cron)
+#   FOOTAGE_ARCHIVER_INTERVAL=3600                    # or in-process, hourly
+#
+# Progress metrics are reported under "footage_archiver" in /health.
+#------------------------------------------------------------
+import threading
+import time
+
+import click
+
+from backend.db_connection import db
+from backend.db_connection import versions
+from backend.db_connection.versions import table_versions
+
+JOB = "video_footage_archiver"
+
+CHECKPOINT_TABLE = """
+CREATE TABLE IF NOT EXISTS Maintenance_Checkpoint (
+    job VARCHAR(64) NOT NULL,
+    last_key BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (job)
+)
+"""
+
+
+class FootageArchiver:
+    """
+    Keyset-batched, resumable archiver for Video_Footage.
+
+    A pass walks the unarchived rows recorded before the cutoff in
+    (timestamp, footage_ID) order and stops when they run out or
+    after `max_batches`. Footage that is still live is picked up by a
+    later run once it expires.
+    """
+
+    def __init__(self, retention_days=30, batch_size=500, pause=0.2, max_batches=None):
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.pause = pause
+        self.max_batches = max_batches
+        self._lock = threading.Lock()
+        self._progress = {
+            "status": "idle",
+            "runs": 0,
+            "batches": 0,
+            "rows_scanned": 0,
+            "rows_archived": 0,
+            "checkpoint": None,
+            "last_batch_ms": None,
+            "last_run_started": None,
+            "last_run_finished": None,
+            "last_error": None,
+        }
+
+    def _update(self, **changes):
+        with self._lock:
+            for key, value in changes.items():
+                if key in ("batches", "rows_scanned", "rows_archived", "runs"):
+                    self._progress[key] += value
+                else:
+                    self._progress[key] = value
+
+    def progress(self):
+        with self._lock:
+            return dict(self._progress, retention_days=self.retention_days,
+                        batch_size=self.batch_size)
+
+    def ensure_checkpoint(self):
+        with db.transaction() as cursor:
+            cursor.execute(CHECKPOINT_TABLE)
+            cursor.execute(versions.SCHEMA)
+            cursor.execute("INSERT IGNORE INTO Maintenance_Checkpoint (job, last_key) VALUES (%s, 0)", (JOB,))
+
+    def run_batch(self, cutoff, after=None):
+        """
+        Archive the next batch of expired rows after the keyset position
+        `after` ((timestamp, footage_ID), or None to start from the oldest).
+        Returns (scanned, archived, finished, position of the last row).
+        """
+        started = time.monotonic()
+        with db.transaction() as cursor:
+            # serializes concurrent archivers on the checkpoint row
+            cursor.execute("SELECT last_key FROM Maintenance_Checkpoint WHERE job = %s FOR UPDATE", (JOB,))
+            last_key = cursor.fetchone()["last_key"]
+
+            keyset, params = "", [cutoff]
+            if after is not None:
+                keyset = "AND (`timestamp` > %s OR (`timestamp` = %s AND footage_ID > %s))"
+                params += [after[0], after[0], after[1]]
+            cursor.execute(
+                f"""
+                SELECT footage_ID, `timestamp` FROM Video_Footage
+                WHERE is_archived = FALSE AND `timestamp` < %s {keyset}
+                ORDER BY `timestamp`, footage_ID
+                LIMIT %s
+                """,
+                (*params, self.batch_size),
+            )
+            rows = cursor.fetchall()
+
+            archived = 0
+            if rows:
+                expired = [row["footage_ID"] for row in rows]
+                # assigning `timestamp` explicitly stops ON UPDATE CURRENT_TIMESTAMP
+                # (older schemas) from resetting the recording time
+                placeholders = ", ".join(["%s"] * len(expired))
+                cursor.execute(
+                    f"""
+                    UPDATE Video_Footage SET is_archived = TRUE, `timestamp` = `timestamp`
+                    WHERE footage_ID IN ({placeholders}) AND `timestamp` < %s AND is_archived = FALSE
+                    """,
+                    (*expired, cutoff),
+                )
+                archived = cursor.rowcount
+                if archived:
+                    # ETags of /video_footage readers in every worker
+                    table_versions.bump_with(cursor, "Video_Footage")
+                last_key = expired[-1]
+                after = (rows[-1]["timestamp"], last_key)
+                cursor.execute(
+                    "UPDATE Maintenance_Checkpoint SET last_key = %s WHERE job = %s", (last_key, JOB)
+                )
+
+        self._update(batches=1, rows_scanned=len(rows), rows_archived=archived, checkpoint=last_key,
+                     last_batch_ms=round((time.monotonic() - started) * 1000, 2))
+        return len(rows), archived, len(rows) < self.batch_size, after
+
+    def run(self):
+        """One archival pass. Returns the number of rows archived."""
+        self._update(status="running", runs=1, last_run_started=time.time(), last_error=None)
+        total = 0
+        try:
+            self.ensure_checkpoint()
+            with db.cursor() as cursor:
+                cursor.execute("SELECT NOW() - INTERVAL %s DAY AS cutoff", (self.retention_days,))
+                cutoff = cursor.fetchone()["cutoff"]
+            batches, after = 0, None
+            while True:
+                _, archived, finished, after = self.run_batch(cutoff, after)
+                total += archived
+                batches += 1
+                if finished or (self.max_batches and batches >= self.max_batches):
+                    break
+                time.sleep(self.pause)
+        except Exception as e:
+            self._update(status="failed", last_error=str(e))
+            raise
+        self._update(status="idle", last_run_finished=time.time())
+        return total
+
+    def start_background(self, app, interval):
+        """Run a pass every `interval` seconds on a daemon thread."""
+
+        def loop():
+            while True:
+                try:
+                    with app.app_context():
+                        self.run()
+                except Exception as e:
+                    app.logger.error(f"footage archiver failed: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=loop, name="footage-archiver", daemon=True)
+        thread.start()
+        return thread
+
+
+def init_app(app, archiver):
+    """Register the archive-footage command and, if configured, the background job."""
+
+    @app.cli.command("archive-footage")
+    @click.option("--batch-size", type=int, help="rows per batch/transaction")
+    @click.option("--pause", type=float, help="seconds to sleep between batches")
+    def archive_command(batch_size, pause):
+        """Flag Video_Footage past the retention window as archived."""
+        if batch_size:
+            archiver.batch_size = batch_size
+        if pause is not None:
+            archiver.pause = pause
+        archived = archiver.run()
+        progress = archiver.progress()
+        click.echo(f"archived {archived} rows in {progress['batches']} batches "
+                   f"(checkpoint footage_ID {progress['checkpoint']})")
+
+    interval = float(app.config.get("FOOTAGE_ARCHIVER_INTERVAL", 0))
+    if interval > 0:
+        archiver.start_background(app, interval)
@@ -0,0 +1,302 @@
+#------------------------------------------------------------
+# Monthly range partitioning for Workout_Log and Video_Footage.
+#
+# Both tables are partitioned BY RANGE (TO_DAYS(<date column>))
+# with one partition per calendar month (p202508 holds August
+# 2025) plus a catch-all `pmax`. Time-window queries then only
+# touch the months they ask for, and retention becomes a
+# metadata operation (DROP / EXCHANGE PARTITION) instead of a
+# large DELETE.
+#
+#   flask --app backend_app partitions init           # one-time conversion
+#   flask --app backend_app partitions maintain       # run daily (cron)
+#   flask --app backend_app partitions show
+#   flask --app backend_app partitions check-pruning  # EXPLAIN-based check
+#
+# MySQL does not allow foreign keys on partitioned tables, so
+# `init` replaces the ones touching these tables with triggers
+# (cascade User -> Workout_Log -> Workout_Exercise, restrict
+# Video_Footage deletes still referenced by Emp_Only). The
+# triggers only cover deletes: the keys' ON UPDATE CASCADE is
+# lost, so changing a user_ID, workout_ID or footage_ID no
+# longer follows into Workout_Log, Workout_Exercise or Emp_Only
+# (the API never rewrites these keys; do not do it by hand).
+#
+# Dropping a partition does not fire DELETE triggers: the daily
+# workout rollup keeps the history of expired months. Expired
+# Workout_Log months are always archived, never dropped: their
+# Workout_Exercise children are not partitioned, and deleting
+# them would be exactly the large DELETE this avoids. They stay
+# put, next to their workouts' archive table.
+#------------------------------------------------------------
+import re
+from datetime import date, datetime
+
+import click
+
+from backend.db_connection import db
+from backend.db_connection.versions import table_versions
+
+TABLES = {
+    "Workout_Log": {"column": "workout_date", "key": "workout_ID"},
+    "Video_Footage": {"column": "`timestamp`", "key": "footage_ID"},
+}
+
+# Triggers standing in for the foreign keys `init` has to drop
+REPLACEMENT_TRIGGERS = {
+    "Workout_Log": {
+        "user_delete_workouts": """
+            BEFORE DELETE ON User FOR EACH ROW
+            DELETE FROM Workout_Log WHERE user_ID = OLD.user_ID
+        """,
+        "workout_log_delete_exercises": """
+            AFTER DELETE ON Workout_Log FOR EACH ROW
+            DELETE FROM Workout_Exercise WHERE workout_ID = OLD.workout_ID
+        """,
+    },
+    "Video_Footage": {
+        "video_footage_restrict_delete": """
+            BEFORE DELETE ON Video_Footage FOR EACH ROW
+            BEGIN
+                IF EXISTS (SELECT 1 FROM Emp_Only WHERE footage_ID = OLD.footage_ID) THEN
+                    SIGNAL SQLSTATE '45000'
+                        SET MESSAGE_TEXT = 'Video_Footage row is referenced by Emp_Only';
+                END IF;
+            END
+        """,
+    },
+}
+
+# Tables whose expired partitions are always archived (see above)
+ARCHIVE_ONLY = {"Workout_Log"}
+
+# Rows in other tables that pointed at an expired partition (drop mode only)
+ORPHAN_CLEANUP = {
+    "Video_Footage": "UPDATE Emp_Only SET footage_ID = NULL WHERE footage_ID IN "
+                     "(SELECT footage_ID FROM Video_Footage PARTITION ({partition}))",
+}
+
+PARTITION_NAME = re.compile(r"^p(\d{4})(\d{2})$")
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def partition_month(name):
+    """Month a pYYYYMM partition holds, or None for pmax/others."""
+    match = PARTITION_NAME.match(name or "")
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def partition_clause(month):
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{add_months(month, 1)}'))"
+
+
+def list_partitions(cursor, table):
+    """[(name, estimated_rows)] in order; [] if the table is not partitioned."""
+    cursor.execute(
+        """
+        SELECT PARTITION_NAME, TABLE_ROWS FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY PARTITION_ORDINAL_POSITION
+        """,
+        (table,),
+    )
+    return [(row["PARTITION_NAME"], row["TABLE_ROWS"]) for row in cursor.fetchall()
+            if row["PARTITION_NAME"] is not None]
+
+
+def _foreign_keys(cursor, table):
+    """[(owning_table, constraint)] for FKs on or referencing `table`."""
+    cursor.execute(
+        """
+        SELECT DISTINCT TABLE_NAME, CONSTRAINT_NAME FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL
+          AND (TABLE_NAME = %s OR REFERENCED_TABLE_NAME = %s)
+        """,
+        (table, table),
+    )
+    return [(row["TABLE_NAME"], row["CONSTRAINT_NAME"]) for row in cursor.fetchall()]
+
+
+def _existing_triggers(cursor):
+    cursor.execute("SELECT TRIGGER_NAME FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = DATABASE()")
+    return {row["TRIGGER_NAME"] for row in cursor.fetchall()}
+
+
+def init_table(cursor, table, ahead=3, today=None):
+    """Convert `table` to monthly partitions. Returns False if it already is partitioned."""
+    if list_partitions(cursor, table):
+        return False
+    spec = TABLES[table]
+    column, key = spec["column"], spec["key"]
+
+    triggers = _existing_triggers(cursor)
+    for name, body in REPLACEMENT_TRIGGERS[table].items():
+        if name not in triggers:
+            cursor.execute(f"CREATE TRIGGER {name} {body}")
+    for owner, constraint in _foreign_keys(cursor, table):
+        cursor.execute(f"ALTER TABLE `{owner}` DROP FOREIGN KEY `{constraint}`")
+
+    if table == "Video_Footage":
+        # the recording time must not move when a row is updated (e.g. archived)
+        cursor.execute("ALTER TABLE Video_Footage MODIFY `timestamp` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP")
+
+    cursor.execute(f"SELECT MIN({column}) AS first FROM {table}")
+    first = cursor.fetchone()["first"]
+    if isinstance(first, datetime):
+        first = first.date()
+    current = month_start(today or date.today())
+    month = month_start(first) if first else current
+    clauses = []
+    while month <= add_months(current, ahead):
+        clauses.append(partition_clause(month))
+        month = add_months(month, 1)
+    clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+
+    # every unique key must contain the partitioning column
+    cursor.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY ({key}, {column})")
+    cursor.execute(
+        f"ALTER TABLE {table} PARTITION BY RANGE (TO_DAYS({column})) (\n    "
+        + ",\n    ".join(clauses) + "\n)"
+    )
+    return True
+
+
+def add_future_partitions(cursor, table, ahead=3, today=None):
+    """Split pmax so monthly partitions exist through `ahead` months from now."""
+    months = [partition_month(name) for name, _ in list_partitions(cursor, table)]
+    months = [m for m in months if m]
+    if not months:
+        return []
+    target = add_months(month_start(today or date.today()), ahead)
+    new = []
+    month = add_months(max(months), 1)
+    while month <= target:
+        new.append(month)
+        month = add_months(month, 1)
+    if new:
+        # pmax is normally empty, so this is a metadata-only reorganize
+        clauses = [partition_clause(m) for m in new] + ["PARTITION pmax VALUES LESS THAN MAXVALUE"]
+        cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO ({', '.join(clauses)})")
+    return [partition_name(m) for m in new]
+
+
+def expire_partitions(cursor, table, retain_months, archive=False, today=None):
+    """
+    Remove month partitions older than `retain_months` full months.
+
+    With archive=True (always, for ARCHIVE_ONLY tables) each expired
+    partition is swapped into its own table (e.g. Workout_Log_p202401)
+    with EXCHANGE PARTITION before it is dropped; otherwise it is
+    dropped outright. Returns the names of the partitions removed.
+    """
+    archive = archive or table in ARCHIVE_ONLY
+    cutoff = add_months(month_start(today or date.today()), -retain_months)
+    expired = [name for name, _ in list_partitions(cursor, table)
+               if partition_month(name) and partition_month(name) < cutoff]
+    for name in expired:
+        if archive:
+            archive_table = f"{table}_{name}"
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {archive_table} LIKE {table}")
+            cursor.execute(f"ALTER TABLE {archive_table} REMOVE PARTITIONING")
+            cursor.execute(f"ALTER TABLE {table} EXCHANGE PARTITION {name} WITH TABLE {archive_table}")
+        else:
+            cursor.execute(ORPHAN_CLEANUP[table].format(partition=name))
+        cursor.execute(f"ALTER TABLE {table} DROP PARTITION {name}")
+    if expired:
+        # rows vanished without DELETEs: invalidate the API's ETags (own transaction)
+        table_versions.bump(table)
+    return expired
+
+
+PRUNING_PROBES = {
+    "Workout_Log": "SELECT workout_ID FROM Workout_Log WHERE workout_date >= CURDATE() - INTERVAL 30 DAY",
+    "Video_Footage": "SELECT footage_ID FROM Video_Footage "
+                     "WHERE `timestamp` >= NOW() - INTERVAL 7 DAY AND is_archived = FALSE",
+}
+
+
+def check_pruning(cursor, table):
+    """EXPLAIN a recent-window query; returns (partitions_read, partitions_total)."""
+    total = len(list_partitions(cursor, table))
+    cursor.execute("EXPLAIN " + PRUNING_PROBES[table])
+    read = set()
+    for row in cursor.fetchall():
+        read.update(p for p in (row.get("partitions") or "").split(",") if p)
+    return sorted(read), total
+
+
+def init_app(app):
+    """Register the `partitions` command group on `app`."""
+
+    @app.cli.group("partitions")
+    def partitions():
+        """Monthly partitioning and retention for Workout_Log and Video_Footage."""
+
+    @partitions.command("init")
+    @click.option("--ahead", default=3, show_default=True, help="future months to pre-create")
+    def init_command(ahead):
+        """Convert the tables to monthly partitions (one-time, rebuilds them)."""
+        with db.cursor() as cursor:
+            for table in TABLES:
+                if init_table(cursor, table, ahead):
+                    click.echo(f"{table}: partitioned into {len(list_partitions(cursor, table))} partitions")
+                else:
+                    click.echo(f"{table}: already partitioned")
+
+    @partitions.command("maintain")
+    @click.option("--ahead", default=3, show_default=True, help="future months to keep pre-created")
+    @click.option("--workout-retention", default=0, show_default=True,
+                  help="months of Workout_Log to keep (0 = keep everything)")
+    @click.option("--footage-retention", default=3, show_default=True,
+                  help="months of Video_Footage to keep (0 = keep everything)")
+    @click.option("--archive", is_flag=True,
+                  help="exchange expired Video_Footage partitions into archive tables instead of dropping "
+                       "(Workout_Log is always archived)")
+    def maintain_command(ahead, workout_retention, footage_retention, archive):
+        """Pre-create future partitions and expire old ones."""
+        retention = {"Workout_Log": workout_retention, "Video_Footage": footage_retention}
+        with db.cursor() as cursor:
+            for table in TABLES:
+                if not list_partitions(cursor, table):
+                    click.echo(f"{table}: not partitioned, run `partitions init` first")
+                    continue
+                added = add_future_partitions(cursor, table, ahead)
+                expired = expire_partitions(cursor, table, retention[table], archive) if retention[table] else []
+                archived = archive or table in ARCHIVE_ONLY
+                click.echo(f"{table}: added {added or 'none'}, "
+                           f"{'archived' if archived else 'dropped'} {expired or 'none'}")
+
+    @partitions.command("show")
+    def show_command():
+        """List partitions and their estimated row counts."""
+        with db.cursor() as cursor:
+            for table in TABLES:
+                click.echo(table)
+                for name, rows in list_partitions(cursor, table) or [("(not partitioned)", "")]:
+                    click.echo(f"  {name:<12} {rows}")
+
+    @partitions.command("check-pruning")
+    def check_pruning_command():
+        """EXPLAIN recent-window queries and fail if they read every partition."""
+        failed = False
+        with db.cursor() as cursor:
+            for table in TABLES:
+                read, total = check_pruning(cursor, table)
+                pruned = total > 1 and len(read) < total
+                failed |= not pruned
+                click.echo(f"{table}: reads {len(read)}/{total} partitions "
+                           f"({', '.join(read) or 'none'}) {'ok' if pruned else 'NOT PRUNED'}")
+        if failed:
+            raise SystemExit(1)
@@ -0,0 +1,188 @@
+#------------------------------------------------------------
+# Micro-batching of concurrent model calls.
+#
+# Request threads submit one item each and block; a single
+# worker thread takes the first waiting item, keeps collecting
+# for up to `max_wait` seconds (or until `max_batch` items),
+# and runs the batch function once for all of them. Vectorized
+# models (predict_proba on an N-row matrix) cost about the same
+# for 1 row as for 32, so throughput scales with the batch.
+#
+# If the batch call raises, its items are re-scored one at a time
+# so only the item that causes the error gets it. Items whose
+# caller has already given up are dropped rather than scored, and
+# at most `max_queue` items may wait: beyond that submit() fails
+# at once with BatcherOverloaded instead of queueing doomed work.
+#
+# stats() reports p50/p99 of the submit-to-result latency over
+# the last `window` requests, plus batch-size counters.
+#------------------------------------------------------------
+import threading
+import time
+from collections import deque
+
+
+class BatcherTimeout(Exception):
+    """Raised when a submitted item was not scored within the timeout."""
+
+
+class BatcherOverloaded(Exception):
+    """Raised by submit() when max_queue items are already waiting."""
+
+
+class _Item:
+    __slots__ = ("value", "done", "result", "error", "submitted", "abandoned")
+
+    def __init__(self, value):
+        self.value = value
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.submitted = time.perf_counter()
+        self.abandoned = False
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class MicroBatcher:
+    """
+    Group concurrent submit() calls into batched calls of `fn`.
+
+        batcher = MicroBatcher(model.predict_batch, max_batch=32, max_wait=0.005)
+        result = batcher.submit(features)
+
+    `fn` takes a list of items and returns a list of results in the same
+    order. If it raises, each item is retried alone and only the callers
+    whose item still fails get the exception.
+    """
+
+    def __init__(self, fn, max_batch=32, max_wait=0.005, timeout=2.0, max_queue=1024, window=2048,
+                 name="microbatch"):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.name = name
+        self._queue = deque()
+        self._ready = threading.Condition()
+        self._latencies = deque(maxlen=window)
+        self._thread = None
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, value):
+        """Score one item; blocks until its batch has run."""
+        item = _Item(value)
+        with self._ready:
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise BatcherOverloaded(f"{self.name}: {self.max_queue} requests already queued")
+            self.requests += 1
+            self._queue.append(item)
+            self._ready.notify()
+        if not item.done.wait(self.timeout):
+            with self._ready:
+                item.abandoned = True
+                self.timeouts += 1
+            raise BatcherTimeout(f"{self.name}: no result within {self.timeout}s")
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _expired(self, item, now):
+        return item.abandoned or now - item.submitted >= self.timeout
+
+    def _take_batch(self):
+        with self._ready:
+            while True:
+                while not self._queue:
+                    self._ready.wait()
+                deadline = time.perf_counter() + self.max_wait
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._ready.wait(remaining)
+                now = time.perf_counter()
+                batch = []
+                while self._queue and len(batch) < self.max_batch:
+                    item = self._queue.popleft()
+                    if self._expired(item, now):
+                        # its caller already got BatcherTimeout
+                        self.dropped += 1
+                    else:
+                        batch.append(item)
+                if batch:
+                    return batch
+
+    def _score(self, batch):
+        results = self.fn([item.value for item in batch])
+        if len(results) != len(batch):
+            raise RuntimeError(f"{self.name}: got {len(results)} results for {len(batch)} items")
+        for item, result in zip(batch, results):
+            item.result = result
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            try:
+                self._score(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0].error = e
+                    failed = 1
+                else:
+                    # find the offending item(s) so the rest of the batch still succeeds
+                    failed = 0
+                    for item in batch:
+                        try:
+                            self._score([item])
+                        except Exception as item_error:
+                            item.error = item_error
+                            failed += 1
+                with self._ready:
+                    self.errors += failed
+            finished = time.perf_counter()
+            with self._ready:
+                self.batches += 1
+                self.largest_batch = max(self.largest_batch, len(batch))
+                self._latencies.extend(finished - item.submitted for item in batch)
+            for item in batch:
+                item.done.set()
+
+    def stats(self):
+        with self._ready:
+            latencies = sorted(self._latencies)
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "avg_batch": round(self.requests / self.batches, 2) if self.batches else None,
+                "largest_batch": self.largest_batch,
+                "queued": len(self._queue),
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+                "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+                "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+                "max_batch": self.max_batch,
+                "max_queue": self.max_queue,
+                "max_wait_ms": self.max_wait * 1000,
+            }
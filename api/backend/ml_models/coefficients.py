@@ -0,0 +1,90 @@
+#------------------------------------------------------------
+# Binary storage format for model coefficients.
+#
+# model1_params.beta_blob holds a small header followed by the
+# raw little-endian float64 values:
+#
+#   magic  b"BETA"      4 bytes
+#   version             1 byte   (1)
+#   ndim                1 byte
+#   dtype               10 bytes (numpy dtype string, e.g. "<f8")
+#   shape               ndim x uint64
+#   data                prod(shape) x itemsize
+#
+# The header is a multiple of 8 bytes, so decode() returns an
+# aligned, read-only np.frombuffer view of the blob: loading a
+# vector costs no parsing and no copy however long it is.
+#
+#   flask migrate-model-params
+#
+# adds the column if needed and converts rows that only have the
+# legacy text form ("[0.25, 0.45, 0.67]").
+#------------------------------------------------------------
+import struct
+
+import click
+import numpy as np
+
+from backend.db_connection import db
+
+MAGIC = b"BETA"
+VERSION = 1
+HEADER = struct.Struct("<4sBB10s")
+DIM = struct.Struct("<Q")
+
+
+def encode(values):
+    """Header + little-endian float64 bytes for `values`."""
+    array = np.ascontiguousarray(values, dtype="<f8")
+    header = HEADER.pack(MAGIC, VERSION, array.ndim, array.dtype.str.encode())
+    return header + b"".join(DIM.pack(n) for n in array.shape) + array.tobytes()
+
+
+def decode(blob):
+    """Read-only ndarray viewing the data section of `blob` (no copy)."""
+    magic, version, ndim, dtype = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a version 1 coefficient blob")
+    shape = tuple(DIM.unpack_from(blob, HEADER.size + DIM.size * i)[0] for i in range(ndim))
+    offset = HEADER.size + DIM.size * ndim
+    count = int(np.prod(shape)) if shape else 1
+    array = np.frombuffer(blob, dtype=np.dtype(dtype.rstrip(b"\0").decode()), count=count, offset=offset)
+    array = array.reshape(shape)
+    array.flags.writeable = False
+    return array
+
+
+def parse_text(beta_vals):
+    """
+    Legacy '[b0, b1, ...]' text -> float64 array. Raises ValueError on
+    anything else, rather than returning the values before a bad one.
+    """
+    text = beta_vals.strip()
+    if not (text.startswith("[") and text.endswith("]")):
+        raise ValueError(f"not a '[b0, b1, ...]' coefficient list: {beta_vals[:40]!r}")
+    return np.array([float(v) for v in text[1:-1].split(",")], dtype=np.float64)
+
+
+def migrate(cursor):
+    """Add model1_params.beta_blob if missing and fill it from beta_vals. Returns rows converted."""
+    cursor.execute("SHOW COLUMNS FROM model1_params LIKE 'beta_blob'")
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE model1_params ADD COLUMN beta_blob LONGBLOB NULL")
+    cursor.execute("SELECT sequence_number, beta_vals FROM model1_params "
+                   "WHERE beta_blob IS NULL AND beta_vals IS NOT NULL")
+    rows = cursor.fetchall()
+    for row in rows:
+        cursor.execute("UPDATE model1_params SET beta_blob = %s WHERE sequence_number = %s AND beta_blob IS NULL",
+                       (encode(parse_text(row["beta_vals"])), row["sequence_number"]))
+    return len(rows)
+
+
+def init_app(app):
+    """Register the migrate-model-params command on `app`."""
+
+    @app.cli.command("migrate-model-params")
+    def migrate_command():
+        """Store model1_params coefficients as binary float64 blobs."""
+        with db.transaction() as cursor:
+            converted = migrate(cursor)
+        click.echo(f"converted {converted} model1_params rows to beta_blob")
@@ -1,45 +1,123 @@
 """
 model01.py is an example of how to access model parameter values that you are storing
 in the database and use them to make a prediction when a route associated with prediction is
-accessed. 
+accessed.
+
+The latest parameter vector is cached in process. At most every
+MODEL_PARAM_CHECK_INTERVAL seconds a cheap MAX(sequence_number) query checks
+whether a newer row was stored; only then is it read again. Coefficients are
+read from the binary beta_blob column (see coefficients.py) as a zero-copy
+view; rows that only have the legacy beta_vals text are parsed instead.
 """
+import threading
+import time
+
 from backend.db_connection import db
+from backend.ml_models import coefficients
 import numpy as np
+from mysql.connector import errorcode, Error
 # import logging
 
 from flask import current_app
 
+class ParamCache:
+  """Latest model1_params row as a read-only NumPy vector, reloaded when sequence_number changes."""
+
+  def __init__(self, check_interval=5.0):
+    self.check_interval = check_interval
+    self._lock = threading.Lock()
+    self.sequence_number = None
+    self.params = None
+    self._checked_at = 0.0
+    self.checks = 0
+    self.reloads = 0
+
+  @staticmethod
+  def to_params(row):
+    """Intercept + weights from a model1_params row, preferring the binary column."""
+    if row.get('beta_blob') is not None:
+      params = coefficients.decode(row['beta_blob'])
+    else:
+      params = coefficients.parse_text(row['beta_vals'])
+      params.flags.writeable = False
+    if params.ndim != 1 or params.size < 2:
+      raise ValueError(f'expected a vector of at least 2 beta values, got shape {params.shape}')
+    return params
+
+  def _load(self):
+    query = 'SELECT sequence_number, beta_blob, beta_vals FROM model1_params ORDER BY sequence_number DESC LIMIT 1'
+    with db.cursor() as cursor:
+      try:
+        cursor.execute(query)
+      except Error as e:
+        # beta_blob not added yet: run `flask migrate-model-params`
+        if e.errno != errorcode.ER_BAD_FIELD_ERROR:
+          raise
+        cursor.execute(query.replace('beta_blob, ', ''))
+      row = cursor.fetchone()
+    if row is None:
+      raise LookupError('model1_params is empty')
+    self.params = self.to_params(row)
+    self.sequence_number = row['sequence_number']
+    self.reloads += 1
+    current_app.logger.info(f'model01 params loaded (sequence {self.sequence_number}, {self.params.size} values)')
+
+  def get(self):
+    """(sequence_number, params) -- checks the database at most every check_interval seconds."""
+    now = time.monotonic()
+    if self.params is not None and now - self._checked_at < self.check_interval:
+      return self.sequence_number, self.params
+    with self._lock:
+      if self.params is None:
+        self._load()
+      elif time.monotonic() - self._checked_at >= self.check_interval:
+        self.checks += 1
+        with db.cursor() as cursor:
+          cursor.execute('SELECT MAX(sequence_number) AS sequence_number FROM model1_params')
+          latest = cursor.fetchone()['sequence_number']
+        if latest != self.sequence_number:
+          self._load()
+      self._checked_at = time.monotonic()
+      return self.sequence_number, self.params
+
+  def invalidate(self):
+    """Force a reload on the next prediction (e.g. after storing new parameters)."""
+    with self._lock:
+      self._checked_at = 0.0
+      self.sequence_number = None
+
+  def stats(self):
+    return {'sequence_number': self.sequence_number, 'checks': self.checks, 'reloads': self.reloads,
+            'check_interval': self.check_interval}
+
+
+param_cache = ParamCache()
+
+
 def train():
   """
   You could have a function that performs training from scratch as well as testing (see below).
-  It could be activated from a route for an "administrator role" or something similar. 
+  It could be activated from a route for an "administrator role" or something similar.
   """
   return 'Training the model'
 
 def test():
   return 'Testing the model'
 
-def predict(var01, var02):
+def predict_batch(inputs):
   """
-  Retreives model parameters from the database and uses them for real-time prediction
+  Score an (N x k) matrix of input rows with one matrix-vector product, where
+  k is the number of weights after the intercept (2 for var01, var02).
+  Returns a float64 array of N predictions.
   """
-  # get a database cursor 
-  cursor = db.get_db().cursor()
-  # get the model params from the database
-  query = 'SELECT beta_vals FROM model1_params ORDER BY sequence_number DESC LIMIT 1'
-  cursor.execute(query)
-  return_val = cursor.fetchone()
-  params = return_val['beta_vals']
-  
-  # turn the values from the database into a numpy array
-  params_array = np.array(list(map(float, params[1:-1].split(','))))
-  current_app.logger.info(f'params array = {params_array}')
-
-  # turn the variables sent from the UI into a numpy array
-  input_array = np.array([1.0, float(var01), float(var02)])
-  
-  # calculate the dot product (since this is a fake regression)
-  prediction = np.dot(params_array, input_array)
-
-  return prediction
+  _, params = param_cache.get()
+  X = np.asarray(inputs, dtype=np.float64)
+  if X.ndim != 2 or X.shape[1] != params.size - 1:
+    raise ValueError(f'inputs must be an N x {params.size - 1} matrix, got shape {X.shape}')
+  return X @ params[1:] + params[0]
 
+def predict(var01, var02):
+  """
+  Uses the cached model parameters for real-time prediction
+  """
+  return float(predict_batch([[float(var01), float(var02)]])[0])
@@ -0,0 +1,268 @@
+#------------------------------------------------------------
+# Workout plan recommendations from the WorkoutRecommendationModel
+# artifact (ml-src/workout_recommendation_model.py).
+#
+# The joblib file written by save_model() holds plain sklearn
+# objects ({"model", "label_encoders", "scaler", "is_trained"}),
+# so it is loaded here without importing ml-src. init_app()
+# loads it once at startup and starts a MicroBatcher: concurrent
+# POST /recommendations requests arriving within
+# RECOMMENDER_MAX_WAIT_MS of each other are scored by a single
+# predict_proba call.
+#
+# The model comes from the active version of the registry in
+# RECOMMENDER_REGISTRY (see registry.py), or from the single file
+# RECOMMENDER_MODEL_PATH when there is no registry. Every
+# RECOMMENDER_CHECK_INTERVAL seconds each worker re-reads the
+# ACTIVE pointer, so switching versions (PUT /system/models/active)
+# reaches all worker processes without a restart. A new version is
+# fully loaded before it replaces the old one; batches already
+# queued finish on the model they were validated against.
+#
+# To publish a version:
+#   cd ml-src && python workout_recommendation_model.py --registry ../api/models/registry --activate
+#------------------------------------------------------------
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from backend.microbatch import MicroBatcher
+from backend.ml_models.registry import ModelRegistry
+
+FEATURES = ("age", "fitness_level", "goal", "experience_years", "bmi", "weekly_workouts", "avg_workout_duration")
+CATEGORICAL = ("fitness_level", "goal")
+TOP_N = 3
+
+
+class ModelUnavailable(Exception):
+    """No recommendation model is loaded."""
+
+
+class Recommender:
+    """A loaded artifact, scoring pre-encoded feature rows in one vectorized pass."""
+
+    def __init__(self, artifact, path=None, version=None, metadata=None):
+        if not artifact.get("is_trained"):
+            raise ValueError("artifact holds an untrained model")
+        self.model = artifact["model"]
+        self.scaler = artifact["scaler"]
+        self.encoders = artifact["label_encoders"]
+        self.path = path
+        self.version = version
+        self.metadata = metadata or {}
+        self.loaded_at = datetime.now().isoformat()
+        # category -> code, the same mapping LabelEncoder.transform uses
+        self.codes = {col: {value: code for code, value in enumerate(self.encoders[col].classes_)}
+                      for col in CATEGORICAL}
+        # plan name for each predict_proba column
+        self.plans = self.encoders["recommended_plan"].classes_[self.model.classes_].tolist()
+
+    @classmethod
+    def load(cls, path):
+        return cls(joblib.load(path), path)
+
+    def encode(self, record):
+        """Validate one request body and return its feature row (categoricals as codes)."""
+        if not isinstance(record, dict):
+            raise ValueError("expected a JSON object of user features")
+        missing = [name for name in FEATURES if record.get(name) is None]
+        if missing:
+            raise ValueError(f"missing fields: {', '.join(missing)}")
+        row = []
+        for name in FEATURES:
+            value = record[name]
+            if name in self.codes:
+                if not isinstance(value, str) or value not in self.codes[name]:
+                    raise ValueError(f"'{name}' must be one of {', '.join(self.codes[name])}")
+                row.append(self.codes[name][value])
+            else:
+                if isinstance(value, bool):
+                    raise ValueError(f"'{name}' must be a number")
+                try:
+                    number = float(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"'{name}' must be a number")
+                # "inf"/"nan" parse as floats but the forest rejects them
+                if not math.isfinite(number):
+                    raise ValueError(f"'{name}' must be a finite number")
+                row.append(number)
+        return row
+
+    def predict_rows(self, rows):
+        """Recommendation dicts for a list of encode() rows, one predict_proba call."""
+        X = np.asarray(rows, dtype=np.float64)
+        # StandardScaler.transform, without its feature-name check on every batch
+        X = (X - self.scaler.mean_) / self.scaler.scale_
+        proba = self.model.predict_proba(X)
+        # argmax takes the first plan on ties, as RandomForestClassifier.predict does;
+        # the stable sort on -p keeps tied plans in that same order
+        best_plans = np.argmax(proba, axis=1)
+        top = np.argsort(-proba, axis=1, kind="stable")[:, :TOP_N]
+        timestamp = datetime.now().isoformat()
+        results = []
+        for probabilities, best, indices in zip(proba.tolist(), best_plans.tolist(), top.tolist()):
+            results.append({
+                "recommended_plan": self.plans[best],
+                "confidence": probabilities[best],
+                "top_recommendations": [{"plan": self.plans[i], "confidence": probabilities[i]} for i in indices],
+                "timestamp": timestamp,
+            })
+        return results
+
+    def info(self):
+        return {"version": self.version, "path": self.path, "loaded_at": self.loaded_at,
+                "features": list(FEATURES), "plans": self.plans, "metadata": self.metadata}
+
+
+class RecommendationService:
+    """The loaded Recommender, the registry it came from and the micro-batching queue in front of it."""
+
+    def __init__(self):
+        self.recommender = None
+        self.registry = None
+        self.batcher = None
+        self.check_interval = 5.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.swaps = 0
+        self.last_error = None
+
+    def configure(self, max_batch=32, max_wait=0.005, timeout=2.0, max_queue=1024):
+        if self.batcher is not None:
+            return self.batcher
+        self.batcher = MicroBatcher(self._score, max_batch=max_batch, max_wait=max_wait,
+                                    timeout=timeout, max_queue=max_queue, name="recommendations")
+        return self.batcher.start()
+
+    @staticmethod
+    def _score(items):
+        """Score (recommender, row) pairs; a batch spanning a swap is split by model."""
+        results = []
+        start = 0
+        while start < len(items):
+            recommender = items[start][0]
+            end = start
+            while end < len(items) and items[end][0] is recommender:
+                end += 1
+            results.extend(recommender.predict_rows([row for _, row in items[start:end]]))
+            start = end
+        return results
+
+    def load(self, path):
+        self.recommender = Recommender.load(path)
+        return self.recommender
+
+    def _load_version(self, version):
+        return Recommender(self.registry.load(version), self.registry.artifact_path(version),
+                           version, self.registry.metadata(version))
+
+    def use_registry(self, registry, check_interval=5.0):
+        """Serve the registry's active version and follow its ACTIVE pointer from now on."""
+        self.registry = registry
+        self.check_interval = check_interval
+        with self._lock:
+            self._sync()
+        return self.recommender
+
+    def _sync(self):
+        version = self.registry.active()
+        self._checked_at = time.monotonic()
+        if version is not None and (self.recommender is None or self.recommender.version != version):
+            self.recommender = self._load_version(version)
+            self.swaps += 1
+
+    def refresh(self):
+        """Pick up a version activated by another process, at most every check_interval seconds."""
+        if self.registry is None or time.monotonic() - self._checked_at < self.check_interval:
+            return
+        # one thread loads; the others keep serving the current model meanwhile
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._sync()
+            self.last_error = None
+        except Exception as e:
+            # keep serving the loaded version; retried after check_interval
+            self.last_error = str(e)
+        finally:
+            self._lock.release()
+
+    def activate(self, version):
+        """
+        Load `version`, then point the registry's ACTIVE at it and start serving it.
+        A version that fails to load never becomes active.
+        """
+        if self.registry is None:
+            raise ModelUnavailable("no model registry is configured")
+        with self._lock:
+            recommender = self._load_version(version)
+            self.registry.activate(version)
+            self.recommender = recommender
+            self._checked_at = time.monotonic()
+            self.swaps += 1
+        return recommender
+
+    def recommend(self, record):
+        """Validate `record` in the calling thread, then score it with whatever else is queued."""
+        self.refresh()
+        recommender = self.recommender
+        if recommender is None or self.batcher is None:
+            raise ModelUnavailable("no recommendation model is loaded")
+        return self.batcher.submit((recommender, recommender.encode(record)))
+
+    def versions(self):
+        """Metadata of every registry version, with which one is active and which one this worker serves."""
+        registry = self.registry
+        return {
+            "registry": registry.root if registry else None,
+            "active": registry.active() if registry else None,
+            "loaded": self.recommender.version if self.recommender else None,
+            "versions": [registry.metadata(version) for version in registry.versions()] if registry else [],
+        }
+
+    def stats(self):
+        return {
+            "model": self.recommender.info() if self.recommender else None,
+            "swaps": self.swaps,
+            "last_error": self.last_error,
+            "batching": self.batcher.stats() if self.batcher else None,
+        }
+
+
+service = RecommendationService()
+
+
+def init_app(app):
+    """Load the active registry version (or RECOMMENDER_MODEL_PATH) and start the batching queue."""
+    service.configure(
+        max_batch=app.config.get("RECOMMENDER_MAX_BATCH", 32),
+        max_wait=app.config.get("RECOMMENDER_MAX_WAIT_MS", 5) / 1000,
+        timeout=app.config.get("RECOMMENDER_TIMEOUT", 2.0),
+        max_queue=app.config.get("RECOMMENDER_MAX_QUEUE", 1024),
+    )
+    registry = ModelRegistry(app.config.get("RECOMMENDER_REGISTRY", "models/registry"),
+                             mmap_mode=app.config.get("RECOMMENDER_MMAP_MODE") or None)
+    if registry.versions():
+        try:
+            recommender = service.use_registry(registry, app.config.get("RECOMMENDER_CHECK_INTERVAL", 5.0))
+        except Exception as e:
+            app.logger.error(f"could not load recommendation model from {registry.root}: {e}")
+            return
+        app.logger.info(f"recommendation model {recommender.version} loaded from {registry.root}")
+        return
+
+    path = app.config.get("RECOMMENDER_MODEL_PATH", "models/workout_recommendation_model.pkl")
+    if not os.path.exists(path):
+        app.logger.warning(f"no model in {registry.root} or at {path}; POST /recommendations will return 503")
+        return
+    try:
+        recommender = service.load(path)
+    except Exception as e:
+        app.logger.error(f"could not load recommendation model from {path}: {e}")
+        return
+    app.logger.info(f"recommendation model loaded from {path} ({len(recommender.plans)} plans)")
@@ -0,0 +1,95 @@
+#------------------------------------------------------------
+# Versioned model registry on disk.
+#
+#   <root>/
+#     v1/model.joblib       uncompressed joblib artifact
+#     v1/metadata.json      {"version", "accuracy", "trained_at",
+#     v2/...                 "training_seconds", "features", ...}
+#     ACTIVE                name of the version to serve
+#
+# Versions are written by WorkoutRecommendationModel.save_to_registry()
+# (ml-src), which builds each one in a temporary directory and
+# renames it into place, so a version directory is never seen
+# half-written. ACTIVE is replaced with os.replace(), so readers
+# see either the old or the new name.
+#
+# Each worker process loads its own copy of the active version;
+# a forest's trees are not shared between workers. (joblib's
+# mmap_mode can still be set, but sklearn's Tree.__setstate__
+# copies every tree's node arrays into private memory on load,
+# so mapping the file saves little more than the read itself.)
+#------------------------------------------------------------
+import json
+import os
+import re
+
+import joblib
+
+ACTIVE = "ACTIVE"
+ARTIFACT = "model.joblib"
+METADATA = "metadata.json"
+VERSION = re.compile(r"^v(\d+)$")
+
+
+class UnknownVersion(LookupError):
+    """The requested version is not in the registry."""
+
+
+class ModelRegistry:
+    def __init__(self, root, mmap_mode=None):
+        self.root = root
+        self.mmap_mode = mmap_mode
+
+    def exists(self):
+        return os.path.isdir(self.root)
+
+    def versions(self):
+        """Version names, oldest first."""
+        if not self.exists():
+            return []
+        names = [name for name in os.listdir(self.root)
+                 if VERSION.match(name) and os.path.isfile(os.path.join(self.root, name, ARTIFACT))]
+        return sorted(names, key=lambda name: int(VERSION.match(name).group(1)))
+
+    def metadata(self, version):
+        path = os.path.join(self._dir(version), METADATA)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": version}
+
+    def active(self):
+        """The version named by ACTIVE, or the newest version if there is no pointer yet."""
+        try:
+            with open(os.path.join(self.root, ACTIVE)) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            version = None
+        if version:
+            return version
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def activate(self, version):
+        """Atomically point ACTIVE at `version`."""
+        self._dir(version)
+        tmp = os.path.join(self.root, f".{ACTIVE}.{os.getpid()}")
+        with open(tmp, "w") as f:
+            f.write(version + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.root, ACTIVE))
+
+    def artifact_path(self, version):
+        return os.path.join(self._dir(version), ARTIFACT)
+
+    def load(self, version):
+        """The artifact dict of `version`, arrays memory-mapped when mmap_mode is set."""
+        return joblib.load(self.artifact_path(version), mmap_mode=self.mmap_mode)
+
+    def _dir(self, version):
+        path = os.path.join(self.root, str(version))
+        if not VERSION.match(str(version)) or not os.path.isfile(os.path.join(path, ARTIFACT)):
+            raise UnknownVersion(f"no model version {version!r} in {self.root}")
+        return path
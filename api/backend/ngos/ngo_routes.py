@@ -1,19 +1,54 @@
 from flask import Blueprint, jsonify, request
 from backend.db_connection import db
+from backend.db_connection.pagination import Page
+from backend.db_connection.versions import table_versions
+from backend.cache import TTLCache
 from mysql.connector import Error
 from flask import current_app
 
 # Create a Blueprint for NGO routes
 ngos = Blueprint("ngos", __name__)
 
+# Assembled NGO documents (NGO row + projects + donors), keyed by NGO_ID.
+# Invalidated by create_ngo/update_ngo; NGO_CACHE_SIZE / NGO_CACHE_TTL tune it.
+ngo_cache = TTLCache(maxsize=256, ttl=300)
+
+
+@ngos.record_once
+def configure_ngo_cache(state):
+    ngo_cache.maxsize = int(state.app.config.get("NGO_CACHE_SIZE", ngo_cache.maxsize))
+    ngo_cache.ttl = float(state.app.config.get("NGO_CACHE_TTL", ngo_cache.ttl))
+
+
+def load_ngo(ngo_id):
+    """Read one NGO with its projects and donors, or None if it does not exist."""
+    with db.cursor(prepared=True) as cursor:
+        cursor.execute("SELECT * FROM WorldNGOs WHERE NGO_ID = %s", (ngo_id,))
+        ngo = cursor.fetchone()
+        if not ngo:
+            return None
+
+        cursor.execute("SELECT * FROM Projects WHERE NGO_ID = %s", (ngo_id,))
+        ngo["projects"] = cursor.fetchall()
+
+        cursor.execute("SELECT * FROM Donors WHERE NGO_ID = %s", (ngo_id,))
+        ngo["donors"] = cursor.fetchall()
+    return ngo
+
+
+def get_ngo_document(ngo_id):
+    return ngo_cache.get_or_load(ngo_id, lambda: load_ngo(ngo_id))
+
 
 # Get all NGOs with optional filtering by country, focus area, and founding year
 # Example: /ngo/ngos?country=United%20States&focus_area=Environmental%20Conservation
+# Results are paged by NGO_ID: pass ?limit= and the X-Next-Cursor header value as ?after=
 @ngos.route("/ngos", methods=["GET"])
+@table_versions.etag("WorldNGOs")
 def get_all_ngos():
+    page = Page.from_request("NGO_ID")
     try:
         current_app.logger.info('Starting get_all_ngos request')
-        cursor = db.get_db().cursor()
 
         # Note: Query parameters are added after the main part of the URL.
         # Here is an example:
@@ -28,27 +63,27 @@ def get_all_ngos():
         current_app.logger.debug(f'Query parameters - country: {country}, focus_area: {focus_area}, founding_year: {founding_year}')
 
         # Prepare the Base query
-        query = "SELECT * FROM WorldNGOs WHERE 1=1"
+        query = "SELECT * FROM WorldNGOs"
+        filters = []
         params = []
 
         # Add filters if provided
         if country:
-            query += " AND Country = %s"
+            filters.append("Country = %s")
             params.append(country)
         if focus_area:
-            query += " AND Focus_Area = %s"
+            filters.append("Focus_Area = %s")
             params.append(focus_area)
         if founding_year:
-            query += " AND Founding_Year = %s"
+            filters.append("Founding_Year = %s")
             params.append(founding_year)
 
-        current_app.logger.debug(f'Executing query: {query} with params: {params}')
-        cursor.execute(query, params)
-        ngos = cursor.fetchall()
-        cursor.close()
+        current_app.logger.debug(f'Executing query: {query} with filters: {filters} params: {params}')
+        with db.cursor() as cursor:
+            ngos = page.fetch(cursor, query, where=filters, params=params)
 
         current_app.logger.info(f'Successfully retrieved {len(ngos)} NGOs')
-        return jsonify(ngos), 200
+        return page.response(ngos)
     except Error as e:
         current_app.logger.error(f'Database error in get_all_ngos: {str(e)}')
         return jsonify({"error": str(e)}), 500
@@ -57,29 +92,14 @@ def get_all_ngos():
 # Get detailed information about a specific NGO including its projects and donors
 # Example: /ngo/ngos/1
 @ngos.route("/ngos/<int:ngo_id>", methods=["GET"])
+@table_versions.etag("WorldNGOs", "Projects", "Donors")
 def get_ngo(ngo_id):
     try:
-        cursor = db.get_db().cursor()
-
-        # Get NGO details
-        cursor.execute("SELECT * FROM WorldNGOs WHERE NGO_ID = %s", (ngo_id,))
-        ngo = cursor.fetchone()
-
+        # Served from ngo_cache; three queries only on a miss
+        ngo = get_ngo_document(ngo_id)
         if not ngo:
             return jsonify({"error": "NGO not found"}), 404
 
-        # Get associated projects then donors
-        cursor.execute("SELECT * FROM Projects WHERE NGO_ID = %s", (ngo_id,))
-        projects = cursor.fetchall()
-
-        cursor.execute("SELECT * FROM Donors WHERE NGO_ID = %s", (ngo_id,))
-        donors = cursor.fetchall()
-
-        # Combine data from multiple related queries into one object to return (after jsonify)
-        ngo["projects"] = projects
-        ngo["donors"] = donors
-
-        cursor.close()
         return jsonify(ngo), 200
     except Error as e:
         return jsonify({"error": str(e)}), 500
@@ -89,6 +109,7 @@ def get_ngo(ngo_id):
 # Required fields: Name, Country, Founding_Year, Focus_Area, Website
 # Example: POST /ngo/ngos with JSON body
 @ngos.route("/ngos", methods=["POST"])
+@table_versions.bumps("WorldNGOs")
 def create_ngo():
     try:
         data = request.get_json()
@@ -99,27 +120,24 @@ def create_ngo():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
 
-        cursor = db.get_db().cursor()
-
         # Insert new NGO
         query = """
         INSERT INTO WorldNGOs (Name, Country, Founding_Year, Focus_Area, Website)
         VALUES (%s, %s, %s, %s, %s)
         """
-        cursor.execute(
-            query,
-            (
-                data["Name"],
-                data["Country"],
-                data["Founding_Year"],
-                data["Focus_Area"],
-                data["Website"],
-            ),
-        )
-
-        db.get_db().commit()
-        new_ngo_id = cursor.lastrowid
-        cursor.close()
+        with db.transaction() as cursor:
+            cursor.execute(
+                query,
+                (
+                    data["Name"],
+                    data["Country"],
+                    data["Founding_Year"],
+                    data["Focus_Area"],
+                    data["Website"],
+                ),
+            )
+            new_ngo_id = cursor.lastrowid
+        ngo_cache.invalidate(new_ngo_id)
 
         return (
             jsonify({"message": "NGO created successfully", "ngo_id": new_ngo_id}),
@@ -133,35 +151,35 @@ def create_ngo():
 # Can update any field except NGO_ID
 # Example: PUT /ngo/ngos/1 with JSON body containing fields to update
 @ngos.route("/ngos/<int:ngo_id>", methods=["PUT"])
+@table_versions.bumps("WorldNGOs")
 def update_ngo(ngo_id):
     try:
         data = request.get_json()
 
-        # Check if NGO exists
-        cursor = db.get_db().cursor()
-        cursor.execute("SELECT * FROM WorldNGOs WHERE NGO_ID = %s", (ngo_id,))
-        if not cursor.fetchone():
-            return jsonify({"error": "NGO not found"}), 404
+        with db.transaction() as cursor:
+            # Check if NGO exists
+            cursor.execute("SELECT * FROM WorldNGOs WHERE NGO_ID = %s", (ngo_id,))
+            if not cursor.fetchone():
+                return jsonify({"error": "NGO not found"}), 404
 
-        # Build update query dynamically based on provided fields
-        update_fields = []
-        params = []
-        allowed_fields = ["Name", "Country", "Founding_Year", "Focus_Area", "Website"]
+            # Build update query dynamically based on provided fields
+            update_fields = []
+            params = []
+            allowed_fields = ["Name", "Country", "Founding_Year", "Focus_Area", "Website"]
 
-        for field in allowed_fields:
-            if field in data:
-                update_fields.append(f"{field} = %s")
-                params.append(data[field])
+            for field in allowed_fields:
+                if field in data:
+                    update_fields.append(f"{field} = %s")
+                    params.append(data[field])
 
-        if not update_fields:
-            return jsonify({"error": "No valid fields to update"}), 400
+            if not update_fields:
+                return jsonify({"error": "No valid fields to update"}), 400
 
-        params.append(ngo_id)
-        query = f"UPDATE WorldNGOs SET {', '.join(update_fields)} WHERE NGO_ID = %s"
+            params.append(ngo_id)
+            query = f"UPDATE WorldNGOs SET {', '.join(update_fields)} WHERE NGO_ID = %s"
 
-        cursor.execute(query, params)
-        db.get_db().commit()
-        cursor.close()
+            cursor.execute(query, params)
+        ngo_cache.invalidate(ngo_id)
 
         return jsonify({"message": "NGO updated successfully"}), 200
     except Error as e:
@@ -171,21 +189,14 @@ def update_ngo(ngo_id):
 # Get all projects associated with a specific NGO
 # Example: /ngo/ngos/1/projects
 @ngos.route("/ngos/<int:ngo_id>/projects", methods=["GET"])
+@table_versions.etag("WorldNGOs", "Projects")
 def get_ngo_projects(ngo_id):
     try:
-        cursor = db.get_db().cursor()
-
-        # Check if NGO exists
-        cursor.execute("SELECT * FROM WorldNGOs WHERE NGO_ID = %s", (ngo_id,))
-        if not cursor.fetchone():
+        ngo = get_ngo_document(ngo_id)
+        if not ngo:
             return jsonify({"error": "NGO not found"}), 404
 
-        # Get all projects for the NGO
-        cursor.execute("SELECT * FROM Projects WHERE NGO_ID = %s", (ngo_id,))
-        projects = cursor.fetchall()
-        cursor.close()
-
-        return jsonify(projects), 200
+        return jsonify(ngo["projects"]), 200
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
@@ -193,20 +204,20 @@ def get_ngo_projects(ngo_id):
 # Get all donors associated with a specific NGO
 # Example: /ngo/ngos/1/donors
 @ngos.route("/ngos/<int:ngo_id>/donors", methods=["GET"])
+@table_versions.etag("WorldNGOs", "Donors")
 def get_ngo_donors(ngo_id):
     try:
-        cursor = db.get_db().cursor()
-
-        # Check if NGO exists
-        cursor.execute("SELECT * FROM WorldNGOs WHERE NGO_ID = %s", (ngo_id,))
-        if not cursor.fetchone():
+        ngo = get_ngo_document(ngo_id)
+        if not ngo:
             return jsonify({"error": "NGO not found"}), 404
 
-        # Get all donors for the NGO
-        cursor.execute("SELECT * FROM Donors WHERE NGO_ID = %s", (ngo_id,))
-        donors = cursor.fetchall()
-        cursor.close()
-
-        return jsonify(donors), 200
+        return jsonify(ngo["donors"]), 200
     except Error as e:
         return jsonify({"error": str(e)}), 500
+
+
+# Hit/miss counters for the NGO detail cache
+# Example: /ngo/cache
+@ngos.route("/cache", methods=["GET"])
+def get_ngo_cache_stats():
+    return jsonify(ngo_cache.stats()), 200
@@ -5,6 +5,10 @@ import logging
 from logging.handlers import RotatingFileHandler
 
 from backend.db_connection import db
+from backend.db_connection.versions import table_versions
+from backend import compression, json_provider
+from backend.analytics import equipment_summary
+from backend.ml_models import coefficients, recommender
 from backend.simple.simple_routes import simple_routes
 from backend.ngos.ngo_routes import ngos
 from backend.users.user_routes import users
@@ -42,9 +46,66 @@ def create_app():
         "DB_NAME"
     ).strip()  # Change this to your DB name
 
+    # connection pool settings for the shared data-access layer
+    app.config["MYSQL_POOL_SIZE"] = int(os.getenv("DB_POOL_SIZE", 10))
+    app.config["MYSQL_POOL_TIMEOUT"] = float(os.getenv("DB_POOL_TIMEOUT", 5))
+    app.config["MYSQL_POOL_RECYCLE"] = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    app.config["MYSQL_POOL_IDLE_TIMEOUT"] = int(os.getenv("DB_POOL_IDLE_TIMEOUT", 300))
+    # LRU bound on server-side prepared statements kept per pooled connection
+    app.config["MYSQL_STATEMENT_CACHE_SIZE"] = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 64))
+
+    # how often (seconds) each worker re-reads Table_Version for its in-memory ETags
+    app.config["TABLE_VERSION_REFRESH_INTERVAL"] = float(os.getenv("TABLE_VERSION_REFRESH_INTERVAL", 1))
+
+    # Serialize responses with orjson (native datetime/date/Decimal handling)
+    json_provider.init_app(app)
+
+    # gzip/zstd response compression (see backend/compression.py)
+    app.config["COMPRESS_LEVEL"] = int(os.getenv("COMPRESS_LEVEL", 6))
+    app.config["COMPRESS_ZSTD_LEVEL"] = int(os.getenv("COMPRESS_ZSTD_LEVEL", 3))
+    app.config["COMPRESS_MIN_SIZE"] = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    compression.init_app(app)
+
+    # ?stream=ndjson exports: flush a chunk once this many bytes are pending or
+    # this many seconds have passed (see backend/db_connection/streaming.py)
+    app.config["NDJSON_FLUSH_BYTES"] = int(os.getenv("NDJSON_FLUSH_BYTES", 64 * 1024))
+    app.config["NDJSON_FLUSH_INTERVAL"] = float(os.getenv("NDJSON_FLUSH_INTERVAL", 0.2))
+
+    # in-process cache for assembled NGO documents (see ngo_routes.py)
+    app.config["NGO_CACHE_SIZE"] = int(os.getenv("NGO_CACHE_SIZE", 256))
+    app.config["NGO_CACHE_TTL"] = float(os.getenv("NGO_CACHE_TTL", 300))
+
+    # POST /workouts/bulk limits (see backend/ingest/workouts.py)
+    app.config["BULK_MAX_ROWS"] = int(os.getenv("BULK_MAX_ROWS", 5000))
+    app.config["BULK_CHUNK_SIZE"] = int(os.getenv("BULK_CHUNK_SIZE", 500))
+
+    # flush interval (seconds) of coalesced device PATCHes/heartbeats (see backend/write_behind.py)
+    app.config["DEVICE_WRITE_INTERVAL"] = float(os.getenv("DEVICE_WRITE_INTERVAL", 2))
+
+    # how often (seconds) model01 checks model1_params for a newer sequence_number
+    app.config["MODEL_PARAM_CHECK_INTERVAL"] = float(os.getenv("MODEL_PARAM_CHECK_INTERVAL", 5))
+
+    # workout recommendation model and its micro-batching queue (see backend/ml_models/recommender.py)
+    app.config["RECOMMENDER_REGISTRY"] = os.getenv("RECOMMENDER_REGISTRY", "models/registry")
+    app.config["RECOMMENDER_MMAP_MODE"] = os.getenv("RECOMMENDER_MMAP_MODE", "")
+    app.config["RECOMMENDER_CHECK_INTERVAL"] = float(os.getenv("RECOMMENDER_CHECK_INTERVAL", 5))
+    app.config["RECOMMENDER_MODEL_PATH"] = os.getenv("RECOMMENDER_MODEL_PATH", "models/workout_recommendation_model.pkl")
+    app.config["RECOMMENDER_MAX_BATCH"] = int(os.getenv("RECOMMENDER_MAX_BATCH", 32))
+    app.config["RECOMMENDER_MAX_WAIT_MS"] = float(os.getenv("RECOMMENDER_MAX_WAIT_MS", 5))
+    app.config["RECOMMENDER_TIMEOUT"] = float(os.getenv("RECOMMENDER_TIMEOUT", 2))
+    app.config["RECOMMENDER_MAX_QUEUE"] = int(os.getenv("RECOMMENDER_MAX_QUEUE", 1024))
+
     # Initialize the database object with the settings above.
     app.logger.info("current_app(): starting the database connection")
     db.init_app(app)
+    table_versions.init_app(app)
+
+    # `flask check-equipment-summary [--repair]` for the summary the equipment routes maintain
+    equipment_summary.init_app(app)
+    # `flask migrate-model-params` converts model1_params to binary coefficients
+    coefficients.init_app(app)
+    # load the recommendation model once, before any request needs it
+    recommender.init_app(app)
 
     # Register the routes from each Blueprint with the app object
     # and give a url prefix to each
@@ -11,10 +11,22 @@ import json
 from backend.db_connection import db
 from backend.simple.playlist import sample_playlist_data
 from backend.ml_models import model01
+from backend.ml_models.recommender import ModelUnavailable, service as recommendations
+from backend.microbatch import BatcherOverloaded, BatcherTimeout
 
 # This blueprint handles some basic routes that you can use for testing
 simple_routes = Blueprint("simple_routes", __name__)
 
+# largest matrix accepted by POST /prediction/batch
+MAX_BATCH_ROWS = 10000
+
+
+@simple_routes.record_once
+def configure_model_cache(state):
+    model01.param_cache.check_interval = float(
+        state.app.config.get("MODEL_PARAM_CHECK_INTERVAL", model01.param_cache.check_interval)
+    )
+
 
 # ------------------------------------------------------------
 # / is the most basic route
@@ -96,3 +108,67 @@ def get_prediction(var_01, var_02):
         )
         response.status_code = 500
         return response
+
+
+# ------------------------------------------------------------
+# Scores many inputs in one call: {"inputs": [[var01, var02], ...]}
+@simple_routes.route("/prediction/batch", methods=["POST"])
+def get_batch_prediction():
+    current_app.logger.info("POST /prediction/batch handler")
+    payload = request.get_json(silent=True)
+    inputs = payload.get("inputs") if isinstance(payload, dict) else payload
+    if not isinstance(inputs, list) or not inputs:
+        return make_response(jsonify({"error": "expected 'inputs': [[var01, var02], ...]"}), 400)
+    if len(inputs) > MAX_BATCH_ROWS:
+        return make_response(jsonify({"error": f"at most {MAX_BATCH_ROWS} rows per request"}), 413)
+
+    try:
+        predictions = model01.predict_batch(inputs)
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+    except Exception as e:
+        current_app.logger.error(f"Error processing batch prediction: {e}")
+        return make_response(jsonify({"error": "Error processing prediction request"}), 500)
+
+    response_data = {
+        "predictions": predictions.tolist(),
+        "count": len(predictions),
+        "sequence_number": model01.param_cache.sequence_number,
+    }
+    return make_response(jsonify(response_data), 200)
+
+
+# ------------------------------------------------------------
+# Which parameter set predictions are using, and how often it was reloaded
+@simple_routes.route("/prediction/params", methods=["GET"])
+def get_prediction_params():
+    return make_response(jsonify(model01.param_cache.stats()), 200)
+
+
+# ------------------------------------------------------------
+# Workout plan recommendation for one user's features, e.g.
+# {"age": 28, "fitness_level": "beginner", "goal": "weight_loss",
+#  "experience_years": 0, "bmi": 28.5, "weekly_workouts": 2,
+#  "avg_workout_duration": 30}
+# Concurrent requests are scored together (see backend/microbatch.py).
+@simple_routes.route("/recommendations", methods=["POST"])
+def get_recommendation():
+    try:
+        result = recommendations.recommend(request.get_json(silent=True))
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+    except (ModelUnavailable, BatcherOverloaded, BatcherTimeout) as e:
+        response = make_response(jsonify({"error": str(e)}), 503)
+        response.headers["Retry-After"] = "1"
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error processing recommendation request: {e}")
+        return make_response(jsonify({"error": "Error processing recommendation request"}), 500)
+    return make_response(jsonify(result), 200)
+
+
+# ------------------------------------------------------------
+# Loaded model, batch sizes and p50/p99 request latency
+@simple_routes.route("/recommendations/stats", methods=["GET"])
+def get_recommendation_stats():
+    return make_response(jsonify(recommendations.stats()), 200)
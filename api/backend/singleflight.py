@@ -0,0 +1,106 @@
+#------------------------------------------------------------
+# Single-flight request coalescing.
+#
+# Concurrent calls for the same key share one execution: the
+# first caller (the leader) runs the function, everyone who
+# arrives while it is running waits for and reuses its result.
+# Results stay fresh for a short window afterwards, so a burst
+# of dashboard loads costs one query instead of N.
+#------------------------------------------------------------
+import threading
+import time
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "finished_at")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one.
+
+        flight = SingleFlight(fresh_for=2.0)
+        stats = flight.do("gym-usage", load_gym_usage)
+
+    Args:
+        fresh_for: seconds a finished result is reused for new callers
+                   (0 only coalesces calls that overlap in time)
+        wait_timeout: followers that wait longer than this run the
+                      function themselves instead of hanging on a stuck leader
+    """
+
+    def __init__(self, fresh_for=2.0, wait_timeout=30.0):
+        self.fresh_for = fresh_for
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.requests = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.fresh_hits = 0
+        self.errors = 0
+
+    def do(self, key, fn):
+        """Return fn() for `key`, sharing one execution among concurrent callers."""
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set():
+                if call.error is None and time.monotonic() - call.finished_at < self.fresh_for:
+                    self.fresh_hits += 1
+                    return call.result
+                call = None
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.executions += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+                # failures are shared with current waiters but never cached
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            raise
+        finally:
+            call.finished_at = time.monotonic()
+            call.done.set()
+        return call.result
+
+    def forget(self, key):
+        """Drop a finished result so the next call re-executes."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set():
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "fresh_hits": self.fresh_hits,
+                "errors": self.errors,
+                "saved_executions": self.coalesced + self.fresh_hits,
+                "fresh_for": self.fresh_for,
+            }
@@ -1,34 +1,42 @@
 from flask import Blueprint, request, jsonify, make_response, current_app
 from backend.db_connection import db
+from backend.db_connection.pagination import Page
+from backend.db_connection.by_ids import ids_from_request, by_ids_response
+from backend.db_connection.versions import table_versions
 
 analyst_bp = Blueprint('analyst_bp', __name__)
 
 
 @analyst_bp.route('/analysts', methods=['GET'])
+@table_versions.etag('Analyst')
 def list_analysts():
+    ids = ids_from_request()
+    select = '''
+        SELECT analyst_ID, name, email, report_ID, plan_ID, admin_ID, transfer_ID
+        FROM Analyst
+    '''
+    page = Page.from_request('analyst_ID')
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            SELECT analyst_ID, name, email, report_ID, plan_ID, admin_ID, transfer_ID
-            FROM Analyst
-            ORDER BY analyst_ID
-        ''')
-        rows = cursor.fetchall()
-        return make_response(jsonify(rows), 200)
+        with db.cursor() as cursor:
+            if ids:
+                return by_ids_response(cursor, select, 'analyst_ID', ids)
+            rows = page.fetch(cursor, select)
+        return page.response(rows)
     except Exception as e:
         current_app.logger.error(f'Error listing analysts: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @analyst_bp.route('/analysts/<int:analyst_id>', methods=['GET'])
+@table_versions.etag('Analyst')
 def get_analyst(analyst_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            SELECT analyst_ID, name, email, report_ID, plan_ID, admin_ID, transfer_ID
-            FROM Analyst WHERE analyst_ID = %s
-        ''', (analyst_id,))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('''
+                SELECT analyst_ID, name, email, report_ID, plan_ID, admin_ID, transfer_ID
+                FROM Analyst WHERE analyst_ID = %s
+            ''', (analyst_id,))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'Analyst not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -38,6 +46,7 @@ def get_analyst(analyst_id):
 
 
 @analyst_bp.route('/analysts', methods=['POST'])
+@table_versions.bumps('Analyst')
 def create_analyst():
     try:
         payload = request.json or {}
@@ -52,12 +61,11 @@ def create_analyst():
         if not (name and email and report_ID and plan_ID and admin_ID):
             return make_response(jsonify({'error': 'name, email, report_ID, plan_ID, admin_ID required'}), 400)
 
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            INSERT INTO Analyst (name, email, report_ID, plan_ID, admin_ID, transfer_ID)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        ''', (name, email, report_ID, plan_ID, admin_ID, transfer_ID))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO Analyst (name, email, report_ID, plan_ID, admin_ID, transfer_ID)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            ''', (name, email, report_ID, plan_ID, admin_ID, transfer_ID))
         return make_response(jsonify({'message': 'Analyst created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating analyst: {e}')
@@ -65,6 +73,7 @@ def create_analyst():
 
 
 @analyst_bp.route('/analysts/<int:analyst_id>', methods=['PUT'])
+@table_versions.bumps('Analyst')
 def replace_analyst(analyst_id):
     try:
         payload = request.json or {}
@@ -75,12 +84,11 @@ def replace_analyst(analyst_id):
         admin_ID = payload.get('admin_ID')
         transfer_ID = payload.get('transfer_ID')
 
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            UPDATE Analyst SET name=%s, email=%s, report_ID=%s, plan_ID=%s, admin_ID=%s, transfer_ID=%s
-            WHERE analyst_ID=%s
-        ''', (name, email, report_ID, plan_ID, admin_ID, transfer_ID, analyst_id))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('''
+                UPDATE Analyst SET name=%s, email=%s, report_ID=%s, plan_ID=%s, admin_ID=%s, transfer_ID=%s
+                WHERE analyst_ID=%s
+            ''', (name, email, report_ID, plan_ID, admin_ID, transfer_ID, analyst_id))
         return make_response(jsonify({'message': 'Analyst updated'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error updating analyst {analyst_id}: {e}')
@@ -88,11 +96,11 @@ def replace_analyst(analyst_id):
 
 
 @analyst_bp.route('/analysts/<int:analyst_id>', methods=['DELETE'])
+@table_versions.bumps('Analyst')
 def delete_analyst(analyst_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM Analyst WHERE analyst_ID = %s', (analyst_id,))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM Analyst WHERE analyst_ID = %s', (analyst_id,))
         return make_response(jsonify({'message': 'Analyst deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting analyst {analyst_id}: {e}')
@@ -1,19 +1,24 @@
 from flask import Blueprint, request, jsonify, make_response, current_app
 from backend.db_connection import db
+from backend.db_connection.pagination import Page
+from backend.db_connection.versions import table_versions
+from backend.analytics import equipment_summary
+from backend.db_connection.streaming import wants_ndjson, ndjson_response
 
 desk_bp = Blueprint('desk_bp', __name__)
 
 
 @desk_bp.route('/desk_attendants', methods=['GET'])
+@table_versions.etag('Desk_Attendant')
 def list_desk_attendants():
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            SELECT emp_ID, name, email, assigned_Area, shift, assignedUser_ID, analyst_ID
-            FROM Desk_Attendant
-            ORDER BY emp_ID
-        ''')
-        rows = cursor.fetchall()
+        with db.cursor() as cursor:
+            cursor.execute('''
+                SELECT emp_ID, name, email, assigned_Area, shift, assignedUser_ID, analyst_ID
+                FROM Desk_Attendant
+                ORDER BY emp_ID
+            ''')
+            rows = cursor.fetchall()
         return make_response(jsonify(rows), 200)
     except Exception as e:
         current_app.logger.error(f'Error listing desk attendants: {e}')
@@ -21,11 +26,12 @@ def list_desk_attendants():
 
 
 @desk_bp.route('/desk_attendants/<int:emp_id>', methods=['GET'])
+@table_versions.etag('Desk_Attendant')
 def get_desk_attendant(emp_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT emp_ID, name, email, assigned_Area, shift, assignedUser_ID, analyst_ID FROM Desk_Attendant WHERE emp_ID = %s', (emp_id,))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT emp_ID, name, email, assigned_Area, shift, assignedUser_ID, analyst_ID FROM Desk_Attendant WHERE emp_ID = %s', (emp_id,))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'Desk attendant not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -35,6 +41,7 @@ def get_desk_attendant(emp_id):
 
 
 @desk_bp.route('/desk_attendants', methods=['POST'])
+@table_versions.bumps('Desk_Attendant')
 def create_desk_attendant():
     try:
         payload = request.json or {}
@@ -49,12 +56,11 @@ def create_desk_attendant():
         if not (name and email and analyst_ID):
             return make_response(jsonify({'error': 'name, email and analyst_ID required'}), 400)
 
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            INSERT INTO Desk_Attendant (name, email, assigned_Area, shift, assignedUser_ID, analyst_ID)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        ''', (name, email, assigned_Area, shift, assignedUser_ID, analyst_ID))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO Desk_Attendant (name, email, assigned_Area, shift, assignedUser_ID, analyst_ID)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            ''', (name, email, assigned_Area, shift, assignedUser_ID, analyst_ID))
         return make_response(jsonify({'message': 'Desk attendant created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating desk attendant: {e}')
@@ -62,6 +68,7 @@ def create_desk_attendant():
 
 
 @desk_bp.route('/desk_attendants/<int:emp_id>', methods=['PUT'])
+@table_versions.bumps('Desk_Attendant')
 def replace_desk_attendant(emp_id):
     try:
         payload = request.json or {}
@@ -72,12 +79,11 @@ def replace_desk_attendant(emp_id):
         assignedUser_ID = payload.get('assignedUser_ID')
         analyst_ID = payload.get('analyst_ID')
 
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            UPDATE Desk_Attendant SET name=%s, email=%s, assigned_Area=%s, shift=%s, assignedUser_ID=%s, analyst_ID=%s
-            WHERE emp_ID=%s
-        ''', (name, email, assigned_Area, shift, assignedUser_ID, analyst_ID, emp_id))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('''
+                UPDATE Desk_Attendant SET name=%s, email=%s, assigned_Area=%s, shift=%s, assignedUser_ID=%s, analyst_ID=%s
+                WHERE emp_ID=%s
+            ''', (name, email, assigned_Area, shift, assignedUser_ID, analyst_ID, emp_id))
         return make_response(jsonify({'message': 'Desk attendant updated'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error updating desk attendant {emp_id}: {e}')
@@ -85,6 +91,7 @@ def replace_desk_attendant(emp_id):
 
 
 @desk_bp.route('/desk_attendants/<int:emp_id>', methods=['PATCH'])
+@table_versions.bumps('Desk_Attendant')
 def patch_desk_attendant(emp_id):
     try:
         payload = request.json or {}
@@ -99,9 +106,8 @@ def patch_desk_attendant(emp_id):
             return make_response(jsonify({'error': 'no valid fields provided'}), 400)
         vals.append(emp_id)
         query = f"UPDATE Desk_Attendant SET {', '.join(cols)} WHERE emp_ID = %s"
-        cursor = db.get_db().cursor()
-        cursor.execute(query, tuple(vals))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute(query, tuple(vals))
         return make_response(jsonify({'message': 'Desk attendant modified'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error patching desk attendant {emp_id}: {e}')
@@ -109,11 +115,11 @@ def patch_desk_attendant(emp_id):
 
 
 @desk_bp.route('/desk_attendants/<int:emp_id>', methods=['DELETE'])
+@table_versions.bumps('Desk_Attendant')
 def delete_desk_attendant(emp_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM Desk_Attendant WHERE emp_ID = %s', (emp_id,))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM Desk_Attendant WHERE emp_ID = %s', (emp_id,))
         return make_response(jsonify({'message': 'Desk attendant deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting desk attendant {emp_id}: {e}')
@@ -126,23 +132,25 @@ Desk attendant endpoints implemented above.
 
 # ---------------------- Policy endpoints ----------------------
 @desk_bp.route('/policies', methods=['GET'])
+@table_versions.etag('Policy')
 def list_policies():
+    page = Page.from_request('policy_ID')
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT policy_ID, title, description FROM Policy ORDER BY policy_ID')
-        rows = cursor.fetchall()
-        return make_response(jsonify(rows), 200)
+        with db.cursor() as cursor:
+            rows = page.fetch(cursor, 'SELECT policy_ID, title, description FROM Policy')
+        return page.response(rows)
     except Exception as e:
         current_app.logger.error(f'Error listing policies: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @desk_bp.route('/policies/<int:policy_id>', methods=['GET'])
+@table_versions.etag('Policy')
 def get_policy(policy_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT policy_ID, title, description FROM Policy WHERE policy_ID=%s', (policy_id,))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT policy_ID, title, description FROM Policy WHERE policy_ID=%s', (policy_id,))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'Policy not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -152,6 +160,7 @@ def get_policy(policy_id):
 
 
 @desk_bp.route('/policies', methods=['POST'])
+@table_versions.bumps('Policy')
 def create_policy():
     try:
         p = request.json or {}
@@ -159,9 +168,8 @@ def create_policy():
         description = p.get('description')
         if not (title and description):
             return make_response(jsonify({'error': 'title and description required'}), 400)
-        cursor = db.get_db().cursor()
-        cursor.execute('INSERT INTO Policy (title, description) VALUES (%s, %s)', (title, description))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('INSERT INTO Policy (title, description) VALUES (%s, %s)', (title, description))
         return make_response(jsonify({'message': 'Policy created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating policy: {e}')
@@ -169,14 +177,14 @@ def create_policy():
 
 
 @desk_bp.route('/policies/<int:policy_id>', methods=['PUT'])
+@table_versions.bumps('Policy')
 def replace_policy(policy_id):
     try:
         p = request.json or {}
         title = p.get('title')
         description = p.get('description')
-        cursor = db.get_db().cursor()
-        cursor.execute('UPDATE Policy SET title=%s, description=%s WHERE policy_ID=%s', (title, description, policy_id))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('UPDATE Policy SET title=%s, description=%s WHERE policy_ID=%s', (title, description, policy_id))
         return make_response(jsonify({'message': 'Policy updated'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error updating policy: {e}')
@@ -184,6 +192,7 @@ def replace_policy(policy_id):
 
 
 @desk_bp.route('/policies/<int:policy_id>', methods=['PATCH'])
+@table_versions.bumps('Policy')
 def patch_policy(policy_id):
     try:
         p = request.json or {}
@@ -198,9 +207,8 @@ def patch_policy(policy_id):
             return make_response(jsonify({'error': 'no valid fields'}), 400)
         vals.append(policy_id)
         query = f"UPDATE Policy SET {', '.join(cols)} WHERE policy_ID=%s"
-        cursor = db.get_db().cursor()
-        cursor.execute(query, tuple(vals))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute(query, tuple(vals))
         return make_response(jsonify({'message': 'Policy patched'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error patching policy: {e}')
@@ -208,11 +216,11 @@ def patch_policy(policy_id):
 
 
 @desk_bp.route('/policies/<int:policy_id>', methods=['DELETE'])
+@table_versions.bumps('Policy')
 def delete_policy(policy_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM Policy WHERE policy_ID=%s', (policy_id,))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM Policy WHERE policy_ID=%s', (policy_id,))
         return make_response(jsonify({'message': 'Policy deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting policy: {e}')
@@ -221,23 +229,28 @@ def delete_policy(policy_id):
 
 # ---------------------- Video Footage endpoints ----------------------
 @desk_bp.route('/video_footage', methods=['GET'])
+@table_versions.etag('Video_Footage')
 def list_footage():
+    # ?stream=ndjson exports every footage record without materializing the table
+    if wants_ndjson():
+        return ndjson_response('SELECT footage_ID, camera_ID, timestamp FROM Video_Footage ORDER BY footage_ID')
+    page = Page.from_request('footage_ID')
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT footage_ID, camera_ID, timestamp FROM Video_Footage ORDER BY footage_ID')
-        rows = cursor.fetchall()
-        return make_response(jsonify(rows), 200)
+        with db.cursor() as cursor:
+            rows = page.fetch(cursor, 'SELECT footage_ID, camera_ID, timestamp FROM Video_Footage')
+        return page.response(rows)
     except Exception as e:
         current_app.logger.error(f'Error listing footage: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @desk_bp.route('/video_footage/<int:footage_id>', methods=['GET'])
+@table_versions.etag('Video_Footage')
 def get_footage(footage_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT footage_ID, camera_ID, timestamp FROM Video_Footage WHERE footage_ID=%s', (footage_id,))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT footage_ID, camera_ID, timestamp FROM Video_Footage WHERE footage_ID=%s', (footage_id,))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'Footage not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -247,6 +260,7 @@ def get_footage(footage_id):
 
 
 @desk_bp.route('/video_footage', methods=['POST'])
+@table_versions.bumps('Video_Footage')
 def create_footage():
     try:
         p = request.json or {}
@@ -254,9 +268,8 @@ def create_footage():
         timestamp = p.get('timestamp')
         if not camera_ID:
             return make_response(jsonify({'error': 'camera_ID required'}), 400)
-        cursor = db.get_db().cursor()
-        cursor.execute('INSERT INTO Video_Footage (camera_ID, timestamp) VALUES (%s, %s)', (camera_ID, timestamp))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('INSERT INTO Video_Footage (camera_ID, timestamp) VALUES (%s, %s)', (camera_ID, timestamp))
         return make_response(jsonify({'message': 'Footage record created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating footage: {e}')
@@ -264,11 +277,11 @@ def create_footage():
 
 
 @desk_bp.route('/video_footage/<int:footage_id>', methods=['DELETE'])
+@table_versions.bumps('Video_Footage')
 def delete_footage(footage_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM Video_Footage WHERE footage_ID=%s', (footage_id,))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM Video_Footage WHERE footage_ID=%s', (footage_id,))
         return make_response(jsonify({'message': 'Footage deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting footage: {e}')
@@ -277,23 +290,25 @@ def delete_footage(footage_id):
 
 # ---------------------- Equipment Maintenance endpoints ----------------------
 @desk_bp.route('/equipment', methods=['GET'])
+@table_versions.etag('Equipment_Maintenance')
 def list_equipment():
+    page = Page.from_request('equip_ID')
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT equip_ID, `condition`, requestForm FROM Equipment_Maintenance ORDER BY equip_ID')
-        rows = cursor.fetchall()
-        return make_response(jsonify(rows), 200)
+        with db.cursor() as cursor:
+            rows = page.fetch(cursor, 'SELECT equip_ID, `condition`, requestForm FROM Equipment_Maintenance')
+        return page.response(rows)
     except Exception as e:
         current_app.logger.error(f'Error listing equipment: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @desk_bp.route('/equipment/<int:equip_id>', methods=['GET'])
+@table_versions.etag('Equipment_Maintenance')
 def get_equipment(equip_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT equip_ID, `condition`, requestForm FROM Equipment_Maintenance WHERE equip_ID=%s', (equip_id,))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT equip_ID, `condition`, requestForm FROM Equipment_Maintenance WHERE equip_ID=%s', (equip_id,))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'Equipment not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -303,14 +318,16 @@ def get_equipment(equip_id):
 
 
 @desk_bp.route('/equipment', methods=['POST'])
+@table_versions.bumps('Equipment_Maintenance')
 def create_equipment():
     try:
         p = request.json or {}
         condition = p.get('condition')
         requestForm = p.get('requestForm')
-        cursor = db.get_db().cursor()
-        cursor.execute('INSERT INTO Equipment_Maintenance (`condition`, requestForm) VALUES (%s, %s)', (condition, requestForm))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('INSERT INTO Equipment_Maintenance (`condition`, requestForm) VALUES (%s, %s)', (condition, requestForm))
+            # keep the per-location availability summary in step (same transaction)
+            equipment_summary.apply_delta(cursor, None, equipment_summary.read_row(cursor, cursor.lastrowid))
         return make_response(jsonify({'message': 'Equipment record created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating equipment: {e}')
@@ -318,14 +335,17 @@ def create_equipment():
 
 
 @desk_bp.route('/equipment/<int:equip_id>', methods=['PUT'])
+@table_versions.bumps('Equipment_Maintenance')
 def replace_equipment(equip_id):
     try:
         p = request.json or {}
         condition = p.get('condition')
         requestForm = p.get('requestForm')
-        cursor = db.get_db().cursor()
-        cursor.execute('UPDATE Equipment_Maintenance SET `condition`=%s, requestForm=%s WHERE equip_ID=%s', (condition, requestForm, equip_id))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            before = equipment_summary.lock_row(cursor, equip_id)
+            cursor.execute('UPDATE Equipment_Maintenance SET `condition`=%s, requestForm=%s WHERE equip_ID=%s', (condition, requestForm, equip_id))
+            if before:
+                equipment_summary.apply_delta(cursor, before, equipment_summary.read_row(cursor, equip_id))
         return make_response(jsonify({'message': 'Equipment updated'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error updating equipment: {e}')
@@ -333,6 +353,7 @@ def replace_equipment(equip_id):
 
 
 @desk_bp.route('/equipment/<int:equip_id>', methods=['PATCH'])
+@table_versions.bumps('Equipment_Maintenance')
 def patch_equipment(equip_id):
     try:
         p = request.json or {}
@@ -347,9 +368,11 @@ def patch_equipment(equip_id):
             return make_response(jsonify({'error': 'no valid fields'}), 400)
         vals.append(equip_id)
         query = f"UPDATE Equipment_Maintenance SET {', '.join(cols)} WHERE equip_ID=%s"
-        cursor = db.get_db().cursor()
-        cursor.execute(query, tuple(vals))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            before = equipment_summary.lock_row(cursor, equip_id)
+            cursor.execute(query, tuple(vals))
+            if before:
+                equipment_summary.apply_delta(cursor, before, equipment_summary.read_row(cursor, equip_id))
         return make_response(jsonify({'message': 'Equipment patched'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error patching equipment: {e}')
@@ -1,19 +1,24 @@
 from flask import Blueprint, request, jsonify, make_response, current_app
 from backend.db_connection import db
+from backend.db_connection.pagination import Page
+from backend.db_connection.versions import table_versions
+from backend.ml_models.recommender import ModelUnavailable, service as recommendations
+from backend.ml_models.registry import UnknownVersion
 
 sysadmin_bp = Blueprint('sysadmin_bp', __name__)
 
 
 @sysadmin_bp.route('/system_admins', methods=['GET'])
+@table_versions.etag('System_Admin')
 def list_system_admins():
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            SELECT admin_ID, name, role, contact_email, phone
-            FROM System_Admin
-            ORDER BY admin_ID
-        ''')
-        rows = cursor.fetchall()
+        with db.cursor() as cursor:
+            cursor.execute('''
+                SELECT admin_ID, name, role, contact_email, phone
+                FROM System_Admin
+                ORDER BY admin_ID
+            ''')
+            rows = cursor.fetchall()
         return make_response(jsonify(rows), 200)
     except Exception as e:
         current_app.logger.error(f'Error listing system admins: {e}')
@@ -21,11 +26,12 @@ def list_system_admins():
 
 
 @sysadmin_bp.route('/system_admins/<int:admin_id>', methods=['GET'])
+@table_versions.etag('System_Admin')
 def get_system_admin(admin_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT admin_ID, name, role, contact_email, phone FROM System_Admin WHERE admin_ID = %s', (admin_id,))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT admin_ID, name, role, contact_email, phone FROM System_Admin WHERE admin_ID = %s', (admin_id,))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'System admin not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -35,23 +41,25 @@ def get_system_admin(admin_id):
 
 # ---------------------- System endpoints ----------------------
 @sysadmin_bp.route('/systems', methods=['GET'])
+@table_versions.etag('System')
 def list_systems():
+    page = Page.from_request('system_ID')
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT system_ID, logs, updates, alerts FROM `System` ORDER BY system_ID')
-        rows = cursor.fetchall()
-        return make_response(jsonify(rows), 200)
+        with db.cursor() as cursor:
+            rows = page.fetch(cursor, 'SELECT system_ID, logs, updates, alerts FROM `System`')
+        return page.response(rows)
     except Exception as e:
         current_app.logger.error(f'Error listing systems: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @sysadmin_bp.route('/systems/<int:system_id>', methods=['GET'])
+@table_versions.etag('System')
 def get_system(system_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT system_ID, logs, updates, alerts FROM `System` WHERE system_ID = %s', (system_id,))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT system_ID, logs, updates, alerts FROM `System` WHERE system_ID = %s', (system_id,))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'System not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -61,15 +69,15 @@ def get_system(system_id):
 
 
 @sysadmin_bp.route('/systems', methods=['POST'])
+@table_versions.bumps('System')
 def create_system():
     try:
         payload = request.json or {}
         logs = payload.get('logs')
         updates = payload.get('updates')
         alerts = payload.get('alerts')
-        cursor = db.get_db().cursor()
-        cursor.execute('INSERT INTO `System` (logs, updates, alerts) VALUES (%s, %s, %s)', (logs, updates, alerts))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('INSERT INTO `System` (logs, updates, alerts) VALUES (%s, %s, %s)', (logs, updates, alerts))
         return make_response(jsonify({'message': 'System record created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating system: {e}')
@@ -77,15 +85,15 @@ def create_system():
 
 
 @sysadmin_bp.route('/systems/<int:system_id>', methods=['PUT'])
+@table_versions.bumps('System')
 def replace_system(system_id):
     try:
         payload = request.json or {}
         logs = payload.get('logs')
         updates = payload.get('updates')
         alerts = payload.get('alerts')
-        cursor = db.get_db().cursor()
-        cursor.execute('UPDATE `System` SET logs=%s, updates=%s, alerts=%s WHERE system_ID = %s', (logs, updates, alerts, system_id))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('UPDATE `System` SET logs=%s, updates=%s, alerts=%s WHERE system_ID = %s', (logs, updates, alerts, system_id))
         return make_response(jsonify({'message': 'System updated'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error updating system {system_id}: {e}')
@@ -93,6 +101,7 @@ def replace_system(system_id):
 
 
 @sysadmin_bp.route('/systems/<int:system_id>', methods=['PATCH'])
+@table_versions.bumps('System')
 def patch_system(system_id):
     try:
         payload = request.json or {}
@@ -107,9 +116,8 @@ def patch_system(system_id):
             return make_response(jsonify({'error': 'no valid fields provided'}), 400)
         vals.append(system_id)
         query = f"UPDATE `System` SET {', '.join(cols)} WHERE system_ID = %s"
-        cursor = db.get_db().cursor()
-        cursor.execute(query, tuple(vals))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute(query, tuple(vals))
         return make_response(jsonify({'message': 'System patched'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error patching system {system_id}: {e}')
@@ -117,21 +125,61 @@ def patch_system(system_id):
 
 
 @sysadmin_bp.route('/systems/<int:system_id>', methods=['DELETE'])
+@table_versions.bumps('System')
 def delete_system(system_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM `System` WHERE system_ID = %s', (system_id,))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM `System` WHERE system_ID = %s', (system_id,))
         return make_response(jsonify({'message': 'System deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting system {system_id}: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
+# ---------------------- Database connection stats ----------------------
+@sysadmin_bp.route('/system/db', methods=['GET'])
+def get_db_stats():
+    """Connection pool usage and prepared-statement cache hit rate of this worker."""
+    if db.pool is None:
+        return make_response(jsonify({'error': 'database is not initialized'}), 503)
+    statements = db.statement_stats.snapshot()
+    statements['cache_size'] = db.statement_cache_size
+    return make_response(jsonify({'pool': db.pool.stats(), 'statements': statements}), 200)
+
+# ---------------------- Recommendation model versions ----------------------
+@sysadmin_bp.route('/system/models', methods=['GET'])
+def list_model_versions():
+    try:
+        return make_response(jsonify(recommendations.versions()), 200)
+    except Exception as e:
+        current_app.logger.error(f'Error listing model versions: {e}')
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+@sysadmin_bp.route('/system/models/active', methods=['PUT'])
+def activate_model_version():
+    """Switch POST /recommendations to another registry version; other workers follow within RECOMMENDER_CHECK_INTERVAL."""
+    payload = request.get_json(silent=True) or {}
+    version = payload.get('version')
+    if not isinstance(version, str) or not version:
+        return make_response(jsonify({'error': "expected {'version': 'v<N>'}"}), 400)
+    try:
+        recommender = recommendations.activate(version)
+        current_app.logger.info(f'recommendation model {version} activated')
+        return make_response(jsonify(recommender.info()), 200)
+    except UnknownVersion as e:
+        return make_response(jsonify({'error': str(e)}), 404)
+    except ModelUnavailable as e:
+        return make_response(jsonify({'error': str(e)}), 409)
+    except Exception as e:
+        current_app.logger.error(f'Error activating model version {version}: {e}')
+        return make_response(jsonify({'error': str(e)}), 500)
+
 
 """
 Commented placeholder routes for System Admin endpoints.
 """
 @sysadmin_bp.route('/system_admins', methods=['POST'])
+@table_versions.bumps('System_Admin')
 def create_system_admin():
     try:
         payload = request.json or {}
@@ -143,12 +191,11 @@ def create_system_admin():
         if not (name and contact_email):
             return make_response(jsonify({'error': 'name and contact_email required'}), 400)
 
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            INSERT INTO System_Admin (name, role, contact_email, phone)
-            VALUES (%s, %s, %s, %s)
-        ''', (name, role, contact_email, phone))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO System_Admin (name, role, contact_email, phone)
+                VALUES (%s, %s, %s, %s)
+            ''', (name, role, contact_email, phone))
         return make_response(jsonify({'message': 'System admin created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating system admin: {e}')
@@ -156,6 +203,7 @@ def create_system_admin():
 
 
 @sysadmin_bp.route('/system_admins/<int:admin_id>', methods=['PUT'])
+@table_versions.bumps('System_Admin')
 def replace_system_admin(admin_id):
     try:
         payload = request.json or {}
@@ -164,12 +212,11 @@ def replace_system_admin(admin_id):
         contact_email = payload.get('contact_email')
         phone = payload.get('phone')
 
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            UPDATE System_Admin SET name=%s, role=%s, contact_email=%s, phone=%s
-            WHERE admin_ID=%s
-        ''', (name, role, contact_email, phone, admin_id))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('''
+                UPDATE System_Admin SET name=%s, role=%s, contact_email=%s, phone=%s
+                WHERE admin_ID=%s
+            ''', (name, role, contact_email, phone, admin_id))
         return make_response(jsonify({'message': 'System admin updated'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error updating system admin {admin_id}: {e}')
@@ -177,6 +224,7 @@ def replace_system_admin(admin_id):
 
 
 @sysadmin_bp.route('/system_admins/<int:admin_id>', methods=['PATCH'])
+@table_versions.bumps('System_Admin')
 def patch_system_admin(admin_id):
     try:
         payload = request.json or {}
@@ -191,9 +239,8 @@ def patch_system_admin(admin_id):
             return make_response(jsonify({'error': 'no valid fields provided'}), 400)
         vals.append(admin_id)
         query = f"UPDATE System_Admin SET {', '.join(cols)} WHERE admin_ID = %s"
-        cursor = db.get_db().cursor()
-        cursor.execute(query, tuple(vals))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute(query, tuple(vals))
         return make_response(jsonify({'message': 'System admin modified'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error patching system admin {admin_id}: {e}')
@@ -201,11 +248,11 @@ def patch_system_admin(admin_id):
 
 
 @sysadmin_bp.route('/system_admins/<int:admin_id>', methods=['DELETE'])
+@table_versions.bumps('System_Admin')
 def delete_system_admin(admin_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM System_Admin WHERE admin_ID = %s', (admin_id,))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM System_Admin WHERE admin_ID = %s', (admin_id,))
         return make_response(jsonify({'message': 'System admin deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting system admin {admin_id}: {e}')
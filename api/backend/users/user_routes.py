@@ -1,22 +1,66 @@
+from datetime import datetime
+
 from flask import Blueprint, request, jsonify, make_response, current_app
 from backend.db_connection import db
+from backend.db_connection.pagination import Page
+from backend.db_connection.by_ids import ids_from_request, by_ids_response, fetch_by_ids
+from backend.db_connection.expand import Relation, expand_from_request, expand_rows
+from backend.db_connection.versions import table_versions
+from backend.db_connection.streaming import NDJSON_MIMETYPE, wants_ndjson, ndjson_response
+from backend.ingest import workouts as workout_ingest
+from backend.write_behind import WriteBehind
 
 # Blueprint for user endpoints
 users = Blueprint('users', __name__)
 
+# User_Device.transfer is VARCHAR(75)
+TRANSFER_MAX_LENGTH = 75
+
+# Device PATCHes and heartbeats are coalesced and written every few seconds
+device_writes = WriteBehind(db, 'User_Device', 'device_ID', ('transfer', 'last_sync'),
+                            before_commit=lambda cursor: table_versions.bump_with(cursor, 'User_Device'),
+                            after_commit=table_versions.apply)
+
+
+@users.record_once
+def init_device_writes(state):
+    device_writes.init_app(state.app, float(state.app.config.get('DEVICE_WRITE_INTERVAL', device_writes.interval)))
+
+
+# ?expand= relations of a user: one IN query per relation for the whole page
+USER_RELATIONS = {
+    'goals': Relation('SELECT user_ID, goal_name, task, tracking, records, reminders FROM Goal',
+                      'user_ID', order_by='goal_name'),
+    'devices': Relation('SELECT device_ID, user_ID, device_type, device_name, transfer, last_sync, is_active FROM User_Device',
+                        'user_ID', order_by='device_ID'),
+    'memberships': Relation('SELECT membership_ID, user_ID, status, start_date, end_date, billing, plan_type FROM Membership',
+                            'user_ID', order_by='start_date DESC'),
+    # latest reports only
+    'reports': Relation('SELECT report_ID, user_ID, title, work_efficiency, workout_duration, calories_burned, report_date FROM Report',
+                        'user_ID', order_by='report_date DESC, report_ID DESC', per_parent=5),
+}
+
 
 # GET /users - list all users
 @users.route('/users', methods=['GET'])
+@table_versions.etag('User', 'Goal', 'User_Device', 'Membership', 'Report')
 def list_users():
-    try:
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            SELECT user_ID, name, email, address, gym_location
-            FROM User
-            ORDER BY user_ID
-        ''')
-        rows = cursor.fetchall()
-        return make_response(jsonify(rows), 200)
+    ids = ids_from_request()
+    expand = expand_from_request(USER_RELATIONS)
+    select = '''
+        SELECT user_ID, name, email, address, gym_location
+        FROM User
+    '''
+    page = Page.from_request('user_ID')
+    try:
+        with db.cursor() as cursor:
+            if ids:
+                found = fetch_by_ids(cursor, select, 'user_ID', ids)
+                expand_rows(cursor, [row for row in found.values() if row], 'user_ID', USER_RELATIONS, expand)
+                return make_response(jsonify(found), 200)
+            rows = page.fetch(cursor, select)
+            expand_rows(cursor, rows, 'user_ID', USER_RELATIONS, expand)
+        return page.response(rows)
     except Exception as e:
         current_app.logger.error(f'Error listing users: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
@@ -24,13 +68,18 @@ def list_users():
 
 # GET /users/<id> - get detail
 @users.route('/users/<int:user_id>', methods=['GET'])
+@table_versions.etag('User', 'Goal', 'User_Device', 'Membership', 'Report')
 def get_user(user_id):
+    expand = expand_from_request(USER_RELATIONS)
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT user_ID, name, email, address, gym_location FROM User WHERE user_ID = %s', (user_id,))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT user_ID, name, email, address, gym_location FROM User WHERE user_ID = %s', (user_id,))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'User not found'}), 404)
+        if expand:
+            with db.cursor() as cursor:
+                expand_rows(cursor, [row], 'user_ID', USER_RELATIONS, expand)
         return make_response(jsonify(row), 200)
     except Exception as e:
         current_app.logger.error(f'Error fetching user {user_id}: {e}')
@@ -39,6 +88,7 @@ def get_user(user_id):
 
 # POST /users - create user
 @users.route('/users', methods=['POST'])
+@table_versions.bumps('User')
 def create_user():
     try:
         payload = request.json or {}
@@ -51,12 +101,11 @@ def create_user():
         if not (email and passwordHash):
             return make_response(jsonify({'error': 'email and passwordHash required'}), 400)
 
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            INSERT INTO User (name, email, passwordHash, address, gym_location)
-            VALUES (%s, %s, %s, %s, %s)
-        ''', (name, email, passwordHash, address, gym_location))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO User (name, email, passwordHash, address, gym_location)
+                VALUES (%s, %s, %s, %s, %s)
+            ''', (name, email, passwordHash, address, gym_location))
         return make_response(jsonify({'message': 'User created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating user: {e}')
@@ -65,6 +114,7 @@ def create_user():
 
 # PUT /users/<id> - full replace
 @users.route('/users/<int:user_id>', methods=['PUT'])
+@table_versions.bumps('User')
 def replace_user(user_id):
     try:
         payload = request.json or {}
@@ -74,12 +124,11 @@ def replace_user(user_id):
         address = payload.get('address')
         gym_location = payload.get('gym_location')
 
-        cursor = db.get_db().cursor()
-        cursor.execute('''
-            UPDATE User SET name=%s, email=%s, passwordHash=%s, address=%s, gym_location=%s
-            WHERE user_ID=%s
-        ''', (name, email, passwordHash, address, gym_location, user_id))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('''
+                UPDATE User SET name=%s, email=%s, passwordHash=%s, address=%s, gym_location=%s
+                WHERE user_ID=%s
+            ''', (name, email, passwordHash, address, gym_location, user_id))
         return make_response(jsonify({'message': 'User updated'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error replacing user {user_id}: {e}')
@@ -88,6 +137,7 @@ def replace_user(user_id):
 
 # PATCH /users/<id> - partial update
 @users.route('/users/<int:user_id>', methods=['PATCH'])
+@table_versions.bumps('User')
 def modify_user(user_id):
     try:
         payload = request.json or {}
@@ -103,9 +153,8 @@ def modify_user(user_id):
             return make_response(jsonify({'error': 'no valid fields provided'}), 400)
         vals.append(user_id)
         query = f"UPDATE User SET {', '.join(cols)} WHERE user_ID = %s"
-        cursor = db.get_db().cursor()
-        cursor.execute(query, tuple(vals))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute(query, tuple(vals))
         return make_response(jsonify({'message': 'User modified'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error patching user {user_id}: {e}')
@@ -114,11 +163,11 @@ def modify_user(user_id):
 
 # DELETE /users/<id>
 @users.route('/users/<int:user_id>', methods=['DELETE'])
+@table_versions.bumps('User')
 def delete_user(user_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM User WHERE user_ID = %s', (user_id,))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM User WHERE user_ID = %s', (user_id,))
         return make_response(jsonify({'message': 'User deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting user {user_id}: {e}')
@@ -127,23 +176,30 @@ def delete_user(user_id):
 
 # ---------------------- Goals (Goal table) ----------------------
 @users.route('/goals', methods=['GET'])
+@table_versions.etag('Goal')
 def list_goals():
+    # ?ids= are user IDs: returns each user's goals
+    ids = ids_from_request()
+    select = 'SELECT user_ID, goal_name, task, tracking, records, reminders FROM Goal'
+    page = Page.from_request('user_ID', 'goal_name')
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT user_ID, goal_name, task, tracking, records, reminders FROM Goal ORDER BY user_ID')
-        rows = cursor.fetchall()
-        return make_response(jsonify(rows), 200)
+        with db.cursor() as cursor:
+            if ids:
+                return by_ids_response(cursor, select, 'user_ID', ids, many=True)
+            rows = page.fetch(cursor, select)
+        return page.response(rows)
     except Exception as e:
         current_app.logger.error(f'Error listing goals: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @users.route('/goals/<int:user_id>/<goal_name>', methods=['GET'])
+@table_versions.etag('Goal')
 def get_goal(user_id, goal_name):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT user_ID, goal_name, task, tracking, records, reminders FROM Goal WHERE user_ID=%s AND goal_name=%s', (user_id, goal_name))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT user_ID, goal_name, task, tracking, records, reminders FROM Goal WHERE user_ID=%s AND goal_name=%s', (user_id, goal_name))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'Goal not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -153,6 +209,7 @@ def get_goal(user_id, goal_name):
 
 
 @users.route('/goals', methods=['POST'])
+@table_versions.bumps('Goal')
 def create_goal():
     try:
         p = request.json or {}
@@ -164,9 +221,8 @@ def create_goal():
         reminders = p.get('reminders')
         if not (user_ID and goal_name):
             return make_response(jsonify({'error': 'user_ID and goal_name required'}), 400)
-        cursor = db.get_db().cursor()
-        cursor.execute('INSERT INTO Goal (user_ID, goal_name, task, tracking, records, reminders) VALUES (%s,%s,%s,%s,%s,%s)', (user_ID, goal_name, task, tracking, records, reminders))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('INSERT INTO Goal (user_ID, goal_name, task, tracking, records, reminders) VALUES (%s,%s,%s,%s,%s,%s)', (user_ID, goal_name, task, tracking, records, reminders))
         return make_response(jsonify({'message': 'Goal created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating goal: {e}')
@@ -174,6 +230,7 @@ def create_goal():
 
 
 @users.route('/goals/<int:user_id>/<goal_name>', methods=['PUT'])
+@table_versions.bumps('Goal')
 def replace_goal(user_id, goal_name):
     try:
         p = request.json or {}
@@ -181,9 +238,8 @@ def replace_goal(user_id, goal_name):
         tracking = p.get('tracking')
         records = p.get('records')
         reminders = p.get('reminders')
-        cursor = db.get_db().cursor()
-        cursor.execute('UPDATE Goal SET task=%s, tracking=%s, records=%s, reminders=%s WHERE user_ID=%s AND goal_name=%s', (task, tracking, records, reminders, user_id, goal_name))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('UPDATE Goal SET task=%s, tracking=%s, records=%s, reminders=%s WHERE user_ID=%s AND goal_name=%s', (task, tracking, records, reminders, user_id, goal_name))
         return make_response(jsonify({'message': 'Goal replaced'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error replacing goal: {e}')
@@ -191,6 +247,7 @@ def replace_goal(user_id, goal_name):
 
 
 @users.route('/goals/<int:user_id>/<goal_name>', methods=['PATCH'])
+@table_versions.bumps('Goal')
 def patch_goal(user_id, goal_name):
     try:
         p = request.json or {}
@@ -205,9 +262,8 @@ def patch_goal(user_id, goal_name):
             return make_response(jsonify({'error': 'no valid fields'}), 400)
         vals.extend([user_id, goal_name])
         query = f"UPDATE Goal SET {', '.join(cols)} WHERE user_ID=%s AND goal_name=%s"
-        cursor = db.get_db().cursor()
-        cursor.execute(query, tuple(vals))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute(query, tuple(vals))
         return make_response(jsonify({'message': 'Goal patched'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error patching goal: {e}')
@@ -215,11 +271,11 @@ def patch_goal(user_id, goal_name):
 
 
 @users.route('/goals/<int:user_id>/<goal_name>', methods=['DELETE'])
+@table_versions.bumps('Goal')
 def delete_goal(user_id, goal_name):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM Goal WHERE user_ID=%s AND goal_name=%s', (user_id, goal_name))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM Goal WHERE user_ID=%s AND goal_name=%s', (user_id, goal_name))
         return make_response(jsonify({'message': 'Goal deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting goal: {e}')
@@ -228,23 +284,29 @@ def delete_goal(user_id, goal_name):
 
 # ---------------------- Plans (Plan table) ----------------------
 @users.route('/plans', methods=['GET'])
+@table_versions.etag('Plan')
 def list_plans():
+    ids = ids_from_request()
+    select = 'SELECT plan_ID, title, workout_rec, diet FROM Plan'
+    page = Page.from_request('plan_ID')
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT plan_ID, title, workout_rec, diet FROM Plan ORDER BY plan_ID')
-        rows = cursor.fetchall()
-        return make_response(jsonify(rows), 200)
+        with db.cursor() as cursor:
+            if ids:
+                return by_ids_response(cursor, select, 'plan_ID', ids)
+            rows = page.fetch(cursor, select)
+        return page.response(rows)
     except Exception as e:
         current_app.logger.error(f'Error listing plans: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @users.route('/plans/<int:plan_id>', methods=['GET'])
+@table_versions.etag('Plan')
 def get_plan(plan_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT plan_ID, title, workout_rec, diet FROM Plan WHERE plan_ID=%s', (plan_id,))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT plan_ID, title, workout_rec, diet FROM Plan WHERE plan_ID=%s', (plan_id,))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'Plan not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -254,6 +316,7 @@ def get_plan(plan_id):
 
 
 @users.route('/plans', methods=['POST'])
+@table_versions.bumps('Plan')
 def create_plan():
     try:
         p = request.json or {}
@@ -262,9 +325,8 @@ def create_plan():
         diet = p.get('diet')
         if not title:
             return make_response(jsonify({'error': 'title required'}), 400)
-        cursor = db.get_db().cursor()
-        cursor.execute('INSERT INTO Plan (title, workout_rec, diet) VALUES (%s,%s,%s)', (title, workout_rec, diet))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('INSERT INTO Plan (title, workout_rec, diet) VALUES (%s,%s,%s)', (title, workout_rec, diet))
         return make_response(jsonify({'message': 'Plan created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating plan: {e}')
@@ -272,15 +334,15 @@ def create_plan():
 
 
 @users.route('/plans/<int:plan_id>', methods=['PUT'])
+@table_versions.bumps('Plan')
 def replace_plan(plan_id):
     try:
         p = request.json or {}
         title = p.get('title')
         workout_rec = p.get('workout_rec')
         diet = p.get('diet')
-        cursor = db.get_db().cursor()
-        cursor.execute('UPDATE Plan SET title=%s, workout_rec=%s, diet=%s WHERE plan_ID=%s', (title, workout_rec, diet, plan_id))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('UPDATE Plan SET title=%s, workout_rec=%s, diet=%s WHERE plan_ID=%s', (title, workout_rec, diet, plan_id))
         return make_response(jsonify({'message': 'Plan replaced'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error replacing plan: {e}')
@@ -288,6 +350,7 @@ def replace_plan(plan_id):
 
 
 @users.route('/plans/<int:plan_id>', methods=['PATCH'])
+@table_versions.bumps('Plan')
 def patch_plan(plan_id):
     try:
         p = request.json or {}
@@ -302,9 +365,8 @@ def patch_plan(plan_id):
             return make_response(jsonify({'error': 'no valid fields'}), 400)
         vals.append(plan_id)
         query = f"UPDATE Plan SET {', '.join(cols)} WHERE plan_ID=%s"
-        cursor = db.get_db().cursor()
-        cursor.execute(query, tuple(vals))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute(query, tuple(vals))
         return make_response(jsonify({'message': 'Plan patched'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error patching plan: {e}')
@@ -312,11 +374,11 @@ def patch_plan(plan_id):
 
 
 @users.route('/plans/<int:plan_id>', methods=['DELETE'])
+@table_versions.bumps('Plan')
 def delete_plan(plan_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM Plan WHERE plan_ID=%s', (plan_id,))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM Plan WHERE plan_ID=%s', (plan_id,))
         return make_response(jsonify({'message': 'Plan deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting plan: {e}')
@@ -325,23 +387,32 @@ def delete_plan(plan_id):
 
 # ---------------------- Reports (Report table) ----------------------
 @users.route('/reports', methods=['GET'])
+@table_versions.etag('Report')
 def list_reports():
-    try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT report_ID, title, checklist, completed_goals, uncompleted_goals, work_efficiency, time_based_summary FROM Report ORDER BY report_ID')
-        rows = cursor.fetchall()
-        return make_response(jsonify(rows), 200)
+    # ?stream=ndjson exports every report without materializing the table
+    if wants_ndjson():
+        return ndjson_response('SELECT report_ID, title, checklist, completed_goals, uncompleted_goals, work_efficiency, time_based_summary FROM Report ORDER BY report_ID')
+    ids = ids_from_request()
+    select = 'SELECT report_ID, title, checklist, completed_goals, uncompleted_goals, work_efficiency, time_based_summary FROM Report'
+    page = Page.from_request('report_ID')
+    try:
+        with db.cursor() as cursor:
+            if ids:
+                return by_ids_response(cursor, select, 'report_ID', ids)
+            rows = page.fetch(cursor, select)
+        return page.response(rows)
     except Exception as e:
         current_app.logger.error(f'Error listing reports: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @users.route('/reports/<int:report_id>', methods=['GET'])
+@table_versions.etag('Report')
 def get_report(report_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT report_ID, title, checklist, completed_goals, uncompleted_goals, work_efficiency, time_based_summary FROM Report WHERE report_ID=%s', (report_id,))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT report_ID, title, checklist, completed_goals, uncompleted_goals, work_efficiency, time_based_summary FROM Report WHERE report_ID=%s', (report_id,))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'Report not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -351,6 +422,7 @@ def get_report(report_id):
 
 
 @users.route('/reports', methods=['POST'])
+@table_versions.bumps('Report')
 def create_report():
     try:
         p = request.json or {}
@@ -362,9 +434,8 @@ def create_report():
         time_based_summary = p.get('time_based_summary')
         if not time_based_summary:
             return make_response(jsonify({'error': 'time_based_summary required'}), 400)
-        cursor = db.get_db().cursor()
-        cursor.execute('INSERT INTO Report (title, checklist, completed_goals, uncompleted_goals, work_efficiency, time_based_summary) VALUES (%s,%s,%s,%s,%s,%s)', (title, checklist, completed_goals, uncompleted_goals, work_efficiency, time_based_summary))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('INSERT INTO Report (title, checklist, completed_goals, uncompleted_goals, work_efficiency, time_based_summary) VALUES (%s,%s,%s,%s,%s,%s)', (title, checklist, completed_goals, uncompleted_goals, work_efficiency, time_based_summary))
         return make_response(jsonify({'message': 'Report created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating report: {e}')
@@ -372,6 +443,7 @@ def create_report():
 
 
 @users.route('/reports/<int:report_id>', methods=['PUT'])
+@table_versions.bumps('Report')
 def replace_report(report_id):
     try:
         p = request.json or {}
@@ -381,9 +453,8 @@ def replace_report(report_id):
         uncompleted_goals = p.get('uncompleted_goals')
         work_efficiency = p.get('work_efficiency')
         time_based_summary = p.get('time_based_summary')
-        cursor = db.get_db().cursor()
-        cursor.execute('UPDATE Report SET title=%s, checklist=%s, completed_goals=%s, uncompleted_goals=%s, work_efficiency=%s, time_based_summary=%s WHERE report_ID=%s', (title, checklist, completed_goals, uncompleted_goals, work_efficiency, time_based_summary, report_id))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('UPDATE Report SET title=%s, checklist=%s, completed_goals=%s, uncompleted_goals=%s, work_efficiency=%s, time_based_summary=%s WHERE report_ID=%s', (title, checklist, completed_goals, uncompleted_goals, work_efficiency, time_based_summary, report_id))
         return make_response(jsonify({'message': 'Report replaced'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error replacing report: {e}')
@@ -391,6 +462,7 @@ def replace_report(report_id):
 
 
 @users.route('/reports/<int:report_id>', methods=['PATCH'])
+@table_versions.bumps('Report')
 def patch_report(report_id):
     try:
         p = request.json or {}
@@ -405,9 +477,8 @@ def patch_report(report_id):
             return make_response(jsonify({'error': 'no valid fields'}), 400)
         vals.append(report_id)
         query = f"UPDATE Report SET {', '.join(cols)} WHERE report_ID=%s"
-        cursor = db.get_db().cursor()
-        cursor.execute(query, tuple(vals))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute(query, tuple(vals))
         return make_response(jsonify({'message': 'Report patched'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error patching report: {e}')
@@ -415,36 +486,98 @@ def patch_report(report_id):
 
 
 @users.route('/reports/<int:report_id>', methods=['DELETE'])
+@table_versions.bumps('Report')
 def delete_report(report_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM Report WHERE report_ID=%s', (report_id,))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM Report WHERE report_ID=%s', (report_id,))
         return make_response(jsonify({'message': 'Report deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting report: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+# ---------------------- Workouts (Workout_Log table) ----------------------
+@users.route('/workouts', methods=['GET'])
+@table_versions.etag('Workout_Log')
+def list_workouts():
+    # ?stream=ndjson exports the whole workout history for analysts
+    if wants_ndjson():
+        return ndjson_response('SELECT workout_ID, user_ID, workout_date, workout_type, duration_minutes, calories_burned, notes FROM Workout_Log ORDER BY workout_ID')
+    page = Page.from_request('workout_ID')
+    try:
+        with db.cursor() as cursor:
+            rows = page.fetch(cursor, 'SELECT workout_ID, user_ID, workout_date, workout_type, duration_minutes, calories_burned, notes FROM Workout_Log')
+        return page.response(rows)
+    except Exception as e:
+        current_app.logger.error(f'Error listing workouts: {e}')
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+# POST /workouts/bulk - JSON array (or NDJSON) of workouts with their exercises
+@users.route('/workouts/bulk', methods=['POST'])
+@table_versions.bumps('Workout_Log', 'Workout_Exercise')
+def bulk_create_workouts():
+    try:
+        if request.mimetype == NDJSON_MIMETYPE:
+            items = workout_ingest.decode_ndjson(request.get_data(as_text=True))
+        else:
+            items = request.get_json(silent=True)
+            if isinstance(items, dict):
+                items = items.get('workouts')
+        if not isinstance(items, list):
+            return make_response(jsonify({'error': 'expected a JSON array of workouts or NDJSON'}), 400)
+        max_rows = current_app.config.get('BULK_MAX_ROWS', 5000)
+        if len(items) > max_rows:
+            return make_response(jsonify({'error': f'at most {max_rows} workouts per request'}), 413)
+
+        parsed, errors = [], []
+        for index, item in enumerate(items):
+            try:
+                parsed.append((index, *workout_ingest.parse_workout(item)))
+            except ValueError as e:
+                errors.append((index, str(e)))
+
+        ids = {}
+        if parsed:
+            with db.transaction() as cursor:
+                ids, db_errors = workout_ingest.insert_workouts(
+                    cursor, parsed, current_app.config.get('BULK_CHUNK_SIZE', 500))
+            errors.extend(db_errors)
+
+        status = 201 if not errors else 207 if ids else 400
+        return make_response(jsonify({
+            'inserted': len(ids),
+            'failed': len(errors),
+            'workouts': [{'index': i, 'workout_ID': ids[i]} for i in sorted(ids)],
+            'errors': [{'index': i, 'error': error} for i, error in sorted(errors)],
+        }), status)
+    except Exception as e:
+        current_app.logger.error(f'Error bulk inserting workouts: {e}')
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
 # ---------------------- Memberships (User_Membership) ----------------------
 @users.route('/memberships', methods=['GET'])
+@table_versions.etag('User_Membership')
 def list_memberships():
+    page = Page.from_request('user_ID', 'membership_ID')
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT user_ID, membership_ID, active FROM User_Membership ORDER BY user_ID')
-        rows = cursor.fetchall()
-        return make_response(jsonify(rows), 200)
+        with db.cursor() as cursor:
+            rows = page.fetch(cursor, 'SELECT user_ID, membership_ID, active FROM User_Membership')
+        return page.response(rows)
     except Exception as e:
         current_app.logger.error(f'Error listing memberships: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @users.route('/memberships/<int:user_id>/<int:membership_id>', methods=['GET'])
+@table_versions.etag('User_Membership')
 def get_membership(user_id, membership_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT user_ID, membership_ID, active FROM User_Membership WHERE user_ID=%s AND membership_ID=%s', (user_id, membership_id))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT user_ID, membership_ID, active FROM User_Membership WHERE user_ID=%s AND membership_ID=%s', (user_id, membership_id))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'Membership not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -454,6 +587,7 @@ def get_membership(user_id, membership_id):
 
 
 @users.route('/memberships', methods=['POST'])
+@table_versions.bumps('User_Membership')
 def create_membership():
     try:
         p = request.json or {}
@@ -462,9 +596,8 @@ def create_membership():
         active = p.get('active', 1)
         if not (user_ID and membership_ID):
             return make_response(jsonify({'error': 'user_ID and membership_ID required'}), 400)
-        cursor = db.get_db().cursor()
-        cursor.execute('INSERT INTO User_Membership (user_ID, membership_ID, active) VALUES (%s,%s,%s)', (user_ID, membership_ID, active))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('INSERT INTO User_Membership (user_ID, membership_ID, active) VALUES (%s,%s,%s)', (user_ID, membership_ID, active))
         return make_response(jsonify({'message': 'Membership created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating membership: {e}')
@@ -472,13 +605,13 @@ def create_membership():
 
 
 @users.route('/memberships/<int:user_id>/<int:membership_id>', methods=['PUT'])
+@table_versions.bumps('User_Membership')
 def replace_membership(user_id, membership_id):
     try:
         p = request.json or {}
         active = p.get('active', 1)
-        cursor = db.get_db().cursor()
-        cursor.execute('UPDATE User_Membership SET active=%s WHERE user_ID=%s AND membership_ID=%s', (active, user_id, membership_id))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('UPDATE User_Membership SET active=%s WHERE user_ID=%s AND membership_ID=%s', (active, user_id, membership_id))
         return make_response(jsonify({'message': 'Membership updated'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error updating membership: {e}')
@@ -486,11 +619,11 @@ def replace_membership(user_id, membership_id):
 
 
 @users.route('/memberships/<int:user_id>/<int:membership_id>', methods=['DELETE'])
+@table_versions.bumps('User_Membership')
 def delete_membership(user_id, membership_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM User_Membership WHERE user_ID=%s AND membership_ID=%s', (user_id, membership_id))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM User_Membership WHERE user_ID=%s AND membership_ID=%s', (user_id, membership_id))
         return make_response(jsonify({'message': 'Membership deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting membership: {e}')
@@ -499,23 +632,29 @@ def delete_membership(user_id, membership_id):
 
 # ---------------------- User_Device endpoints ----------------------
 @users.route('/devices', methods=['GET'])
+@table_versions.etag('User_Device')
 def list_devices():
+    ids = ids_from_request()
+    select = 'SELECT device_ID, transfer FROM User_Device'
+    page = Page.from_request('device_ID')
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT device_ID, transfer FROM User_Device ORDER BY device_ID')
-        rows = cursor.fetchall()
-        return make_response(jsonify(rows), 200)
+        with db.cursor() as cursor:
+            if ids:
+                return by_ids_response(cursor, select, 'device_ID', ids)
+            rows = page.fetch(cursor, select)
+        return page.response(rows)
     except Exception as e:
         current_app.logger.error(f'Error listing devices: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @users.route('/devices/<int:device_id>', methods=['GET'])
+@table_versions.etag('User_Device')
 def get_device(device_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('SELECT device_ID, transfer FROM User_Device WHERE device_ID=%s', (device_id,))
-        row = cursor.fetchone()
+        with db.cursor(prepared=True) as cursor:
+            cursor.execute('SELECT device_ID, transfer FROM User_Device WHERE device_ID=%s', (device_id,))
+            row = cursor.fetchone()
         if not row:
             return make_response(jsonify({'error': 'Device not found'}), 404)
         return make_response(jsonify(row), 200)
@@ -525,13 +664,13 @@ def get_device(device_id):
 
 
 @users.route('/devices', methods=['POST'])
+@table_versions.bumps('User_Device')
 def create_device():
     try:
         p = request.json or {}
         transfer = p.get('transfer')
-        cursor = db.get_db().cursor()
-        cursor.execute('INSERT INTO User_Device (transfer) VALUES (%s)', (transfer,))
-        db.get_db().commit()
+        with db.transaction() as cursor:
+            cursor.execute('INSERT INTO User_Device (transfer) VALUES (%s)', (transfer,))
         return make_response(jsonify({'message': 'Device created'}), 201)
     except Exception as e:
         current_app.logger.error(f'Error creating device: {e}')
@@ -539,50 +678,76 @@ def create_device():
 
 
 @users.route('/devices/<int:device_id>', methods=['PUT'])
+@table_versions.bumps('User_Device')
 def replace_device(device_id):
     try:
         p = request.json or {}
         transfer = p.get('transfer')
-        cursor = db.get_db().cursor()
-        cursor.execute('UPDATE User_Device SET transfer=%s WHERE device_ID=%s', (transfer, device_id))
-        db.get_db().commit()
+        device_writes.discard(device_id)
+        with db.transaction() as cursor:
+            cursor.execute('UPDATE User_Device SET transfer=%s WHERE device_ID=%s', (transfer, device_id))
         return make_response(jsonify({'message': 'Device updated'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error updating device: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+def device_exists(device_id):
+    with db.cursor(prepared=True) as cursor:
+        cursor.execute('SELECT 1 FROM User_Device WHERE device_ID=%s', (device_id,))
+        return cursor.fetchone() is not None
+
+
+# PATCH /devices/<id> - queued for the write-behind buffer; GETs (and their ETag)
+# show the new value once the flush has committed it and bumped the table version
 @users.route('/devices/<int:device_id>', methods=['PATCH'])
 def patch_device(device_id):
     try:
         p = request.json or {}
-        cols = []
-        vals = []
         allowed = ['transfer']
-        for k in allowed:
-            if k in p:
-                cols.append(f"{k}=%s")
-                vals.append(p[k])
-        if not cols:
+        values = {k: p[k] for k in allowed if k in p}
+        if not values:
             return make_response(jsonify({'error': 'no valid fields'}), 400)
-        vals.append(device_id)
-        query = f"UPDATE User_Device SET {', '.join(cols)} WHERE device_ID=%s"
-        cursor = db.get_db().cursor()
-        cursor.execute(query, tuple(vals))
-        db.get_db().commit()
-        return make_response(jsonify({'message': 'Device patched'}), 200)
+        # validated here: a value the flush cannot write would only fail later, after the 202
+        transfer = values['transfer']
+        if transfer is not None and (not isinstance(transfer, str) or len(transfer) > TRANSFER_MAX_LENGTH):
+            return make_response(jsonify({'error': f"'transfer' must be a string of at most {TRANSFER_MAX_LENGTH} characters or null"}), 400)
+        if not device_exists(device_id):
+            return make_response(jsonify({'error': 'Device not found'}), 404)
+        device_writes.update(device_id, **values)
+        return make_response(jsonify({'message': 'Device patch queued'}), 202)
     except Exception as e:
         current_app.logger.error(f'Error patching device: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @users.route('/devices/<int:device_id>', methods=['DELETE'])
+@table_versions.bumps('User_Device')
 def delete_device(device_id):
     try:
-        cursor = db.get_db().cursor()
-        cursor.execute('DELETE FROM User_Device WHERE device_ID=%s', (device_id,))
-        db.get_db().commit()
+        device_writes.discard(device_id)
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM User_Device WHERE device_ID=%s', (device_id,))
         return make_response(jsonify({'message': 'Device deleted'}), 200)
     except Exception as e:
         current_app.logger.error(f'Error deleting device: {e}')
         return make_response(jsonify({'error': str(e)}), 500)
+
+
+# POST /devices/<id>/heartbeat - device sync heartbeat (updates last_sync)
+@users.route('/devices/<int:device_id>/heartbeat', methods=['POST'])
+def device_heartbeat(device_id):
+    try:
+        if not device_exists(device_id):
+            return make_response(jsonify({'error': 'Device not found'}), 404)
+        device_writes.update(device_id, last_sync=datetime.now())
+        return make_response(jsonify({'message': 'Heartbeat recorded'}), 202)
+    except Exception as e:
+        current_app.logger.error(f'Error recording heartbeat: {e}')
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+# GET /devices/write-behind - coalescing buffer statistics
+@users.route('/devices/write-behind', methods=['GET'])
+def device_write_stats():
+    return make_response(jsonify(device_writes.stats()), 200)
@@ -0,0 +1,272 @@
+#------------------------------------------------------------
+# Write-behind buffer for hot single-row updates.
+#
+# Devices PATCH their row and send sync heartbeats many times
+# a minute; each used to be its own one-row UPDATE + COMMIT.
+# Instead, handlers record the new column values in memory
+# (last value per row and column wins) and a background thread
+# writes everything pending every `interval` seconds as one
+# UPDATE ... SET col = CASE key WHEN .. THEN .. END per column
+# set. Rows are therefore at most ~`interval` seconds stale.
+#
+#   device_writes.update(device_id, transfer="bluetooth")
+#   device_writes.discard(device_id)   # before a PUT/DELETE
+#
+# Reads see the committed row only: a queued value shows up (and
+# the table version is bumped) once its flush has committed.
+#
+# The flusher thread starts with the first update(), so CLI
+# commands never run one. Pending writes are flushed at
+# interpreter exit and on SIGTERM/SIGINT (which otherwise end
+# the process without running atexit hooks). If a flush
+# fails because the database is unreachable, the batch is merged
+# back (newer values win) and retried next interval. If the
+# database rejects the batch itself, the rows are retried one at
+# a time and the ones it still rejects are logged and dropped,
+# so one bad value cannot block every other row.
+#------------------------------------------------------------
+import atexit
+import functools
+import logging
+import signal
+import threading
+import time
+
+from mysql.connector import errors as mysql_errors
+
+from backend.db_connection.pool import PoolTimeout
+
+# failures of the connection rather than of the rows being written
+TRANSIENT_ERRORS = (PoolTimeout, mysql_errors.OperationalError, mysql_errors.InterfaceError)
+
+
+class WriteBehind:
+    """
+    Coalescing buffer of UPDATEs to `table`, keyed by its primary key.
+
+    `columns` is the whitelist of columns that may be written.
+    `before_commit(cursor)` runs inside every flush transaction just before
+    COMMIT (e.g. to bump table versions with the write), and
+    `after_commit(result)` gets its return value once the COMMIT succeeded.
+    """
+
+    def __init__(self, db, table, key, columns, interval=2.0, max_pending=10000,
+                 before_commit=None, after_commit=None):
+        self.db = db
+        self.table = table
+        self.key = key
+        self.columns = tuple(columns)
+        self.interval = interval
+        self.max_pending = max_pending
+        self.before_commit = before_commit
+        self.after_commit = after_commit
+        # re-entrant: the signal handler flushes on the main thread, which may hold them
+        self._lock = threading.RLock()
+        self._flush_lock = threading.RLock()
+        self._pending = {}
+        self._wake = threading.Event()
+        self._thread = None
+        self.updates = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.statements = 0
+        self.errors = 0
+        self.dropped = 0
+        self.last_flush_ms = None
+        self.logger = logging.getLogger(__name__)
+
+    def update(self, key, **values):
+        """Queue `values` for the row `key`; later values replace earlier ones."""
+        unknown = set(values) - set(self.columns)
+        if unknown:
+            raise ValueError(f"not write-behind columns of {self.table}: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self.updates += 1
+            row = self._pending.get(key)
+            if row is None:
+                row = self._pending[key] = {}
+            else:
+                self.coalesced += 1
+            row.update(values)
+            full = len(self._pending) >= self.max_pending
+        if self._thread is None:
+            self._start()
+        if full:
+            self._wake.set()
+
+    def discard(self, key):
+        """
+        Drop queued values for `key` (the caller is about to overwrite or
+        delete the row). Waits for an in-flight flush, so that flush cannot
+        land after the caller's own write.
+        """
+        with self._flush_lock, self._lock:
+            self._pending.pop(key, None)
+
+    def _statements(self, batch):
+        """One UPDATE per distinct set of columns in `batch`."""
+        groups = {}
+        for key, values in batch.items():
+            groups.setdefault(tuple(sorted(values)), []).append(key)
+        for columns, keys in groups.items():
+            params = []
+            assignments = []
+            for column in columns:
+                assignments.append(f"{column} = CASE {self.key} "
+                                   + " ".join(["WHEN %s THEN %s"] * len(keys)) + " END")
+                for key in keys:
+                    params.extend((key, batch[key][column]))
+            params.extend(keys)
+            yield (f"UPDATE {self.table} SET {', '.join(assignments)} "
+                   f"WHERE {self.key} IN ({', '.join(['%s'] * len(keys))})", tuple(params))
+
+    def _commit(self, conn, cursor):
+        result = self.before_commit(cursor) if self.before_commit else None
+        conn.commit()
+        if self.after_commit:
+            self.after_commit(result)
+
+    def _write(self, batch):
+        """Run the batch's UPDATEs in one transaction; returns the statement count."""
+        with self.db.pool.acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                statements = 0
+                for sql, params in self._statements(batch):
+                    cursor.execute(sql, params)
+                    statements += 1
+                self._commit(conn, cursor)
+                return statements
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def _write_each(self, batch, written, rejected):
+        """
+        Write the rows of a batch the database refused, one transaction per
+        row. Rows it still refuses go to `rejected` instead of stopping the
+        rest; a connection failure propagates. Returns the statement count.
+        """
+        statements = 0
+        with self.db.pool.acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                for key, values in batch.items():
+                    try:
+                        for sql, params in self._statements({key: values}):
+                            cursor.execute(sql, params)
+                            statements += 1
+                        self._commit(conn, cursor)
+                        written[key] = values
+                    except TRANSIENT_ERRORS:
+                        conn.rollback()
+                        raise
+                    except Exception as e:
+                        conn.rollback()
+                        rejected[key] = e
+            finally:
+                cursor.close()
+        return statements
+
+    def _drop(self, batch, rejected):
+        with self._lock:
+            self.dropped += len(rejected)
+        for key, error in rejected.items():
+            self.logger.error(f"write-behind dropped {self.table} {self.key}={key} {batch[key]}: {error}")
+
+    def flush(self):
+        """Write everything pending now. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            started = time.monotonic()
+            written, rejected = {}, {}
+            try:
+                try:
+                    statements = self._write(batch)
+                    written = batch
+                except TRANSIENT_ERRORS:
+                    raise
+                except Exception:
+                    # some row was refused: find it without holding back the others
+                    statements = self._write_each(batch, written, rejected)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                    # anything queued since the swap is newer and wins
+                    for key, values in batch.items():
+                        if key not in written and key not in rejected:
+                            self._pending[key] = {**values, **self._pending.get(key, {})}
+                self._drop(batch, rejected)
+                raise
+            with self._lock:
+                self.flushes += 1
+                self.statements += statements
+                self.rows_written += len(written)
+                self.last_flush_ms = round((time.monotonic() - started) * 1000, 2)
+            self._drop(batch, rejected)
+        return len(written)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"write-behind flush of {self.table} failed: {e}")
+
+    def init_app(self, app, interval=None):
+        """
+        Use the app's logger, flush at exit and on SIGTERM/SIGINT. The
+        flusher thread itself is only started by the first update().
+        """
+        self.logger = app.logger
+        if interval is not None:
+            self.interval = interval
+        atexit.register(self._flush_at_exit)
+        # signal handlers can only be installed from the main thread
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                previous = signal.getsignal(signum)
+                signal.signal(signum, functools.partial(self._flush_on_signal, previous))
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.table}", daemon=True)
+        self._thread.start()
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception as e:
+            self.logger.error(f"write-behind flush of {self.table} at exit failed: {e}")
+
+    def _flush_on_signal(self, previous, signum, frame):
+        """Flush, then do what the signal did before (exit by default)."""
+        self._flush_at_exit()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            raise SystemExit(128 + signum)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "updates": self.updates,
+                "coalesced": self.coalesced,
+                "flushes": self.flushes,
+                "statements": self.statements,
+                "rows_written": self.rows_written,
+                "errors": self.errors,
+                "dropped": self.dropped,
+                "last_flush_ms": self.last_flush_ms,
+            }
@@ -1,10 +1,16 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import mysql.connector
 import json
 from datetime import datetime, timedelta
 import os
 
+from backend.db_connection import db
+from backend import compression, json_provider
+from backend.singleflight import SingleFlight
+from backend.analytics import equipment_summary, workout_rollup
+from backend.maintenance import footage_archiver, partitions
+from backend.maintenance.footage_archiver import FootageArchiver
+
 app = Flask(__name__)
 CORS(app)
 
@@ -17,32 +23,65 @@ DB_CONFIG = {
     'port': int(os.getenv('DB_PORT', 3306))
 }
 
-def get_db_connection():
-    """Create and return database connection"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
-    except mysql.connector.Error as err:
-        print(f"Error connecting to database: {err}")
-        return None
+# Same data-access layer (and connection pool settings) as the blueprints
+app.config['MYSQL_DATABASE_HOST'] = DB_CONFIG['host']
+app.config['MYSQL_DATABASE_USER'] = DB_CONFIG['user']
+app.config['MYSQL_DATABASE_PASSWORD'] = DB_CONFIG['password']
+app.config['MYSQL_DATABASE_DB'] = DB_CONFIG['database']
+app.config['MYSQL_DATABASE_PORT'] = DB_CONFIG['port']
+app.config['MYSQL_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 10))
+app.config['MYSQL_POOL_TIMEOUT'] = float(os.getenv('DB_POOL_TIMEOUT', 5))
+app.config['MYSQL_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))
+app.config['MYSQL_POOL_IDLE_TIMEOUT'] = int(os.getenv('DB_POOL_IDLE_TIMEOUT', 300))
+app.config['MYSQL_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', 'true').lower() != 'false'
+app.config['MYSQL_STATEMENT_CACHE_SIZE'] = int(os.getenv('DB_STATEMENT_CACHE_SIZE', 64))
+db.init_app(app)
+json_provider.init_app(app)
+app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))
+app.config['COMPRESS_ZSTD_LEVEL'] = int(os.getenv('COMPRESS_ZSTD_LEVEL', 3))
+app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+compression.init_app(app)
+
+# Concurrent identical analytics requests share one query; results are
+# reused for ANALYTICS_FRESHNESS seconds after they finish
+analytics_flight = SingleFlight(fresh_for=float(os.getenv('ANALYTICS_FRESHNESS', 2)))
+
+# `flask --app backend_app backfill-workout-rollup` (see backend/analytics/workout_rollup.py)
+workout_rollup.init_app(app)
+# `flask --app backend_app check-equipment-summary [--repair]`
+equipment_summary.init_app(app)
+# `flask --app backend_app partitions init|maintain|show|check-pruning`
+partitions.init_app(app)
+
+# Video Surveillance Policy: footage is retained for 30 days. Run a pass with
+# `flask --app backend_app archive-footage`, or set FOOTAGE_ARCHIVER_INTERVAL
+# (seconds) to run it in the background of the API process
+app.config['FOOTAGE_ARCHIVER_INTERVAL'] = float(os.getenv('FOOTAGE_ARCHIVER_INTERVAL', 0))
+archiver = FootageArchiver(
+    retention_days=int(os.getenv('FOOTAGE_RETENTION_DAYS', 30)),
+    batch_size=int(os.getenv('FOOTAGE_ARCHIVER_BATCH_SIZE', 500)),
+    pause=float(os.getenv('FOOTAGE_ARCHIVER_PAUSE', 0.2)),
+)
+footage_archiver.init_app(app, archiver)
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     try:
-        conn = get_db_connection()
-        if conn:
-            conn.close()
-            db_status = "connected"
-        else:
-            db_status = "disconnected"
-    except:
-        db_status = "error"
+        # checkout pre-pings the pooled connection
+        db.get_db()
+        db_status = "connected"
+    except Exception:
+        db_status = "disconnected"
     
     return jsonify({
         'status': 'healthy', 
         'timestamp': datetime.now().isoformat(),
-        'database': db_status
+        'database': db_status,
+        'pool': db.pool.stats(),
+        'statements': db.statement_stats.snapshot(),
+        'analytics_coalescing': analytics_flight.stats(),
+        'footage_archiver': archiver.progress()
     })
 
 # ============================================================================
@@ -56,12 +95,6 @@ def get_available_equipment():
         if not user_id:
             return jsonify({'error': 'user_id parameter required'}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         # Get user's gym location and available equipment
         query = """
         SELECT e.equipment_name, e.`condition`, e.location, 
@@ -71,11 +104,9 @@ def get_available_equipment():
             AND e.location = (SELECT gym_location FROM User WHERE user_ID = %s)
         """
         
-        cursor.execute(query, (user_id,))
-        equipment = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query, (user_id,))
+            equipment = cursor.fetchall()
         
         return jsonify({
             'user_id': user_id,
@@ -86,91 +117,40 @@ def get_available_equipment():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
-@app.route('/api/equipment/available', methods=['GET'])
-def get_available_equipment():
-    """Get available equipment for a specific gym location"""
+@app.route('/api/goals/<int:user_id>', methods=['GET'])
+def manage_goals(user_id):
+    """Get user goals"""
     try:
-        user_id = request.args.get('user_id', type=int)
-        if not user_id:
-            return jsonify({'error': 'user_id parameter required'}), 400
-        
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
-        # Get user's gym location and available equipment
         query = """
-        SELECT e.equipment_name, e.`condition`, e.location, 
-               e.last_maintenance, e.next_maintenance
-        FROM Equipment_Maintenance e
-        WHERE e.`condition` = 'available' 
-            AND e.location = (SELECT gym_location FROM User WHERE user_ID = %s)
+        SELECT goal_ID, goal_name, task, tracking, records, 
+               reminders, target_date, status, created_at
+        FROM Goal 
+        WHERE user_ID = %s
+        ORDER BY created_at DESC
         """
         
-        cursor.execute(query, (user_id,))
-        equipment = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query, (user_id,))
+            goals = cursor.fetchall()
         
         return jsonify({
             'user_id': user_id,
-            'equipment': equipment,
-            'count': len(equipment)
+            'goals': goals,
+            'count': len(goals)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/goals/<userid>', methods=['GET'])
-def manage_goals(userid):
-    """Get user goals or create new goal"""
-    if request.method == 'GET':
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-
-    cursor = conn.cursor(dictionary=True)
-            
-    query = """
-    SELECT goal_ID, goal_name, task, tracking, records, 
-    reminders, target_date, status, created_at
-    FROM Goal 
-    WHERE user_ID = ?
-    ORDER BY created_at DESC
-    """
-            
-    cursor.execute(query, (userid,))
-    goals = cursor.fetchall()
-            
-    cursor.close()
-    conn.close()
-            
-    return jsonify({
-        'user_id': user_id,
-        'goals': goals,
-        'count': len(goals)
-            })
-            
-    
-
 @app.route('/api/plans/recommended', methods=['GET'])
 def get_recommended_plans():
-    logger.info("Fetching recommended workout plans")
     """Get workout plans that align with user's fitness goals"""
+    app.logger.info("Fetching recommended workout plans")
     try:
         user_id = request.args.get('user_id', type=int)
         if not user_id:
             return jsonify({'error': 'user_id parameter required'}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT p.plan_ID, p.title, p.workout_rec, p.diet, 
                p.difficulty_level, p.duration_weeks
@@ -180,11 +160,9 @@ def get_recommended_plans():
         ORDER BY p.difficulty_level, p.duration_weeks
         """
         
-        cursor.execute(query, (user_id,))
-        plans = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query, (user_id,))
+            plans = cursor.fetchall()
         
         return jsonify({
             'user_id': user_id,
@@ -203,12 +181,6 @@ def get_progress_tracker():
         if not user_id:
             return jsonify({'error': 'user_id parameter required'}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT g.goal_name, g.tracking, g.records, g.status, 
                g.created_at, g.target_date,
@@ -218,11 +190,9 @@ def get_progress_tracker():
         ORDER BY g.created_at DESC
         """
         
-        cursor.execute(query, (user_id,))
-        goals = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query, (user_id,))
+            goals = cursor.fetchall()
         
         return jsonify({
             'user_id': user_id,
@@ -241,12 +211,6 @@ def get_progress_tracker():
 def get_gym_policies():
     """Get all active gym policies"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT policy_ID, title, description, category, created_at
         FROM Policy 
@@ -254,11 +218,9 @@ def get_gym_policies():
         ORDER BY category, title
         """
         
-        cursor.execute(query)
-        policies = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query)
+            policies = cursor.fetchall()
         
         return jsonify({
             'policies': policies,
@@ -272,12 +234,6 @@ def get_gym_policies():
 def get_user_membership_status():
     """Get all gym users with their membership status"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT u.user_ID, u.name, u.email, u.gym_location,
                m.status as membership_status, m.start_date, m.end_date,
@@ -291,11 +247,9 @@ def get_user_membership_status():
         ORDER BY m.status DESC, u.name
         """
         
-        cursor.execute(query)
-        users = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query)
+            users = cursor.fetchall()
         
         return jsonify({
             'users': users,
@@ -311,12 +265,6 @@ def get_video_footage():
     try:
         days = request.args.get('days', 7, type=int)
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT footage_ID, camera_ID, location, timestamp, 
                duration_seconds, file_path
@@ -326,11 +274,9 @@ def get_video_footage():
         ORDER BY timestamp DESC
         """
         
-        cursor.execute(query, (days,))
-        footage = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query, (days,))
+            footage = cursor.fetchall()
         
         return jsonify({
             'footage': footage,
@@ -345,12 +291,6 @@ def get_video_footage():
 def get_equipment_status():
     """Get all gym equipment status"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT equip_ID, equipment_name, `condition`, location,
                last_maintenance, next_maintenance,
@@ -363,11 +303,9 @@ def get_equipment_status():
         ORDER BY location, `condition`
         """
         
-        cursor.execute(query)
-        equipment = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query)
+            equipment = cursor.fetchall()
         
         return jsonify({
             'equipment': equipment,
@@ -389,12 +327,6 @@ def get_workout_efficiency():
         if not user_id:
             return jsonify({'error': 'user_id parameter required'}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT report_ID, title, work_efficiency, workout_duration,
                calories_burned, time_based_summary, report_date
@@ -403,11 +335,9 @@ def get_workout_efficiency():
         ORDER BY report_date DESC
         """
         
-        cursor.execute(query, (user_id,))
-        reports = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query, (user_id,))
+            reports = cursor.fetchall()
         
         return jsonify({
             'user_id': user_id,
@@ -426,12 +356,6 @@ def get_time_summaries():
         if not user_id:
             return jsonify({'error': 'user_id parameter required'}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT report_ID, title, time_based_summary, workout_duration,
                calories_burned, report_date,
@@ -444,16 +368,34 @@ def get_time_summaries():
         ORDER BY report_date DESC
         """
         
-        cursor.execute(query, (user_id,))
-        summaries = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        # Per-day workout totals from the rollup; ?days=N limits to the last N days
+        daily_query = """
+        SELECT rollup_date, workout_count, total_duration_minutes, total_calories,
+               CONCAT(
+                   FLOOR(total_duration_minutes / 60), 'h ',
+                   MOD(total_duration_minutes, 60), 'm'
+               ) as formatted_duration
+        FROM Workout_Daily_Rollup 
+        WHERE user_ID = %s
+        """
+        daily_params = [user_id]
+        days = request.args.get('days', type=int)
+        if days:
+            daily_query += " AND rollup_date >= CURDATE() - INTERVAL %s DAY"
+            daily_params.append(days)
+        daily_query += " ORDER BY rollup_date DESC"
+        
+        with db.cursor() as cursor:
+            cursor.execute(query, (user_id,))
+            summaries = cursor.fetchall()
+            cursor.execute(daily_query, daily_params)
+            daily = cursor.fetchall()
         
         return jsonify({
             'user_id': user_id,
             'summaries': summaries,
-            'count': len(summaries)
+            'count': len(summaries),
+            'daily': daily
         })
         
     except Exception as e:
@@ -467,12 +409,6 @@ def get_device_sync_info():
         if not user_id:
             return jsonify({'error': 'user_id parameter required'}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT ud.device_ID, ud.device_type, ud.device_name,
                ud.transfer, ud.last_sync, ud.is_active,
@@ -482,11 +418,9 @@ def get_device_sync_info():
         WHERE ud.user_ID = %s AND ud.is_active = TRUE
         """
         
-        cursor.execute(query, (user_id,))
-        devices = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query, (user_id,))
+            devices = cursor.fetchall()
         
         return jsonify({
             'user_id': user_id,
@@ -505,12 +439,6 @@ def get_device_sync_info():
 def get_system_status():
     """Get system status and alerts"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT system_ID, system_name, alerts, status, last_updated,
                CASE 
@@ -522,11 +450,9 @@ def get_system_status():
         WHERE alerts IS NOT NULL OR status != 'online'
         """
         
-        cursor.execute(query)
-        systems = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query)
+            systems = cursor.fetchall()
         
         return jsonify({
             'systems': systems,
@@ -540,12 +466,6 @@ def get_system_status():
 def get_system_logs():
     """Get detailed system activity logs"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT s.system_ID, s.system_name, s.logs, s.status,
                s.last_updated, sa.admin_ID, u.name as admin_name
@@ -556,11 +476,9 @@ def get_system_logs():
         ORDER BY s.last_updated DESC
         """
         
-        cursor.execute(query)
-        logs = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query)
+            logs = cursor.fetchall()
         
         return jsonify({
             'logs': logs,
@@ -574,12 +492,6 @@ def get_system_logs():
 def get_inactive_memberships():
     """Get users with inactive memberships"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         query = """
         SELECT u.user_ID, u.name, u.email, u.gym_location,
                m.membership_ID, m.status, m.start_date, m.end_date,
@@ -596,11 +508,9 @@ def get_inactive_memberships():
         ORDER BY m.end_date DESC
         """
         
-        cursor.execute(query)
-        users = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with db.cursor() as cursor:
+            cursor.execute(query)
+            users = cursor.fetchall()
         
         return jsonify({
             'users': users,
@@ -618,31 +528,38 @@ def get_inactive_memberships():
 def get_gym_usage_stats():
     """Get overall gym usage statistics"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
+        # Workout totals come from the daily rollup (O(days), not O(workouts))
         query = """
         SELECT 
-            COUNT(DISTINCT u.user_ID) as total_users,
-            COUNT(DISTINCT m.membership_ID) as total_memberships,
-            COUNT(DISTINCT CASE WHEN m.status = 'active' THEN m.membership_ID END) as active_memberships,
-            COUNT(DISTINCT w.workout_ID) as total_workouts,
-            AVG(w.duration_minutes) as avg_workout_duration,
-            SUM(w.calories_burned) as total_calories_burned
-        FROM User u
-        LEFT JOIN Membership m ON u.user_ID = m.membership_ID
-        LEFT JOIN Workout_Log w ON u.user_ID = w.user_ID
+            (SELECT COUNT(*) FROM User) as total_users,
+            (SELECT COUNT(*) FROM Membership) as total_memberships,
+            (SELECT COUNT(*) FROM Membership WHERE status = 'active') as active_memberships,
+            COALESCE(SUM(r.workout_count), 0) as total_workouts,
+            SUM(r.total_duration_minutes) / NULLIF(SUM(r.timed_workouts), 0) as avg_workout_duration,
+            SUM(r.total_calories) as total_calories_burned
+        FROM Workout_Daily_Rollup r
+        """
+        location_query = """
+        SELECT 
+            gym_location,
+            COUNT(DISTINCT user_ID) as active_users,
+            SUM(workout_count) as total_workouts,
+            SUM(total_duration_minutes) / NULLIF(SUM(timed_workouts), 0) as avg_workout_duration,
+            SUM(total_calories) as total_calories_burned
+        FROM Workout_Daily_Rollup
+        GROUP BY gym_location
+        ORDER BY gym_location
         """
         
-        cursor.execute(query)
-        stats = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
+        def load():
+            with db.cursor() as cursor:
+                cursor.execute(query)
+                stats = cursor.fetchone()
+                cursor.execute(location_query)
+                stats['by_location'] = cursor.fetchall()
+                return stats
         
+        stats = analytics_flight.do('gym-usage', load)
         return jsonify(stats)
         
     except Exception as e:
@@ -652,32 +569,26 @@ def get_gym_usage_stats():
 def get_equipment_utilization():
     """Get equipment utilization analysis"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
+        # Reads the maintained per-location summary (see backend/analytics/equipment_summary.py)
         query = """
         SELECT 
-            location,
-            COUNT(*) as total_equipment,
-            COUNT(CASE WHEN `condition` = 'available' THEN 1 END) as available_equipment,
-            COUNT(CASE WHEN `condition` = 'maintenance' THEN 1 END) as maintenance_equipment,
-            COUNT(CASE WHEN `condition` = 'out_of_order' THEN 1 END) as out_of_order_equipment,
-            ROUND(
-                (COUNT(CASE WHEN `condition` = 'available' THEN 1 END) / COUNT(*)) * 100, 2
-            ) as availability_percentage
-        FROM Equipment_Maintenance 
-        GROUP BY location
+            NULLIF(location, '') as location,
+            total_equipment,
+            available_equipment,
+            maintenance_equipment,
+            out_of_order_equipment,
+            ROUND((available_equipment / total_equipment) * 100, 2) as availability_percentage
+        FROM Equipment_Availability_Summary 
+        WHERE total_equipment > 0
         ORDER BY availability_percentage DESC
         """
         
-        cursor.execute(query)
-        utilization = cursor.fetchall()
+        def load():
+            with db.cursor() as cursor:
+                cursor.execute(query)
+                return cursor.fetchall()
         
-        cursor.close()
-        conn.close()
+        utilization = analytics_flight.do('equipment-utilization', load)
         
         return jsonify({
             'utilization': utilization,
@@ -691,5 +602,5 @@ if __name__ == '__main__':
     print("🚀 Progress Fitness App Backend Starting...")
     print(f"🌐 Server: http://localhost:4000")
     print(f"🔗 Health Check: http://localhost:4000/health")
-    print(f"📊 Database: {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}")
+    print(f"📊 Database: {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']} (pool size {db.pool.size})")
     app.run(host='0.0.0.0', port=4000, debug=True)
@@ -0,0 +1,117 @@
+"""
+Workout ingestion throughput: one INSERT per row vs the multi-row
+INSERTs used by POST /workouts/bulk (backend.ingest.workouts).
+
+Generates --rows workouts with --exercises children each for users and
+exercises that already exist, inserts them with each strategy inside a
+transaction and rolls it back, so the database is left unchanged (the
+rollup triggers run, as they would in production). Needs the database
+configured by DB_HOST/DB_PORT/DB_USER/DB_PASSWORD/DB_NAME. Run from the
+api/ directory:
+
+    python -m benchmarks.bulk_workouts [--rows 5000] [--exercises 3] [--chunk-size 100 500 1000]
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+
+import mysql.connector
+
+from backend.ingest import workouts as workout_ingest
+
+
+def make_items(n, exercises_per_workout, user_ids, exercise_ids):
+    rng = random.Random(42)
+    start = date.today() - timedelta(days=365)
+    items = []
+    for i in range(n):
+        items.append({
+            "user_ID": rng.choice(user_ids),
+            "workout_date": (start + timedelta(days=i % 365)).isoformat(),
+            "workout_type": rng.choice(["cardio", "strength", "hiit", "yoga"]),
+            "duration_minutes": rng.randint(15, 90),
+            "calories_burned": rng.randint(100, 900),
+            "notes": None,
+            "exercises": [
+                {"exercise_ID": exercise_id, "sets": 3, "reps": 10, "weight": 42.5, "rest_seconds": 60}
+                for exercise_id in rng.sample(exercise_ids, min(exercises_per_workout, len(exercise_ids)))
+            ],
+        })
+    return items
+
+
+def row_at_a_time(cursor, parsed):
+    placeholders = ", ".join(["%s"] * len(workout_ingest.WORKOUT_COLUMNS))
+    child_placeholders = ", ".join(["%s"] * len(workout_ingest.EXERCISE_COLUMNS))
+    for _, row, children in parsed:
+        cursor.execute(
+            f"INSERT INTO Workout_Log ({', '.join(workout_ingest.WORKOUT_COLUMNS)}) VALUES ({placeholders})", row)
+        workout_id = cursor.lastrowid
+        for child in children:
+            cursor.execute(
+                f"INSERT INTO Workout_Exercise ({', '.join(workout_ingest.EXERCISE_COLUMNS)}) "
+                f"VALUES ({child_placeholders})", (workout_id, *child[1:]))
+
+
+def timed(conn, fn):
+    cursor = conn.cursor(dictionary=True)
+    started = time.perf_counter()
+    try:
+        fn(cursor)
+        return time.perf_counter() - started
+    finally:
+        conn.rollback()
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--exercises", type=int, default=3, help="Workout_Exercise rows per workout")
+    parser.add_argument("--chunk-size", type=int, nargs="+", default=[100, 500, 1000])
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", "password"),
+        database=os.getenv("DB_NAME", "progress"),
+        port=int(os.getenv("DB_PORT", 3306)),
+        autocommit=False,
+    )
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT user_ID FROM User")
+    user_ids = [row["user_ID"] for row in cursor.fetchall()]
+    cursor.execute("SELECT exercise_ID FROM Exercise")
+    exercise_ids = [row["exercise_ID"] for row in cursor.fetchall()]
+    cursor.close()
+    if not user_ids or not exercise_ids:
+        raise SystemExit("need at least one User and one Exercise row")
+
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(workout_ingest.AUTOINC_SETTINGS)
+    settings = cursor.fetchone()
+    cursor.close()
+    consecutive = workout_ingest.consecutive_ids(settings)
+    # which path insert_workouts() takes for Workout_Log (children are multi-row either way)
+    path = "multi-row" if consecutive else "one-row IDs"
+    print(f"innodb_autoinc_lock_mode={settings['lock_mode']}, auto_increment_increment={settings['increment']}: "
+          f"Workout_Log rows are inserted {'in multi-row INSERTs' if consecutive else 'one at a time'}")
+
+    items = make_items(args.rows, args.exercises, user_ids, exercise_ids)
+    parsed = [(i, *workout_ingest.parse_workout(item)) for i, item in enumerate(items)]
+    total = args.rows * (1 + args.exercises)
+    print(f"{args.rows} workouts, {total} rows including exercises (rolled back after each run)")
+
+    elapsed = timed(conn, lambda cursor: row_at_a_time(cursor, parsed))
+    print(f"{'row-at-a-time':>17}: {elapsed:7.2f} s  {total / elapsed:10.0f} rows/s")
+    for chunk_size in args.chunk_size:
+        elapsed = timed(conn, lambda cursor: workout_ingest.insert_workouts(cursor, parsed, chunk_size))
+        print(f"{f'{path} x{chunk_size}':>17}: {elapsed:7.2f} s  {total / elapsed:10.0f} rows/s")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
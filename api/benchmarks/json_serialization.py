@@ -0,0 +1,71 @@
+"""
+Serialization cost of a 10k-row list response: Flask's default JSON
+provider vs backend.json_provider.FastJSONProvider.
+
+Rows mimic what the dictionary cursor returns for Report / User_Device
+(DECIMAL -> Decimal, DATE -> date, DATETIME -> datetime). No database
+is needed. Run from the api/ directory:
+
+    python -m benchmarks.json_serialization [--rows 10000] [--repeat 20]
+"""
+import argparse
+import decimal
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from backend.json_provider import FastJSONProvider
+
+
+def make_rows(n):
+    start = datetime(2025, 1, 1, 6, 0, 0)
+    return [
+        {
+            "report_ID": i,
+            "user_ID": i % 500 + 1,
+            "title": f"Weekly report {i}",
+            "checklist": "warmup, cardio, stretch",
+            "work_efficiency": decimal.Decimal(f"{i % 100}.{i % 97:02d}"),
+            "report_date": date(2025, 1, 1) + timedelta(days=i % 365),
+            "last_sync": start + timedelta(minutes=7 * i),
+            "status": "active" if i % 3 else "inactive",
+            "notes": None,
+        }
+        for i in range(n)
+    ]
+
+
+def time_provider(app, provider, rows, repeat):
+    app.json = provider
+    samples = []
+    with app.app_context():
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = app.json.response(rows)
+            response.get_data()
+            samples.append(time.perf_counter() - started)
+    return samples, len(response.get_data())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    rows = make_rows(args.rows)
+    results = {}
+    for name, provider in (("default", DefaultJSONProvider(app)), ("orjson", FastJSONProvider(app))):
+        samples, size = time_provider(app, provider, rows, args.repeat)
+        results[name] = statistics.median(samples)
+        print(f"{name:>8}: median {results[name] * 1000:8.2f} ms  "
+              f"min {min(samples) * 1000:8.2f} ms  body {size / 1024:8.1f} KiB")
+    print(f"speedup: {results['default'] / results['orjson']:.1f}x on {args.rows} rows")
+
+
+if __name__ == "__main__":
+    main()
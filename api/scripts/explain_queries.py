@@ -0,0 +1,411 @@
+"""
+EXPLAIN every SQL statement in backend_app.py, the blueprints and the
+analytics/maintenance jobs, and fail on full table scans of large tables.
+
+Statements are pulled out of the source with `ast`:
+
+  * string literals that start with SELECT/UPDATE/DELETE;
+  * the SQL handed to cursor.execute() when it is built in code, i.e.
+    f-strings, `query += ...` and column lists appended in a loop over a
+    literal list (`for k in allowed: cols.append(f"{k}=%s")`). Names are
+    resolved against the enclosing function and module, and an
+    interpolation nobody can resolve inside `IN (...)` becomes a list of
+    placeholders;
+  * the queries the data-access helpers build: Page.fetch() (first and
+    next page), fetch_by_ids()/by_ids_response() and Relation (?expand=),
+    rendered by the helpers themselves.
+
+Placeholders are filled with '1', and each statement is EXPLAINed (never
+executed) against the database configured by the usual
+DB_HOST/DB_PORT/DB_USER/DB_PASSWORD/DB_NAME variables.
+
+A plan row with access type ALL on a table holding at least --min-rows
+rows is a failure. Statements without a WHERE clause are whole-table
+reads by design (paged list bases, exports, dashboards) and are only
+reported. A statement that cannot be built or that the server refuses to
+EXPLAIN is a failure too, unless its function is listed in
+ALLOWED_ERRORS with the reason. Run from the api/ directory:
+
+    python -m scripts.explain_queries [--min-rows 1000] [--verbose]
+    python -m scripts.explain_queries --list     # print the statements, no database
+
+Exits 1 when any statement fails, so it can gate CI or a deploy.
+"""
+import argparse
+import ast
+import os
+import re
+import sys
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(API_DIR))
+
+from backend.db_connection.by_ids import fetch_by_ids  # noqa: E402
+from backend.db_connection.expand import Relation  # noqa: E402
+from backend.db_connection.pagination import Page  # noqa: E402
+
+SOURCES = [
+    API_DIR / "backend_app.py",
+    *sorted((API_DIR / "backend" / "users").glob("*.py")),
+    *sorted((API_DIR / "backend" / "ngos").glob("*.py")),
+    *sorted((API_DIR / "backend" / "analytics").glob("*.py")),
+    *sorted((API_DIR / "backend" / "maintenance").glob("*.py")),
+]
+
+# "path::function" -> why its statements may fail to build or EXPLAIN.
+# Anything else that fails fails the run.
+ALLOWED_ERRORS = {
+    "backend/analytics/equipment_summary.py::check":
+        "_aggregate_query() picks its columns from the live schema (SHOW COLUMNS)",
+    "backend/analytics/workout_rollup.py::_REMOVE_OLD":
+        "trigger body: two statements referencing OLD.*",
+    "backend/maintenance/footage_archiver.py::FootageArchiver.ensure_checkpoint":
+        "DDL from versions.SCHEMA",
+    "backend/maintenance/partitions.py::ORPHAN_CLEANUP":
+        "template for a named partition, filled in by expire_partitions()",
+    "backend/maintenance/partitions.py::expire_partitions":
+        "ORPHAN_CLEANUP for the partition being dropped",
+    "backend/maintenance/partitions.py::init_table":
+        "table and column come from TABLES, per call",
+}
+
+STATEMENT = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+HAS_WHERE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+OPEN_IN_LIST = re.compile(r"\bIN\s*\(\s*$", re.IGNORECASE)
+TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+KEYWORDS = {"where", "join", "left", "right", "inner", "on", "group", "order", "limit", "union", "for"}
+# IN (...) lists and ?ids= batches are explained with this many keys
+SAMPLE_KEYS = 3
+SAFE_BUILTINS = {"len": len, "int": int, "str": str, "list": list, "tuple": tuple, "sorted": sorted}
+
+
+class Unresolved(Exception):
+    """Part of a statement only exists at run time."""
+
+
+def is_statement(sql):
+    match = isinstance(sql, str) and STATEMENT.match(sql)
+    if not match:
+        return False
+    # "Select a plan" and friends are messages, not SQL
+    return (" SET " if match.group(1).upper() == "UPDATE" else " FROM ") in f" {' '.join(sql.upper().split())} "
+
+
+def _leading_text(node):
+    """The literal text an f-string or `+` chain starts with, if any."""
+    while isinstance(node, ast.BinOp):
+        node = node.left
+    if isinstance(node, ast.JoinedStr) and node.values:
+        node = node.values[0]
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+
+class Scope:
+    """
+    Assignments, `+=` and `.append()` calls to plain names in one
+    function (or at module level), resolved on demand. `parent` is the
+    module scope; `bindings` hold loop variables while an append inside
+    a `for` loop is evaluated for each element.
+    """
+
+    def __init__(self, body, parent=None):
+        self.parent = parent
+        self.bindings = {}
+        self.assigns, self.augments, self.appends = {}, {}, {}
+        for node in body:
+            self._collect(node, ())
+
+    def _collect(self, node, loops):
+        if isinstance(node, (ast.Assign, ast.AnnAssign)) and node.value is not None:
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    self.assigns.setdefault(target.id, []).append((node.lineno, node.value, loops))
+        elif isinstance(node, ast.AugAssign) and isinstance(node.op, ast.Add) and isinstance(node.target, ast.Name):
+            self.augments.setdefault(node.target.id, []).append((node.lineno, node.value, loops))
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "append"
+              and isinstance(node.func.value, ast.Name) and len(node.args) == 1):
+            self.appends.setdefault(node.func.value.id, []).append((node.lineno, node.args[0], loops))
+        if isinstance(node, ast.For):
+            self._collect(node.iter, loops)
+            for child in node.body:
+                self._collect(child, loops + (node,))
+            for child in node.orelse:
+                self._collect(child, loops)
+            return
+        for child in ast.iter_child_nodes(node):
+            self._collect(child, loops)
+
+    def _bound(self, bindings):
+        scope = object.__new__(Scope)
+        scope.__dict__.update(self.__dict__)
+        scope.bindings = {**self.bindings, **bindings}
+        return scope
+
+    def _each(self, loops, line):
+        """Every combination of loop-variable values for code nested in `loops`."""
+        if not loops:
+            yield self
+            return
+        loop, rest = loops[0], loops[1:]
+        if not isinstance(loop.target, (ast.Name, ast.Tuple)):
+            raise Unresolved(ast.unparse(loop.target))
+        for element in self.evaluate(loop.iter, line):
+            if isinstance(loop.target, ast.Name):
+                bindings = {loop.target.id: element}
+            else:
+                bindings = {name.id: value for name, value in zip(loop.target.elts, element)}
+            yield from self._bound(bindings)._each(rest, line)
+
+    def lookup(self, name, line):
+        if name in self.bindings:
+            return self.bindings[name]
+        # strictly before `line`, so `query = query + ...` reads the previous value
+        assigns = [entry for entry in self.assigns.get(name, ()) if entry[0] < line]
+        if not assigns:
+            if self.parent is None:
+                raise Unresolved(name)
+            return self.parent.lookup(name, float("inf"))
+        start, node, loops = assigns[-1]
+        if loops:
+            raise Unresolved(name)
+        value = self.evaluate(node, start)
+        for at, augment, loops in self.augments.get(name, ()):
+            if start < at <= line:
+                for scope in self._each(loops, at):
+                    value = value + scope.evaluate(augment, at)
+        if isinstance(value, list):
+            # a list filled by .append(), e.g. a SET clause or a WHERE filter list: take every append
+            for at, item, loops in self.appends.get(name, ()):
+                if start < at <= line:
+                    value = value + [scope.evaluate(item, at) for scope in self._each(loops, at)]
+        return value
+
+    def evaluate(self, node, line):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            return self.lookup(node.id, line)
+        if isinstance(node, ast.JoinedStr):
+            text = ""
+            for part in node.values:
+                if isinstance(part, ast.Constant):
+                    text += part.value
+                    continue
+                try:
+                    spec = self.evaluate(part.format_spec, line) if part.format_spec else ""
+                    text += format(self.evaluate(part.value, line), spec)
+                except Unresolved:
+                    if not OPEN_IN_LIST.search(text):
+                        raise
+                    text += ", ".join(["%s"] * SAMPLE_KEYS)
+            return text
+        namespace = {"__builtins__": SAFE_BUILTINS}
+        for name in {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}:
+            try:
+                namespace[name] = self.lookup(name, line)
+            except Unresolved:
+                pass  # a comprehension variable, or really unresolved (eval says which)
+        try:
+            return eval(compile(ast.Expression(node), "<sql>", "eval"), namespace)
+        except Exception:
+            raise Unresolved(ast.unparse(node))
+
+
+class RecordingCursor:
+    """Stands in for a cursor so the helpers hand over the SQL they would run."""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append(sql)
+
+    def fetchall(self):
+        return []
+
+
+def _call_name(node):
+    func = node.func
+    return func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+
+
+def helper_statements(call, scope, page_keys):
+    """SQL built by the data-access helper `call` invokes, or [] if it is not one."""
+    name = _call_name(call)
+    line = call.lineno
+    args = lambda: [scope.evaluate(arg, line) for arg in call.args]
+    kwargs = lambda *names: {k.arg: scope.evaluate(k.value, line) for k in call.keywords if k.arg in names}
+    cursor = RecordingCursor()
+    if name == "Relation":
+        return [Relation(*args(), **kwargs("fk", "order_by", "per_parent")).query(SAMPLE_KEYS)]
+    if name in ("fetch_by_ids", "by_ids_response") and len(call.args) >= 3:
+        select, key = (scope.evaluate(arg, line) for arg in call.args[1:3])
+        fetch_by_ids(cursor, select, key, list(range(1, SAMPLE_KEYS + 1)))
+        return cursor.statements
+    if name == "fetch" and isinstance(call.func, ast.Attribute) and len(call.args) >= 2 and page_keys:
+        keys = [scope.evaluate(key, line) for key in page_keys]
+        select = scope.evaluate(call.args[1], line)
+        where = kwargs("where").get("where")
+        Page(keys).fetch(cursor, select, where=where)
+        Page(keys, after=[1] * len(keys)).fetch(cursor, select, where=where)
+        return cursor.statements
+    return []
+
+
+def units(tree):
+    """(qualified name, nodes, scope) for every function, method and module-level statement."""
+    module = Scope(tree.body)
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield node.name, [node], Scope([node], module)
+        elif isinstance(node, ast.ClassDef):
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    yield f"{node.name}.{item.name}", [item], Scope([item], module)
+        else:
+            targets = getattr(node, "targets", None) or [getattr(node, "target", None)]
+            names = [target.id for target in targets if isinstance(target, ast.Name)]
+            yield (names[0] if names else "<module>"), [node], module
+
+
+def extract_statements(path):
+    """Yield (line, unit, sql, error) for every statement in `path`; sql is None when it cannot be built."""
+    tree = ast.parse(path.read_text(), filename=str(path))
+    seen = set()
+    for unit, nodes, scope in units(tree):
+        found = []
+        nodes = [n for root in nodes for n in ast.walk(root)]
+        fragments = {id(part) for n in nodes if isinstance(n, ast.JoinedStr) for part in n.values}
+        page_keys = next((n.args for n in nodes if isinstance(n, ast.Call) and _call_name(n) == "from_request"), None)
+        for node in nodes:
+            if isinstance(node, ast.Constant) and id(node) not in fragments:
+                if is_statement(node.value):
+                    found.append((node.lineno, node.value, None))
+            elif isinstance(node, ast.Call):
+                try:
+                    for sql in helper_statements(node, scope, page_keys):
+                        found.append((node.lineno, sql, None))
+                except Unresolved as e:
+                    found.append((node.lineno, None, f"cannot build {_call_name(node)}() SQL: {e} is only known at run time"))
+                if _call_name(node) != "execute" or not node.args:
+                    continue
+                sql_node = node.args[0]
+                if isinstance(sql_node, (ast.Constant, ast.Starred)):
+                    continue
+                leading = _leading_text(sql_node)
+                if leading is not None and not STATEMENT.match(leading):
+                    continue  # CREATE/ALTER/INSERT ...
+                try:
+                    sql = scope.evaluate(sql_node, node.lineno)
+                except Unresolved as e:
+                    found.append((node.lineno, None, f"cannot build the SQL: {e} is only known at run time"))
+                    continue
+                if is_statement(sql):
+                    found.append((node.lineno, sql, None))
+        for line, sql, error in sorted(found, key=lambda item: item[0]):
+            if sql is None or sql not in seen:
+                seen.add(sql)
+                yield line, unit, sql, error
+
+
+def table_aliases(sql):
+    """Map the names EXPLAIN reports (aliases included) to real table names."""
+    aliases = {}
+    for table, alias in TABLE_REF.findall(sql):
+        aliases[table.lower()] = table
+        if alias and alias.lower() not in KEYWORDS:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def explain(cursor, sql):
+    sql = re.sub(r"LIMIT\s+%s", "LIMIT 100", sql, flags=re.IGNORECASE)
+    params = ("1",) * sql.count("%s")
+    cursor.execute("EXPLAIN " + sql, params)
+    return cursor.fetchall()
+
+
+def table_sizes(cursor):
+    cursor.execute(
+        "SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()"
+    )
+    return {row["TABLE_NAME"].lower(): row["TABLE_ROWS"] or 0 for row in cursor.fetchall()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--min-rows", type=int, default=1000,
+                        help="full scans of tables smaller than this are tolerated")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    parser.add_argument("--list", action="store_true",
+                        help="print the extracted statements without connecting to the database")
+    args = parser.parse_args()
+
+    statements = [(path.relative_to(API_DIR).as_posix(), *entry) for path in SOURCES for entry in extract_statements(path)]
+    if args.list:
+        for path, line, unit, sql, error in statements:
+            print(f"-- {path}:{line} ({unit})" + (f"  ERROR {error}" if error else ""))
+            if sql:
+                print(" ".join(sql.split()))
+        return 0
+
+    import mysql.connector
+
+    conn = mysql.connector.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", "password"),
+        database=os.getenv("DB_NAME", "progress"),
+        port=int(os.getenv("DB_PORT", 3306)),
+    )
+    cursor = conn.cursor(dictionary=True)
+    sizes = table_sizes(cursor)
+
+    checked = unfiltered = allowed = 0
+    failures, errors, used_allowances = [], [], set()
+    for path, line, unit, sql, error in statements:
+        where = f"{path}:{line}"
+        if error is None:
+            try:
+                plan = explain(cursor, sql)
+            except mysql.connector.Error as e:
+                error = e.msg
+        if error is not None:
+            reason = ALLOWED_ERRORS.get(f"{path}::{unit}")
+            if reason:
+                allowed += 1
+                used_allowances.add(f"{path}::{unit}")
+                if args.verbose:
+                    print(f"allow {where} ({unit}): {error} [{reason}]")
+            else:
+                errors.append(where)
+                print(f"ERROR {where} ({unit}): {error}")
+            continue
+        checked += 1
+        filtered = bool(HAS_WHERE.search(sql))
+        unfiltered += not filtered
+        aliases = table_aliases(sql)
+        for row in plan:
+            name = (row.get("table") or "").strip("`")
+            table = aliases.get(name.lower(), name)
+            full_scan = row.get("type") == "ALL"
+            large = sizes.get(table.lower(), 0) >= args.min_rows
+            if args.verbose or (full_scan and filtered and large):
+                print(f"{'FAIL' if full_scan and filtered and large else 'ok  '}  {where}  "
+                      f"{table:<28} type={row.get('type')} key={row.get('key')} rows={row.get('rows')}")
+            if full_scan and filtered and large:
+                failures.append((where, table))
+
+    cursor.close()
+    conn.close()
+    for stale in sorted(set(ALLOWED_ERRORS) - used_allowances):
+        print(f"note  ALLOWED_ERRORS entry {stale} matched nothing; remove it")
+    print(f"\n{checked} statements explained ({unfiltered} whole-table reads), "
+          f"{len(errors)} errors ({allowed} allowed), {len(failures)} full scans of tables >= {args.min_rows} rows")
+    return 1 if failures or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
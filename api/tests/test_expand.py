@@ -0,0 +1,100 @@
+"""
+?expand= must not turn into N+1 queries: a page of users with every
+relation expanded costs one query for the page plus one per relation,
+whatever the page size.
+
+Runs GET /users against a counting fake connection, no database needed.
+"""
+import pytest
+from flask import Flask
+
+from backend import json_provider
+from backend.db_connection import db
+from backend.db_connection.versions import table_versions
+from backend.users import user_routes
+from backend.users.user_routes import USER_RELATIONS, users
+
+CHILDREN_PER_USER = 3
+
+
+class CountingCursor:
+    def __init__(self, queries):
+        self.queries = queries
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.queries.append(query)
+        params = list(params)
+        if "FROM User\n" in query:
+            # page query: LIMIT limit + 1 is the last parameter
+            self.rows = [{"user_ID": i, "name": f"user {i}", "email": None, "address": None,
+                          "gym_location": None} for i in range(1, params[-1] + 1)]
+        else:
+            # relation query: WHERE user_ID IN (...) over the page's keys
+            self.rows = [{"user_ID": key, "n": n} for key in params for n in range(CHILDREN_PER_USER)]
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class CountingConnection:
+    closed = False
+
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self, **kwargs):
+        return CountingCursor(self.queries)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    conn = CountingConnection()
+    monkeypatch.setattr(db, "get_db", lambda: conn)
+    # the ETag lookup is not part of the handler's query budget
+    monkeypatch.setattr(table_versions, "etag_for", lambda tables: "test")
+    monkeypatch.setattr(user_routes.device_writes, "init_app", lambda app, interval=None: None)
+    app = Flask(__name__)
+    json_provider.init_app(app)
+    app.register_blueprint(users)
+    client = app.test_client()
+    client.queries = conn.queries
+    return client
+
+
+@pytest.mark.parametrize("page_size", [1, 10, 100])
+def test_expand_query_count_is_independent_of_page_size(client, page_size):
+    expand = list(USER_RELATIONS)
+    response = client.get(f"/users?limit={page_size}&expand={','.join(expand)}")
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body) == page_size
+    assert len(client.queries) == 1 + len(expand)
+    for row in body:
+        for name in expand:
+            assert len(row[name]) == CHILDREN_PER_USER
+            assert all(child["user_ID"] == row["user_ID"] for child in row[name])
+
+
+@pytest.mark.parametrize("expand", [[], ["goals"], ["goals", "reports"]])
+def test_each_relation_adds_one_query(client, expand):
+    query = f"&expand={','.join(expand)}" if expand else ""
+    response = client.get(f"/users?limit=50{query}")
+
+    assert response.status_code == 200
+    assert len(client.queries) == 1 + len(expand)
+
+
+def test_unknown_relation_is_rejected_before_querying(client):
+    response = client.get("/users?expand=goals,friends")
+
+    assert response.status_code == 400
+    assert client.queries == []
@@ -66,3 +66,57 @@ def put(path: str, **kwargs) -> requests.Response:
 
 def delete(path: str, **kwargs) -> requests.Response:
     return requests.delete(_url(path), **kwargs)
+
+
+# (url, params) -> (etag, rows, next cursor) for conditional re-fetches
+_page_cache = {}
+
+
+def get_all(path: str, **kwargs) -> list:
+    """
+    GET a paged list endpoint and follow X-Next-Cursor until the last page.
+
+    Pages are revalidated with If-None-Match, so re-running a page whose
+    tables have not changed costs a 304 per page instead of the full body.
+    """
+    params = dict(kwargs.pop("params", None) or {})
+    headers = dict(kwargs.pop("headers", None) or {})
+    rows = []
+    while True:
+        key = (_url(path), tuple(sorted(params.items())))
+        cached = _page_cache.get(key)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        else:
+            headers.pop("If-None-Match", None)
+        r = requests.get(_url(path), params=params, headers=headers, **kwargs)
+        if r.status_code == 304 and cached:
+            _, page, next_cursor = cached
+        else:
+            r.raise_for_status()
+            page = r.json()
+            next_cursor = r.headers.get("X-Next-Cursor")
+            if r.headers.get("ETag"):
+                _page_cache[key] = (r.headers["ETag"], page, next_cursor)
+        rows.extend(page)
+        if not next_cursor:
+            return rows
+        params["after"] = next_cursor
+
+
+def get_by_ids(path: str, ids, chunk_size: int = 200, **kwargs) -> dict:
+    """
+    Fetch several rows of a list endpoint by ID with ?ids=1,2,3.
+
+    Returns {str(id): row or None}. One request per `chunk_size` IDs
+    (the API's per-request cap) instead of one request per ID.
+    """
+    ids = list(dict.fromkeys(str(i) for i in ids if i not in (None, "")))
+    params = dict(kwargs.pop("params", None) or {})
+    result = {}
+    for start in range(0, len(ids), chunk_size):
+        params["ids"] = ",".join(ids[start:start + chunk_size])
+        r = requests.get(_url(path), params=params, **kwargs)
+        r.raise_for_status()
+        result.update(r.json())
+    return result
@@ -2,6 +2,7 @@ import streamlit as st
 import requests
 from streamlit_extras.app_logo import add_logo
 from modules.nav import SideBarLinks
+from modules.api_client import get_all
 
 # Initialize sidebar
 SideBarLinks()
@@ -16,67 +17,61 @@ col1, col2, col3 = st.columns(3)
 
 # Get unique values for filters from the API
 try:
-    response = requests.get(API_URL)
-    if response.status_code == 200:
-        ngos = response.json()
-
-        # Extract unique values for filters
-        countries = sorted(list(set(ngo["Country"] for ngo in ngos)))
-        focus_areas = sorted(list(set(ngo["Focus_Area"] for ngo in ngos)))
-        founding_years = sorted(list(set(ngo["Founding_Year"] for ngo in ngos)))
-
-        # Create filters
-        with col1:
-            selected_country = st.selectbox("Filter by Country", ["All"] + countries)
-
-        with col2:
-            selected_focus = st.selectbox("Filter by Focus Area", ["All"] + focus_areas)
-
-        with col3:
-            selected_year = st.selectbox(
-                "Filter by Founding Year",
-                ["All"] + [str(year) for year in founding_years],
-            )
-
-        # Build query parameters
-        params = {}
-        if selected_country != "All":
-            params["country"] = selected_country
-        if selected_focus != "All":
-            params["focus_area"] = selected_focus
-        if selected_year != "All":
-            params["founding_year"] = selected_year
-
-        # Get filtered data
-        filtered_response = requests.get(API_URL, params=params)
-        if filtered_response.status_code == 200:
-            filtered_ngos = filtered_response.json()
-
-            # Display results count
-            st.write(f"Found {len(filtered_ngos)} NGOs")
-
-            # Create expandable rows for each NGO
-            for ngo in filtered_ngos:
-                with st.expander(f"{ngo['Name']} ({ngo['Country']})"):
-                    col1, col2 = st.columns(2)
-
-                    with col1:
-                        st.write("**Basic Information**")
-                        st.write(f"**Country:** {ngo['Country']}")
-                        st.write(f"**Founded:** {ngo['Founding_Year']}")
-                        st.write(f"**Focus Area:** {ngo['Focus_Area']}")
-
-                    with col2:
-                        st.write("**Contact Information**")
-                        st.write(f"**Website:** [{ngo['Website']}]({ngo['Website']})")
-
-                    # Add a button to view full profile
-                    if st.button(f"View Full Profile", key=f"view_{ngo['NGO_ID']}"):
-                        st.session_state["selected_ngo_id"] = ngo["NGO_ID"]
-                        st.switch_page("pages/16_NGO_Profile.py")
-
-    else:
-        st.error("Failed to fetch NGO data from the API")
+    # /ngo/ngos is paged; get_all follows the cursor to the last page
+    ngos = get_all(API_URL)
+
+    # Extract unique values for filters
+    countries = sorted(list(set(ngo["Country"] for ngo in ngos)))
+    focus_areas = sorted(list(set(ngo["Focus_Area"] for ngo in ngos)))
+    founding_years = sorted(list(set(ngo["Founding_Year"] for ngo in ngos)))
+
+    # Create filters
+    with col1:
+        selected_country = st.selectbox("Filter by Country", ["All"] + countries)
+
+    with col2:
+        selected_focus = st.selectbox("Filter by Focus Area", ["All"] + focus_areas)
+
+    with col3:
+        selected_year = st.selectbox(
+            "Filter by Founding Year",
+            ["All"] + [str(year) for year in founding_years],
+        )
+
+    # Build query parameters
+    params = {}
+    if selected_country != "All":
+        params["country"] = selected_country
+    if selected_focus != "All":
+        params["focus_area"] = selected_focus
+    if selected_year != "All":
+        params["founding_year"] = selected_year
+
+    # Get filtered data
+    filtered_ngos = get_all(API_URL, params=params)
+
+    # Display results count
+    st.write(f"Found {len(filtered_ngos)} NGOs")
+
+    # Create expandable rows for each NGO
+    for ngo in filtered_ngos:
+        with st.expander(f"{ngo['Name']} ({ngo['Country']})"):
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.write("**Basic Information**")
+                st.write(f"**Country:** {ngo['Country']}")
+                st.write(f"**Founded:** {ngo['Founding_Year']}")
+                st.write(f"**Focus Area:** {ngo['Focus_Area']}")
+
+            with col2:
+                st.write("**Contact Information**")
+                st.write(f"**Website:** [{ngo['Website']}]({ngo['Website']})")
+
+            # Add a button to view full profile
+            if st.button(f"View Full Profile", key=f"view_{ngo['NGO_ID']}"):
+                st.session_state["selected_ngo_id"] = ngo["NGO_ID"]
+                st.switch_page("pages/16_NGO_Profile.py")
 
 except requests.exceptions.RequestException as e:
     st.error(f"Error connecting to the API: {str(e)}")
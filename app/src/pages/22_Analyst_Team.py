@@ -3,7 +3,7 @@ logger = logging.getLogger(__name__)
 
 import streamlit as st
 from modules.nav import SideBarLinks
-from modules.api_client import set_base_url, get, post, put, delete
+from modules.api_client import set_base_url, get_all, post, put, delete
 
 st.set_page_config(layout='wide')
 SideBarLinks()
@@ -13,7 +13,7 @@ st.title("Analysts")
 # Fetch lookups (optional; if endpoints don't exist yet, page still works)
 def _safe_get(path):
     try:
-        return get(path).json()
+        return get_all(path)
     except Exception:
         return []
 
@@ -28,7 +28,7 @@ st.subheader("All Analysts")
 analysts_placeholder = st.empty()
 def fetch_analysts():
     try:
-        return get('/analysts').json()
+        return get_all('/analysts')
     except Exception as e:
         st.warning(f'Could not fetch analysts: {e}')
         return []
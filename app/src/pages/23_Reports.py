@@ -1,6 +1,6 @@
 import streamlit as st
 from modules.nav import SideBarLinks
-from modules.api_client import BASE_URL, set_base_url, get, post, put, delete
+from modules.api_client import BASE_URL, set_base_url, get_all, post, put, delete
 
 st.set_page_config(layout='wide')
 SideBarLinks()
@@ -19,7 +19,7 @@ st.subheader("All Reports")
 reports_placeholder = st.empty()
 def fetch_reports():
 	try:
-		return get('/reports').json()
+		return get_all('/reports')
 	except Exception as e:
 		st.warning(f'Could not fetch reports: {e}')
 		return []
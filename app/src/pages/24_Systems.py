@@ -1,6 +1,6 @@
 import streamlit as st
 from modules.nav import SideBarLinks
-from modules.api_client import BASE_URL, set_base_url, get, post, put, delete
+from modules.api_client import BASE_URL, set_base_url, get_all, post, put, delete
 
 
 st.set_page_config(layout='wide')
@@ -21,7 +21,7 @@ st.subheader("All Systems")
 systems_placeholder = st.empty()
 def fetch_systems():
 	try:
-		return get('/systems').json()
+		return get_all('/systems')
 	except Exception as e:
 		st.warning(f'Could not fetch systems: {e}')
 		return []
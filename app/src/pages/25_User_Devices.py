@@ -3,7 +3,7 @@ logger = logging.getLogger(__name__)
 
 import streamlit as st
 from modules.nav import SideBarLinks
-from modules.api_client import BASE_URL, set_base_url, get, post, put, delete
+from modules.api_client import BASE_URL, set_base_url, get, get_all, post, put, delete
 
 st.set_page_config(layout='wide')
 SideBarLinks()
@@ -96,7 +96,7 @@ logger = logging.getLogger(__name__)
 
 import streamlit as st
 from modules.nav import SideBarLinks
-from modules.api_client import BASE_URL, set_base_url, get, post, put, delete
+from modules.api_client import BASE_URL, set_base_url, get, get_all, post, put, delete
 
 
 st.set_page_config(layout='wide')
@@ -115,7 +115,7 @@ if api_url:
 st.subheader("All Systems")
 systems = []
 try:
-    systems = get("/systems").json()
+    systems = get_all("/systems")
 except Exception as e:
     st.warning(f"Could not fetch systems: {e}")
 st.dataframe(systems, use_container_width=True)
@@ -164,7 +164,7 @@ logger = logging.getLogger(__name__)
 
 import streamlit as st
 from modules.nav import SideBarLinks
-from modules.api_client import BASE_URL, set_base_url, get, post, put, delete
+from modules.api_client import BASE_URL, set_base_url, get, get_all, post, put, delete
 
 
 st.set_page_config(layout='wide')
@@ -183,7 +183,7 @@ if api_url:
 st.subheader("All Systems")
 systems = []
 try:
-	systems = get("/systems").json()
+	systems = get_all("/systems")
 except Exception as e:
 	st.warning(f"Could not fetch systems: {e}")
 st.dataframe(systems, use_container_width=True)
@@ -62,10 +62,14 @@ VALUES
 ('Open Society Foundations', 'Organization', 3000000.00, 4),
 ('Anonymous Philanthropist', 'Individual', 1000000.00, 5);
 
+-- beta_vals is the legacy text form; beta_blob holds the same coefficients as
+-- a binary float64 vector with a dtype/shape header (api/backend/ml_models/coefficients.py).
+-- Convert rows that only have beta_vals with: flask migrate-model-params
 CREATE TABLE model1_params (
     sequence_number INT,
-    beta_vals TEXT
+    beta_vals TEXT,
+    beta_blob LONGBLOB
 );
 
-INSERT INTO model1_params (sequence_number, beta_vals) VALUES
-(1, '[0.25, 0.45, 0.67]');
\ No newline at end of file
+INSERT INTO model1_params (sequence_number, beta_vals, beta_blob) VALUES
+(1, '[0.25, 0.45, 0.67]', X'4245544101013C6638000000000000000300000000000000000000000000D03FCDCCCCCCCCCCDC3F713D0AD7A370E53F');
\ No newline at end of file
@@ -227,13 +227,33 @@ CREATE TABLE Video_Footage (
     footage_ID INT AUTO_INCREMENT NOT NULL,
     camera_ID INT NOT NULL,
     location VARCHAR(100),
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
     duration_seconds INT,
     file_path VARCHAR(255),
     is_archived BOOLEAN DEFAULT FALSE,
     PRIMARY KEY (footage_ID)
 );
 
+-- Maintenance_Checkpoint: resume point (last key processed) of batched
+-- maintenance jobs, e.g. the footage archiver:
+-- flask --app backend_app archive-footage
+DROP TABLE IF EXISTS Maintenance_Checkpoint;
+CREATE TABLE Maintenance_Checkpoint (
+    job VARCHAR(64) NOT NULL,
+    last_key BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (job)
+);
+
+-- Table_Version: change counter per table, shared by all API workers for
+-- ETags/conditional GETs (see api/backend/db_connection/versions.py)
+DROP TABLE IF EXISTS Table_Version;
+CREATE TABLE Table_Version (
+    table_name VARCHAR(64) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL,
+    PRIMARY KEY (table_name)
+);
+
 -- Equipment_Maintenance table for gym equipment
 DROP TABLE IF EXISTS Equipment_Maintenance;
 CREATE TABLE Equipment_Maintenance (
@@ -248,6 +268,19 @@ CREATE TABLE Equipment_Maintenance (
     PRIMARY KEY (equip_ID)
 );
 
+-- Equipment_Availability_Summary: per-location equipment counts by condition.
+-- Maintained by the equipment write handlers (delta per write, same transaction);
+-- verify/rebuild with: flask --app backend_app check-equipment-summary [--repair]
+DROP TABLE IF EXISTS Equipment_Availability_Summary;
+CREATE TABLE Equipment_Availability_Summary (
+    location VARCHAR(100) NOT NULL DEFAULT '',
+    total_equipment INT NOT NULL DEFAULT 0,
+    available_equipment INT NOT NULL DEFAULT 0,
+    maintenance_equipment INT NOT NULL DEFAULT 0,
+    out_of_order_equipment INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (location)
+);
+
 -- Emp_Only table for employee-only access
 DROP TABLE IF EXISTS Emp_Only;
 CREATE TABLE Emp_Only (
@@ -321,6 +354,87 @@ CREATE TABLE Workout_Exercise (
     PRIMARY KEY (workout_ID, exercise_ID, order_index)
 );
 
+-- Workout_Daily_Rollup: one row per (day, user) with that day's workout totals.
+-- Kept in sync with Workout_Log by the triggers below; analytics read this
+-- table so their cost grows with days, not with the number of workouts.
+-- Rebuild/backfill with: flask --app backend_app backfill-workout-rollup
+DROP TABLE IF EXISTS Workout_Daily_Rollup;
+CREATE TABLE Workout_Daily_Rollup (
+    rollup_date DATE NOT NULL,
+    user_ID INT NOT NULL,
+    gym_location VARCHAR(50) NOT NULL,
+    workout_count INT NOT NULL DEFAULT 0,
+    timed_workouts INT NOT NULL DEFAULT 0,
+    total_duration_minutes INT NOT NULL DEFAULT 0,
+    total_calories INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (rollup_date, user_ID),
+    KEY idx_rollup_user_date (user_ID, rollup_date),
+    KEY idx_rollup_location_date (gym_location, rollup_date),
+    FOREIGN KEY (user_ID) REFERENCES User (user_ID)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE
+);
+
+DELIMITER //
+
+CREATE TRIGGER workout_log_rollup_insert AFTER INSERT ON Workout_Log
+FOR EACH ROW
+BEGIN
+    INSERT INTO Workout_Daily_Rollup
+        (rollup_date, user_ID, gym_location, workout_count, timed_workouts,
+         total_duration_minutes, total_calories)
+    SELECT NEW.workout_date, NEW.user_ID, u.gym_location, 1,
+           NEW.duration_minutes IS NOT NULL,
+           COALESCE(NEW.duration_minutes, 0), COALESCE(NEW.calories_burned, 0)
+    FROM User u WHERE u.user_ID = NEW.user_ID
+    ON DUPLICATE KEY UPDATE
+        workout_count = workout_count + 1,
+        timed_workouts = timed_workouts + VALUES(timed_workouts),
+        total_duration_minutes = total_duration_minutes + VALUES(total_duration_minutes),
+        total_calories = total_calories + VALUES(total_calories);
+END//
+
+CREATE TRIGGER workout_log_rollup_delete AFTER DELETE ON Workout_Log
+FOR EACH ROW
+BEGIN
+    UPDATE Workout_Daily_Rollup
+    SET workout_count = workout_count - 1,
+        timed_workouts = timed_workouts - (OLD.duration_minutes IS NOT NULL),
+        total_duration_minutes = total_duration_minutes - COALESCE(OLD.duration_minutes, 0),
+        total_calories = total_calories - COALESCE(OLD.calories_burned, 0)
+    WHERE rollup_date = OLD.workout_date AND user_ID = OLD.user_ID;
+    DELETE FROM Workout_Daily_Rollup
+    WHERE rollup_date = OLD.workout_date AND user_ID = OLD.user_ID AND workout_count <= 0;
+END//
+
+CREATE TRIGGER workout_log_rollup_update AFTER UPDATE ON Workout_Log
+FOR EACH ROW
+BEGIN
+    UPDATE Workout_Daily_Rollup
+    SET workout_count = workout_count - 1,
+        timed_workouts = timed_workouts - (OLD.duration_minutes IS NOT NULL),
+        total_duration_minutes = total_duration_minutes - COALESCE(OLD.duration_minutes, 0),
+        total_calories = total_calories - COALESCE(OLD.calories_burned, 0)
+    WHERE rollup_date = OLD.workout_date AND user_ID = OLD.user_ID;
+    DELETE FROM Workout_Daily_Rollup
+    WHERE rollup_date = OLD.workout_date AND user_ID = OLD.user_ID AND workout_count <= 0;
+
+    INSERT INTO Workout_Daily_Rollup
+        (rollup_date, user_ID, gym_location, workout_count, timed_workouts,
+         total_duration_minutes, total_calories)
+    SELECT NEW.workout_date, NEW.user_ID, u.gym_location, 1,
+           NEW.duration_minutes IS NOT NULL,
+           COALESCE(NEW.duration_minutes, 0), COALESCE(NEW.calories_burned, 0)
+    FROM User u WHERE u.user_ID = NEW.user_ID
+    ON DUPLICATE KEY UPDATE
+        workout_count = workout_count + 1,
+        timed_workouts = timed_workouts + VALUES(timed_workouts),
+        total_duration_minutes = total_duration_minutes + VALUES(total_duration_minutes),
+        total_calories = total_calories + VALUES(total_calories);
+END//
+
+DELIMITER ;
+
 -- Insert sample data
 
 -- Sample Users
@@ -413,6 +527,16 @@ INSERT INTO Equipment_Maintenance (equipment_name, `condition`, requestForm, las
 ('Squat Rack #1', 'available', 'No action needed', '2025-07-20', '2025-08-20', 'Weight Room'),
 ('Dumbbell Set (5-50 lbs)', 'available', 'No action needed', '2025-07-05', '2025-08-05', 'Weight Room');
 
+-- Seed the availability summary from the sample equipment
+INSERT INTO Equipment_Availability_Summary
+    (location, total_equipment, available_equipment, maintenance_equipment, out_of_order_equipment)
+SELECT COALESCE(location, ''), COUNT(*),
+       COUNT(CASE WHEN `condition` = 'available' THEN 1 END),
+       COUNT(CASE WHEN `condition` = 'maintenance' THEN 1 END),
+       COUNT(CASE WHEN `condition` = 'out_of_order' THEN 1 END)
+FROM Equipment_Maintenance
+GROUP BY 1;
+
 -- Sample Memberships
 INSERT INTO Membership (user_ID, status, start_date, end_date, billing, plan_type) VALUES
 (1, 'active', '2025-01-01 00:00:00', '2025-12-31 23:59:59', 99.99, 'Premium'),
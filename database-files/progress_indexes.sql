@@ -0,0 +1,68 @@
+-- Secondary index pack for the progress database.
+--
+-- Each index is matched to a query shape used by backend_app.py or the
+-- blueprints (see the comment above it). Safe to run any number of times:
+-- indexes that already exist are skipped. Runs automatically after
+-- progress_db.sql when the db container is created; for an existing
+-- database run it by hand:
+--
+--   docker exec -i progress-mysql-db mysql -uroot -p progress < database-files/progress_indexes.sql
+--
+-- Check the plans afterwards with: python -m scripts.explain_queries (from api/)
+
+USE progress;
+
+DROP PROCEDURE IF EXISTS add_index_if_missing;
+
+DELIMITER //
+
+CREATE PROCEDURE add_index_if_missing(IN tbl VARCHAR(64), IN idx VARCHAR(64), IN cols VARCHAR(255))
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = tbl AND INDEX_NAME = idx
+    ) THEN
+        SET @ddl = CONCAT('CREATE INDEX `', idx, '` ON `', tbl, '` (', cols, ')');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END//
+
+DELIMITER ;
+
+-- Goal WHERE user_ID = ? AND status = 'active' ORDER BY created_at DESC (progress tracker)
+CALL add_index_if_missing('Goal', 'idx_goal_user_status_created', 'user_ID, status, created_at');
+-- Goal WHERE user_ID = ? ORDER BY created_at DESC (/api/goals/<user_id>)
+CALL add_index_if_missing('Goal', 'idx_goal_user_created', 'user_ID, created_at');
+
+-- Report WHERE user_ID = ? ORDER BY report_date DESC (workout-efficiency, time-summaries)
+CALL add_index_if_missing('Report', 'idx_report_user_date', 'user_ID, report_date');
+
+-- Equipment_Maintenance WHERE `condition` = 'available' AND location = ? (available equipment)
+-- and ORDER BY location, `condition` (equipment status)
+CALL add_index_if_missing('Equipment_Maintenance', 'idx_equipment_location_condition', 'location, `condition`');
+
+-- Video_Footage WHERE timestamp >= ? AND is_archived = FALSE ORDER BY timestamp DESC
+-- (equality column first so the range and the sort both use the index)
+CALL add_index_if_missing('Video_Footage', 'idx_footage_archived_timestamp', 'is_archived, `timestamp`');
+
+-- Membership WHERE status = 'active' (gym-usage) and
+-- WHERE status != 'active' OR end_date < NOW() (inactive memberships, index merge)
+CALL add_index_if_missing('Membership', 'idx_membership_status_end', 'status, end_date');
+CALL add_index_if_missing('Membership', 'idx_membership_end', 'end_date');
+
+-- User_Device JOIN ... WHERE user_ID = ? AND is_active = TRUE (device sync)
+CALL add_index_if_missing('User_Device', 'idx_device_user_active', 'user_ID, is_active');
+
+-- Policy WHERE is_active = TRUE ORDER BY category, title
+CALL add_index_if_missing('Policy', 'idx_policy_active_category_title', 'is_active, category, title');
+
+-- User WHERE user_type = 'regular' ORDER BY name (membership status)
+CALL add_index_if_missing('User', 'idx_user_type_name', 'user_type, name');
+
+-- Workout_Log date windows (rollup backfill) and per-user history
+CALL add_index_if_missing('Workout_Log', 'idx_workout_date', 'workout_date');
+CALL add_index_if_missing('Workout_Log', 'idx_workout_user_date', 'user_ID, workout_date');
+
+DROP PROCEDURE add_index_if_missing;
@@ -0,0 +1,107 @@
+"""
+Inference benchmark for WorkoutRecommendationModel.
+
+Compares the original DataFrame-based predict_workout_plan (kept below as
+predict_with_dataframe) with the NumPy path now used by predict_workout_plan,
+and with predict_batch scoring every user in one pass. Results of all three
+are checked to be identical (apart from the timestamp) before timing.
+
+    python benchmark_predict.py [--model workout_recommendation_model.pkl] [--single 500] [--batch 5000]
+
+Without --model a model is trained on the sample data first.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from workout_recommendation_model import FEATURE_COLUMNS, WorkoutRecommendationModel
+
+
+def predict_with_dataframe(model, user_data):
+    """predict_workout_plan as it was before the NumPy fast path."""
+    user_df = pd.DataFrame([user_data])
+    for col in ['fitness_level', 'goal']:
+        if col in model.label_encoders:
+            user_df[col] = model.label_encoders[col].transform(user_df[col])
+    X_user = model.scaler.transform(user_df[FEATURE_COLUMNS])
+    prediction = model.model.predict(X_user)[0]
+    probabilities = model.model.predict_proba(X_user)[0]
+    recommended_plan = model.label_encoders['recommended_plan'].inverse_transform([prediction])[0]
+    # tied plans in class order, the order predict() breaks ties in
+    top_indices = np.argsort(-probabilities, kind='stable')[:3]
+    top_plans = []
+    for idx in top_indices:
+        plan_name = model.label_encoders['recommended_plan'].inverse_transform([idx])[0]
+        top_plans.append({'plan': plan_name, 'confidence': float(probabilities[idx])})
+    return {
+        'recommended_plan': recommended_plan,
+        'confidence': float(probabilities[prediction]),
+        'top_recommendations': top_plans,
+    }
+
+
+def make_users(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'age': int(rng.integers(18, 65)),
+            'fitness_level': str(rng.choice(['beginner', 'intermediate', 'advanced'])),
+            'goal': str(rng.choice(['weight_loss', 'muscle_gain', 'endurance', 'strength'])),
+            'experience_years': int(rng.integers(0, 20)),
+            'bmi': float(rng.normal(25, 5)),
+            'weekly_workouts': int(rng.integers(1, 7)),
+            'avg_workout_duration': int(rng.integers(20, 120)),
+        }
+        for _ in range(n)
+    ]
+
+
+def strip_timestamp(result):
+    return {key: value for key, value in result.items() if key != 'timestamp'}
+
+
+def timed(label, n, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<36} {elapsed * 1000:10.1f} ms   {elapsed / n * 1e6:10.1f} us/user")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', help='joblib artifact written by save_model()')
+    parser.add_argument('--single', type=int, default=500, help='users scored one call at a time')
+    parser.add_argument('--batch', type=int, default=5000, help='users scored by predict_batch')
+    args = parser.parse_args()
+
+    model = WorkoutRecommendationModel()
+    if args.model:
+        model.load_model(args.model)
+    else:
+        model.train()
+
+    users = make_users(max(args.single, args.batch))
+    check = users[:200]
+    expected = [predict_with_dataframe(model, user) for user in check]
+    assert [strip_timestamp(model.predict_workout_plan(user)) for user in check] == expected
+    assert [strip_timestamp(result) for result in model.predict_batch(check)] == expected
+
+    print(f"\nsingle-row calls ({args.single} users)")
+    old = timed('DataFrame predict_workout_plan', args.single,
+                lambda: [predict_with_dataframe(model, user) for user in users[:args.single]])
+    new = timed('NumPy predict_workout_plan', args.single,
+                lambda: [model.predict_workout_plan(user) for user in users[:args.single]])
+    print(f"  speedup: {old / new:.1f}x")
+
+    print(f"\nbatch ({args.batch} users)")
+    per_user = old / args.single * args.batch
+    print(f"  {'DataFrame, one call per user (est.)':<36} {per_user * 1000:10.1f} ms")
+    batch = timed('predict_batch', args.batch, lambda: model.predict_batch(users[:args.batch]))
+    print(f"  speedup: {per_user / batch:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
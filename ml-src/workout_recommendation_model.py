@@ -4,10 +4,27 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.metrics import accuracy_score, classification_report
+import argparse
 import joblib
 import json
+import os
+import re
+import sklearn
+import tempfile
+import time
 from datetime import datetime
 
+FEATURE_COLUMNS = ['age', 'fitness_level', 'goal', 'experience_years',
+                   'bmi', 'weekly_workouts', 'avg_workout_duration']
+CATEGORICAL_COLUMNS = ['fitness_level', 'goal']
+
+# Registry layout, shared with api/backend/ml_models/registry.py:
+#   <registry>/v<N>/model.joblib, <registry>/v<N>/metadata.json, <registry>/ACTIVE
+REGISTRY_ARTIFACT = 'model.joblib'
+REGISTRY_METADATA = 'metadata.json'
+REGISTRY_ACTIVE = 'ACTIVE'
+VERSION_PATTERN = re.compile(r'^v(\d+)$')
+
 class WorkoutRecommendationModel:
     """
     Machine Learning model for recommending workout plans based on user goals and fitness data.
@@ -19,6 +36,8 @@ class WorkoutRecommendationModel:
         self.label_encoders = {}
         self.scaler = StandardScaler()
         self.is_trained = False
+        self._codes = None
+        self.metrics = {}
         
     def prepare_sample_data(self):
         """
@@ -101,10 +120,7 @@ class WorkoutRecommendationModel:
             data[col] = self.label_encoders[col].fit_transform(data[col])
         
         # Separate features and target
-        feature_columns = ['age', 'fitness_level', 'goal', 'experience_years', 
-                          'bmi', 'weekly_workouts', 'avg_workout_duration']
-        
-        X = data[feature_columns]
+        X = data[FEATURE_COLUMNS]
         y = data['recommended_plan']
         
         # Scale numerical features
@@ -128,7 +144,9 @@ class WorkoutRecommendationModel:
         )
         
         print("Training Random Forest model...")
+        started = time.perf_counter()
         self.model.fit(X_train, y_train)
+        training_seconds = time.perf_counter() - started
         
         # Evaluate model
         y_pred = self.model.predict(X_test)
@@ -139,8 +157,75 @@ class WorkoutRecommendationModel:
         print(classification_report(y_test, y_pred))
         
         self.is_trained = True
+        self.metrics = {
+            'accuracy': float(accuracy),
+            'trained_at': datetime.now().isoformat(),
+            'training_seconds': round(training_seconds, 3),
+            'training_rows': int(len(X_train)),
+        }
+        self._prepare_fast_path()
         return accuracy
     
+    def _prepare_fast_path(self):
+        """
+        Precompute what inference needs from the fitted preprocessing objects:
+        category -> code dicts (the mapping LabelEncoder.transform applies),
+        the scaler's mean/scale vectors and the plan name of each
+        predict_proba column.
+        """
+        self._codes = {
+            col: {value: code for code, value in enumerate(self.label_encoders[col].classes_)}
+            for col in CATEGORICAL_COLUMNS
+        }
+        self._mean = np.asarray(self.scaler.mean_, dtype=np.float64)
+        self._scale = np.asarray(self.scaler.scale_, dtype=np.float64)
+        self._plans = self.label_encoders['recommended_plan'].classes_[self.model.classes_].tolist()
+    
+    def _encode(self, records):
+        """
+        Fill a preallocated (n x features) float64 array from a list of user dicts
+        and scale it in place, without building a DataFrame.
+        """
+        if getattr(self, '_codes', None) is None:
+            self._prepare_fast_path()
+        X = np.empty((len(records), len(FEATURE_COLUMNS)), dtype=np.float64)
+        for j, col in enumerate(FEATURE_COLUMNS):
+            codes = self._codes.get(col)
+            if codes is None:
+                X[:, j] = [record[col] for record in records]
+                continue
+            try:
+                X[:, j] = [codes[record[col]] for record in records]
+            except KeyError as e:
+                raise ValueError(f"Unknown {col} {e.args[0]!r}; expected one of {list(codes)}")
+        X -= self._mean
+        X /= self._scale
+        return X
+    
+    def _score(self, X):
+        """
+        One predict_proba call for every row of X, decoded into the result dicts.
+        The best plan is the argmax of the probabilities, which is what
+        RandomForestClassifier.predict returns (the first plan on ties), so the
+        forest runs only once.
+        """
+        probabilities = self.model.predict_proba(X)
+        best_indices = np.argmax(probabilities, axis=1)
+        # stable sort on -p: tied plans keep class order, like argmax
+        top_indices = np.argsort(-probabilities, axis=1, kind='stable')[:, :3]
+        timestamp = datetime.now().isoformat()
+        results = []
+        for row, best, indices in zip(probabilities.tolist(), best_indices.tolist(), top_indices.tolist()):
+            results.append({
+                'recommended_plan': self._plans[best],
+                'confidence': float(row[best]),
+                'top_recommendations': [
+                    {'plan': self._plans[idx], 'confidence': float(row[idx])} for idx in indices
+                ],
+                'timestamp': timestamp
+            })
+        return results
+    
     def predict_workout_plan(self, user_data):
         """
         Predict workout plan recommendation for a user.
@@ -161,43 +246,24 @@ class WorkoutRecommendationModel:
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
         
-        # Prepare user data
-        user_df = pd.DataFrame([user_data])
+        return self._score(self._encode([user_data]))[0]
+    
+    def predict_batch(self, records):
+        """
+        Predict workout plans for many users in one vectorized pass.
         
-        # Encode categorical variables
-        for col in ['fitness_level', 'goal']:
-            if col in self.label_encoders:
-                user_df[col] = self.label_encoders[col].transform(user_df[col])
-        
-        # Scale features
-        feature_columns = ['age', 'fitness_level', 'goal', 'experience_years', 
-                          'bmi', 'weekly_workouts', 'avg_workout_duration']
-        X_user = self.scaler.transform(user_df[feature_columns])
-        
-        # Make prediction
-        prediction = self.model.predict(X_user)[0]
-        probabilities = self.model.predict_proba(X_user)[0]
-        
-        # Decode prediction
-        recommended_plan = self.label_encoders['recommended_plan'].inverse_transform([prediction])[0]
-        
-        # Get confidence scores for top 3 recommendations
-        top_indices = np.argsort(probabilities)[-3:][::-1]
-        top_plans = []
-        for idx in top_indices:
-            plan_name = self.label_encoders['recommended_plan'].inverse_transform([idx])[0]
-            confidence = probabilities[idx]
-            top_plans.append({
-                'plan': plan_name,
-                'confidence': float(confidence)
-            })
+        Args:
+            records (list[dict]): user characteristics, as for predict_workout_plan
         
-        return {
-            'recommended_plan': recommended_plan,
-            'confidence': float(probabilities[prediction]),
-            'top_recommendations': top_plans,
-            'timestamp': datetime.now().isoformat()
-        }
+        Returns:
+            list[dict]: one predict_workout_plan-style result per record, in order
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        if len(records) == 0:
+            return []
+        
+        return self._score(self._encode(records))
     
     def save_model(self, filepath):
         """
@@ -216,16 +282,72 @@ class WorkoutRecommendationModel:
         joblib.dump(model_data, filepath)
         print(f"Model saved to {filepath}")
     
-    def load_model(self, filepath):
+    def save_to_registry(self, registry_dir, activate=False):
         """
-        Load a previously trained model.
+        Save the model as the next version (v1, v2, ...) of a model registry
+        directory, with a metadata.json of its accuracy, training time and
+        feature list. The artifact is written uncompressed so it can be
+        loaded with mmap_mode. The version directory is built under a
+        temporary name and renamed into place, so readers never see it
+        half-written. With activate=True it also becomes the ACTIVE version.
+        
+        Returns:
+            str: the new version name
         """
-        model_data = joblib.load(filepath)
+        if not self.is_trained:
+            raise ValueError("Model must be trained before saving")
+        
+        os.makedirs(registry_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=registry_dir)
+        os.chmod(staging, 0o755)
+        joblib.dump({
+            'model': self.model,
+            'label_encoders': self.label_encoders,
+            'scaler': self.scaler,
+            'is_trained': self.is_trained
+        }, os.path.join(staging, REGISTRY_ARTIFACT))
+        
+        while True:
+            numbers = [int(m.group(1)) for m in map(VERSION_PATTERN.match, os.listdir(registry_dir)) if m]
+            version = f"v{max(numbers, default=0) + 1}"
+            metadata = {
+                'version': version,
+                **self.metrics,
+                'features': FEATURE_COLUMNS,
+                'plans': self._plans,
+                'n_estimators': self.model.n_estimators,
+                'sklearn_version': sklearn.__version__,
+                'saved_at': datetime.now().isoformat()
+            }
+            with open(os.path.join(staging, REGISTRY_METADATA), 'w') as f:
+                json.dump(metadata, f, indent=2)
+            try:
+                os.rename(staging, os.path.join(registry_dir, version))
+                break
+            except OSError:
+                # another process published this version number first: take the next one
+                if not os.path.isdir(os.path.join(registry_dir, version)):
+                    raise
+        
+        if activate:
+            activate_version(registry_dir, version)
+        print(f"Model saved to {registry_dir} as {version}")
+        return version
+    
+    def load_model(self, filepath, mmap_mode=None):
+        """
+        Load a previously trained model. With mmap_mode='r' the artifact's
+        NumPy arrays are memory-mapped instead of read into memory (the file
+        must have been saved uncompressed, as save_to_registry does).
+        """
+        model_data = joblib.load(filepath, mmap_mode=mmap_mode)
         
         self.model = model_data['model']
         self.label_encoders = model_data['label_encoders']
         self.scaler = model_data['scaler']
         self.is_trained = model_data['is_trained']
+        if self.is_trained:
+            self._prepare_fast_path()
         
         print(f"Model loaded from {filepath}")
     
@@ -236,18 +358,31 @@ class WorkoutRecommendationModel:
         if not self.is_trained:
             raise ValueError("Model must be trained before getting feature importance")
         
-        feature_names = ['age', 'fitness_level', 'goal', 'experience_years', 
-                        'bmi', 'weekly_workouts', 'avg_workout_duration']
-        
         importance_scores = self.model.feature_importances_
         
-        feature_importance = dict(zip(feature_names, importance_scores))
+        feature_importance = dict(zip(FEATURE_COLUMNS, importance_scores))
         return dict(sorted(feature_importance.items(), key=lambda x: x[1], reverse=True))
 
+def activate_version(registry_dir, version):
+    """
+    Atomically point the registry's ACTIVE file at `version`.
+    """
+    if not os.path.isfile(os.path.join(registry_dir, version, REGISTRY_ARTIFACT)):
+        raise ValueError(f"No model version {version!r} in {registry_dir}")
+    tmp = os.path.join(registry_dir, f".{REGISTRY_ACTIVE}.{os.getpid()}")
+    with open(tmp, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp, os.path.join(registry_dir, REGISTRY_ACTIVE))
+
 def main():
     """
     Main function to demonstrate the workout recommendation model.
     """
+    parser = argparse.ArgumentParser(description='Train and test the workout recommendation model.')
+    parser.add_argument('--registry', help='also save the model as a new version of this registry directory')
+    parser.add_argument('--activate', action='store_true', help='make the new registry version the active one')
+    args = parser.parse_args()
+    
     print("🏋️ Progress Fitness App - Workout Recommendation Model")
     print("=" * 60)
     
@@ -302,6 +437,8 @@ def main():
     # Save model
     print("\n💾 Saving model...")
     model.save_model('workout_recommendation_model.pkl')
+    if args.registry:
+        model.save_to_registry(args.registry, activate=args.activate)
     
     print("\n✅ Model training and testing completed!")
 